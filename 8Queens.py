@@ -1,8 +1,9 @@
 import tkinter as tk
-import random
 from tkinter import messagebox, ttk
 import time
 
+from queens_core import solve_backtracking, QueensGA
+
 
 class EightQueensGUI:
     def __init__(self, root):
@@ -57,9 +58,9 @@ class EightQueensGUI:
 
     def solve_backtracking(self):
         self.clear_board()
-        board = [-1] * self.board_size
         start_time = time.time()
-        if self.backtracking_helper(board, 0):
+        board = solve_backtracking(self.board_size, self.report_try)
+        if board is not None:
             end_time = time.time()
             self.display_solution(board)
             print(f"Backtracking solution found in {end_time - start_time:.4f} seconds")
@@ -67,86 +68,32 @@ class EightQueensGUI:
         else:
             messagebox.showinfo("No Solution", "No solution found with backtracking.")
 
-    def is_safe(self, board, row, col):
-        for i in range(row):
-            if board[i] == col or abs(board[i] - col) == row - i:
-                return False
-        return True
-
-    def backtracking_helper(self, board, row):
-        if row == self.board_size:
-            return True
-        for col in range(self.board_size):
-            if self.is_safe(board, row, col):
-                board[row] = col
-                print(f"Trying: Row {row}, Column {col}")
-                if self.backtracking_helper(board, row + 1):
-                    return True
-                board[row] = -1
-        return False
+    def report_try(self, row, col):
+        print(f"Trying: Row {row}, Column {col}")
 
     def solve_genetic_algorithm(self):
         self.clear_board()
-        population_size = 100
-        mutation_rate = 0.1
-        generations = 1000
-
-        population = [self.random_chromosome() for _ in range(population_size)]
-
-        start_time = time.time()
-        for generation in range(generations):
-            population = sorted(population, key=lambda x: self.fitness(x), reverse=True)
-            best_fitness = self.fitness(population[0])
+        ga = QueensGA(self.board_size, population_size=100, mutation_rate=0.1, generations=1000)
 
+        def show_generation(generation, best, best_fitness):
             print(f"Generation {generation + 1}: Best Fitness = {best_fitness}")
-
-            self.progress['value'] = (generation / generations) * 100
+            self.progress['value'] = (generation / ga.generations) * 100
             self.root.update_idletasks()
 
-            if best_fitness == 28:
-                end_time = time.time()
-                self.display_solution(population[0])
-                print(f"Solution found in generation {generation + 1}")
-                print(f"Time taken: {end_time - start_time:.4f} seconds")
-                messagebox.showinfo("Success", f"Solution found in generation {generation + 1}!")
-                return
-
-            next_generation = population[:10]
-            for _ in range(population_size - 10):
-                parent1, parent2 = random.sample(population[:50], 2)
-                child = self.crossover(parent1, parent2)
-                if random.random() < mutation_rate:
-                    child = self.mutate(child)
-                next_generation.append(child)
-
-            population = next_generation
-
+        start_time = time.time()
+        best, best_fitness, generations = ga.run(show_generation)
         end_time = time.time()
-        self.display_solution(population[0])
-        print(f"Best solution found: {self.fitness(population[0])} non-attacking pairs")
-        print(f"Time taken: {end_time - start_time:.4f} seconds")
-        messagebox.showinfo("Partial Solution",
-                            f"Best solution found: {self.fitness(population[0])} non-attacking pairs")
-
-    def random_chromosome(self):
-        return random.sample(range(self.board_size), self.board_size)
-
-    def fitness(self, chromosome):
-        return sum(1 for i in range(len(chromosome))
-                   for j in range(i + 1, len(chromosome))
-                   if chromosome[i] != chromosome[j] and
-                   abs(chromosome[i] - chromosome[j]) != j - i)
-
-    def crossover(self, parent1, parent2):
-        cross_point = random.randint(1, self.board_size - 1)
-        child = parent1[:cross_point]
-        child.extend(gene for gene in parent2 if gene not in child)
-        return child
-
-    def mutate(self, chromosome):
-        i, j = random.sample(range(self.board_size), 2)
-        chromosome[i], chromosome[j] = chromosome[j], chromosome[i]
-        return chromosome
+        self.display_solution(best)
+
+        if best_fitness == ga.max_fitness:
+            print(f"Solution found in generation {generations}")
+            print(f"Time taken: {end_time - start_time:.4f} seconds")
+            messagebox.showinfo("Success", f"Solution found in generation {generations}!")
+        else:
+            print(f"Best solution found: {best_fitness} non-attacking pairs")
+            print(f"Time taken: {end_time - start_time:.4f} seconds")
+            messagebox.showinfo("Partial Solution",
+                                f"Best solution found: {best_fitness} non-attacking pairs")
 
     def clear_board(self):
         self.draw_board()
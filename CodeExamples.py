@@ -2,6 +2,10 @@ import random
 import math
 from collections import deque
 
+from fitness_cache import FitnessCache
+from selection import CumulativeSampler
+from mutation import decaying_rate, mutation_positions
+
 
 class Candidate:
     def __init__(self, chromosome, fitness=0.0):
@@ -18,6 +22,7 @@ class Candidate:
         Calculates and updates the fitness value for this candidate.
 
         :param fitness_function: A function that takes a chromosome and returns a fitness value.
+            Pass a FitnessCache wrapping the function to evaluate each distinct chromosome only once.
         """
         self.fitness = fitness_function(self.chromosome)
 
@@ -261,12 +266,25 @@ def test_TS():
     # Initial candidate with a random chromosome
     initial_candidate = Candidate([random.randint(0, 100) for _ in range(50)])
 
+    # Tabu Search revisits chromosomes, so memoize the fitness function
+    cached_fitness_function = FitnessCache(example_fitness_function, maxsize=1000)
+
     # Perform Tabu Search on the initial candidate
-    best_candidate = tabu_search(initial_candidate, example_fitness_function)
+    best_candidate = tabu_search(initial_candidate, cached_fitness_function)
 
     # Output the best candidate's chromosome and fitness
     print(f"Best Chromosome: {best_candidate.chromosome}")
     print(f"Best Fitness: {best_candidate.fitness}")
+    print(f"Fitness cache: {cached_fitness_function.stats()}")
+
+
+def fitness_wheel(generation):
+    """Prefix-sum sampler over the fitnesses of a generation, uniform when every fitness is zero."""
+    fitnesses = [candidate.fitness for candidate in generation]
+    if sum(fitnesses) <= 0:
+        # nothing to be proportional to; draw uniformly instead of failing
+        fitnesses = [1.0] * len(generation)
+    return CumulativeSampler(fitnesses)
 
 
 def roulette_wheel_selection(generation):
@@ -276,17 +294,12 @@ def roulette_wheel_selection(generation):
     :param generation: List of Candidate objects.
     :return: A tuple of two selected parents.
     """
-    # Calculate the total fitness of the generation
-    total_fitness = sum(candidate.fitness for candidate in generation)
+    # Prefix sums of the fitnesses, built once; each spin is then a binary search instead of a walk over the generation
+    wheel = fitness_wheel(generation)
 
     # Create a helper function to perform roulette wheel selection once
     def select_one():
-        pick = random.uniform(0, total_fitness)
-        current = 0
-        for candidate in generation:
-            current += candidate.fitness
-            if current > pick:
-                return candidate
+        return generation[wheel.sample(random)]
 
     # Select two parents
     parent1 = select_one()
@@ -307,16 +320,11 @@ def rank_based_selection(generation):
     # Rank the generation by fitness
     ranked_generation = sorted(generation, key=lambda c: c.fitness)
 
-    # Assign selection probabilities based on rank
-    total_ranks = sum(range(1, len(ranked_generation) + 1))
+    # Assign selection probabilities based on rank (1-based, so the worst candidate can still be picked)
+    wheel = CumulativeSampler(range(1, len(ranked_generation) + 1))
 
     def select_one():
-        pick = random.uniform(0, total_ranks)
-        current = 0
-        for i, candidate in enumerate(ranked_generation):
-            current += (i + 1)  # rank is 1-based
-            if current > pick:
-                return candidate
+        return ranked_generation[wheel.sample(random)]
 
     # Select two parents
     parent1 = select_one()
@@ -353,23 +361,11 @@ def stochastic_universal_sampling(generation, num_parents=2):
 
     :param generation: List of Candidate objects.
     :param num_parents: Number of parents to select.
-    :return: A tuple of two selected parents.
+    :return: A tuple of num_parents selected parents.
     """
-    total_fitness = sum(candidate.fitness for candidate in generation)
-    pointer_spacing = total_fitness / num_parents
-    start_point = random.uniform(0, pointer_spacing)
-
-    parents = []
-    current_point = start_point
-    cumulative_fitness = 0
-
-    for candidate in generation:
-        cumulative_fitness += candidate.fitness
-        while cumulative_fitness > current_point and len(parents) < num_parents:
-            parents.append(candidate)
-            current_point += pointer_spacing
-
-    return parents[0], parents[1] #random.sample(parents, 2)
+    # num_parents evenly spaced pointers with a single random offset, each located by binary search
+    wheel = fitness_wheel(generation)
+    return tuple(generation[i] for i in wheel.universal(num_parents, random))
 
 
 def truncation_selection(generation, truncation_percentage=0.5):
@@ -545,15 +541,12 @@ def uniform_mutation(candidate, mutation_probability):
     :param mutation_probability: The probability that each gene will be mutated.
     :return: A new Candidate object after mutation.
     """
-    offspring_chromosome = []
+    offspring_chromosome = candidate.chromosome[:]
 
-    for gene in candidate.chromosome:
-        if random.random() < mutation_probability:
-            # Mutate the gene (assuming genes are integers, this could be customized)
-            new_gene = random.randint(0, 100)  # Adjust the range based on the problem
-        else:
-            new_gene = gene
-        offspring_chromosome.append(new_gene)
+    # Jump straight from one mutated gene to the next instead of rolling for every gene
+    for index in mutation_positions(len(offspring_chromosome), mutation_probability, random):
+        # Mutate the gene (assuming genes are integers, this could be customized)
+        offspring_chromosome[index] = random.randint(0, 100)  # Adjust the range based on the problem
 
     return Candidate(offspring_chromosome)
 
@@ -678,16 +671,13 @@ def non_uniform_mutation(candidate, generation, max_generations, mutation_probab
     :param mutation_probability: Probability of mutation for each gene.
     :return: A new Candidate after mutation.
     """
-    offspring_chromosome = []
-    for gene in candidate.chromosome:
-        if random.random() < mutation_probability:
-            # Mutation magnitude decreases as generation increases
-            delta = random.uniform(0, 1) * (1 - generation / max_generations)
-            # Apply random positive or negative mutation
-            new_gene = gene + random.choice([-1, 1]) * delta
-            offspring_chromosome.append(new_gene)
-        else:
-            offspring_chromosome.append(gene)
+    offspring_chromosome = candidate.chromosome[:]
+    # Mutation magnitude decreases as generation increases
+    scale = decaying_rate(generation, max_generations, 1.0)
+    for index in mutation_positions(len(offspring_chromosome), mutation_probability, random):
+        delta = random.uniform(0, 1) * scale
+        # Apply random positive or negative mutation
+        offspring_chromosome[index] += random.choice([-1, 1]) * delta
 
     return Candidate(offspring_chromosome)
 
@@ -709,13 +699,9 @@ def adaptive_mutation(candidate, population, improvement_threshold=0.1, mutation
     if candidate.fitness < avg_fitness * (1 + improvement_threshold):
         mutation_probability *= 2  # Increase mutation rate if no significant improvement
 
-    offspring_chromosome = []
-    for gene in candidate.chromosome:
-        if random.random() < mutation_probability:
-            # Mutate the gene
-            new_gene = random.randint(0, 100)  # Assuming integer genes for now
-        else:
-            new_gene = gene
-        offspring_chromosome.append(new_gene)
+    offspring_chromosome = candidate.chromosome[:]
+    for index in mutation_positions(len(offspring_chromosome), mutation_probability, random):
+        # Mutate the gene
+        offspring_chromosome[index] = random.randint(0, 100)  # Assuming integer genes for now
 
     return Candidate(offspring_chromosome)
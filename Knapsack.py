@@ -2,23 +2,28 @@ import math
 import random
 import tkinter as tk
 from tkinter import *
+from tkinter import simpledialog
 import threading
+import time
 
-num_items = 100
-frac_target = 0.7
-min_value = 128
-max_value = 2048
+from genomes import genome_bits, iter_set_bits
+from subset_sum import solve_exact, ReachableSumIndex
+from knapsack_core import num_items, num_generations, RouletteGA, random_values, random_target
+from snapshots import LatestSnapshot
+from ksp_view import LargeItemView, MAX_DRAWN_ITEMS
+from profiling import Profiler
+from stagnation import gene_frequencies, mean_pairwise_hamming
 
 screen_padding = 25
 item_padding = 5
 stroke_width = 5
 
-num_generations = 1000
-pop_size = 50
-elitism_count = 2
-mutation_rate = 0.1
-
 sleep_time = 0.1
+frame_rate = 30  # UI refreshes per second in turbo mode
+
+index_dir = 'ksp_index'
+profile_dir = 'profiles'
+profile_generations = 50  # default window of the "Profile Next Generations" command
 
 
 def random_rgb_color():
@@ -30,13 +35,15 @@ def random_rgb_color():
 
 
 class Item:
-    def __init__(self):
-        self.value = random.randint(min_value, max_value)
+    def __init__(self, value):
+        self.value = value
         self.color = random_rgb_color()
         self.x = 0
         self.y = 0
         self.w = 0
         self.h = 0
+        self.rect_id = None
+        self.active = False
 
     def place(self, x, y, w, h):
         self.x = x
@@ -45,23 +52,21 @@ class Item:
         self.h = h
 
     def draw(self, canvas, active=False):
+        # creates the canvas objects once; later frames only go through set_active
         canvas.create_text(self.x+self.w+item_padding+stroke_width*2, self.y+self.h/2, text=f'{self.value}')
-        if active:
-            canvas.create_rectangle(self.x,
-                                    self.y,
-                                    self.x+self.w,
-                                    self.y+self.h,
-                                    fill=self.color,
-                                    outline=self.color,
-                                    width=stroke_width)
-        else:
-            canvas.create_rectangle(self.x,
-                                    self.y,
-                                    self.x+self.w,
-                                    self.y+self.h,
-                                    fill='',
-                                    outline=self.color,
-                                    width=stroke_width)
+        self.rect_id = canvas.create_rectangle(self.x,
+                                               self.y,
+                                               self.x+self.w,
+                                               self.y+self.h,
+                                               fill=self.color if active else '',
+                                               outline=self.color,
+                                               width=stroke_width)
+        self.active = active
+
+    def set_active(self, canvas, active):
+        if active != self.active:
+            canvas.itemconfigure(self.rect_id, fill=self.color if active else '')
+            self.active = active
 
 
 class UI(tk.Tk):
@@ -83,6 +88,12 @@ class UI(tk.Tk):
         self.canvas.place(x=0, y=0, width=self.width, height=self.height)
 
         self.items_list = []
+        # retained canvas state: ids of the bars/labels updated in place, and the genome the items show
+        self.canvas_ids = {}
+        self.drawn_bits = None
+        # grid view used instead of per-item rectangles when there are more than MAX_DRAWN_ITEMS items
+        self.view = None
+        self.profiler = Profiler(profile_dir)
 
         # We create a standard banner menu bar and attach it to the window
         menu_bar = Menu(self)
@@ -95,8 +106,12 @@ class UI(tk.Tk):
         #   for the menu, it will underline the appropriate key to indicate the shortcut
         menu_bar.add_cascade(menu=menu_K, label='Knapsack', underline=0)
 
+        self.sum_index = None
+
         def generate():
+            self.clear_canvas()
             self.generate_knapsack()
+            self.build_sum_index()
             self.draw_items()
         # The add_command function adds an item to a menu, as opposed to add_cascade which adds a sub-menu
         # Note that we use command=generate without the () - we're telling it which function to call,
@@ -106,17 +121,12 @@ class UI(tk.Tk):
         self.target = 0
 
         def set_target():
-            target_set = []
-            for x in range(int(num_items * frac_target)):
-                item = self.items_list[random.randint(0, len(self.items_list)-1)]
-                while item in target_set:
-                    item = self.items_list[random.randint(0, len(self.items_list) - 1)]
-                target_set.append(item)
-            total = 0
-            for item in target_set:
-                total += item.value
-            self.target = total
+            self.target = random_target([item.value for item in self.items_list])
             self.draw_target()
+            if self.sum_index is not None:
+                result = self.sum_index.solve(self.target)
+                print(f'Target {self.target}: nearest reachable sum {result.total} '
+                      f'({len(result.indices)} items, looked up in {result.elapsed * 1000:.3f} ms)')
         menu_K.add_command(label="Get Target", command=set_target, underline=0)
 
         def start_thread():
@@ -124,25 +134,60 @@ class UI(tk.Tk):
             thread.start()
         menu_K.add_command(label="Run", command=start_thread, underline=0)
 
+        def start_turbo_thread():
+            # the GA runs flat out in the worker; the UI draws its newest best at frame_rate
+            snapshots = LatestSnapshot()
+            thread = threading.Thread(target=self.run_turbo, args=(snapshots,))
+            thread.start()
+            self.poll_snapshots(snapshots)
+        menu_K.add_command(label="Run (Turbo)", command=start_turbo_thread, underline=4)
+
+        def start_exact_thread():
+            thread = threading.Thread(target=self.solve_exactly, args=())
+            thread.start()
+        menu_K.add_command(label="Solve Exactly", command=start_exact_thread, underline=0)
+
+        def profile():
+            # the next run's (or the current run's) next N generations go through cProfile and tracemalloc
+            generations = simpledialog.askinteger("Profile", "Generations to profile:", parent=self,
+                                                  initialvalue=profile_generations, minvalue=1)
+            if generations:
+                self.profiler.request(generations, 'knapsack')
+        menu_K.add_command(label="Profile Next Generations...", command=profile, underline=0)
+
         # We have to call self.mainloop() in our constructor (__init__) to start the UI loop and display the window
         self.mainloop()
 
-    def get_rand_item(self):
-        i1 = Item()
-        for i2 in self.items_list:
-            if i1.value == i2.value:
-                return None
-        return i1
-
-    def add_item(self):
-        item = self.get_rand_item()
-        while item is None:
-            item = self.get_rand_item()
-        self.items_list.append(item)
+    def build_sum_index(self):
+        # one-time reachable-sum index for this item set, so any target can be answered without a search;
+        # built on a worker thread so large item sets don't freeze the window
+        self.sum_index = None
+        values = [item.value for item in self.items_list]
+        thread = threading.Thread(target=self.index_worker, args=(values,), daemon=True)
+        thread.start()
+
+    def index_worker(self, values):
+        try:
+            index = ReachableSumIndex.cached(values, index_dir)
+        except ValueError as e:
+            print(f'No reachable-sum index: {e}')
+            self.after(0, self.draw_status, 'No reachable-sum index (too many items)')
+            return
+        self.after(0, self.set_sum_index, values, index)
+
+    def set_sum_index(self, values, index):
+        # the items may have been regenerated while the index was being built
+        if values == [item.value for item in self.items_list]:
+            self.sum_index = index
 
     def generate_knapsack(self):
-        for i in range(num_items):
-            self.add_item()
+        self.items_list = [Item(value) for value in random_values(num_items)]
+        if num_items > MAX_DRAWN_ITEMS:
+            self.view = LargeItemView(self.canvas, [item.value for item in self.items_list],
+                                      screen_padding, screen_padding,
+                                      (self.width - screen_padding) / 8 * 6 - screen_padding,
+                                      self.height - screen_padding - 200)
+            return
 
         item_max = 0
         item_min = 9999
@@ -173,19 +218,43 @@ class UI(tk.Tk):
                            item_h)
 
     def clear_canvas(self):
+        if self.view is not None:
+            self.view.destroy()
+            self.view = None
         self.canvas.delete("all")
+        self.canvas_ids.clear()
+        self.drawn_bits = None
+
+    def retained_rectangle(self, name, x0, y0, x1, y1, **options):
+        # create the rectangle the first time, afterwards just move it
+        if name in self.canvas_ids:
+            self.canvas.coords(self.canvas_ids[name], x0, y0, x1, y1)
+        else:
+            self.canvas_ids[name] = self.canvas.create_rectangle(x0, y0, x1, y1, **options)
+
+    def retained_text(self, name, x, y, text, **options):
+        # create the label the first time, afterwards just move it and change its text
+        if name in self.canvas_ids:
+            self.canvas.coords(self.canvas_ids[name], x, y)
+            self.canvas.itemconfigure(self.canvas_ids[name], text=text)
+        else:
+            self.canvas_ids[name] = self.canvas.create_text(x, y, text=text, **options)
 
     def draw_items(self):
+        if self.view is not None:
+            self.view.show()
+            return
         for item in self.items_list:
             item.draw(self.canvas)
+        self.drawn_bits = 0
 
     def draw_target(self):
         x = (self.width - screen_padding) / 8 * 7
         y = screen_padding
         w = (self.width - screen_padding) / 8 - screen_padding
         h = self.height / 2 - screen_padding
-        self.canvas.create_rectangle(x, y, x + w, y + h, fill='black')
-        self.canvas.create_text(x+w//2, y+h+screen_padding, text=f'{self.target}', font=('Arial', 18))
+        self.retained_rectangle('target_bar', x, y, x + w, y + h, fill='black')
+        self.retained_text('target_text', x+w//2, y+h+screen_padding, f'{self.target}', font=('Arial', 18))
 
     def draw_sum(self, item_sum, target):
         x = (self.width - screen_padding) / 8 * 6
@@ -194,141 +263,124 @@ class UI(tk.Tk):
         h = self.height / 2 - screen_padding
         # print(f'{item_sum} / {target} * {h} = {item_sum/target} * {h} = {item_sum/target*h}')
         h *= (item_sum / target)
-        self.canvas.create_rectangle(x, y, x + w, y + h, fill='black')
-        self.canvas.create_text(x+w//2, y+h+screen_padding, text=f'{item_sum} ({"+" if item_sum>target else "-"}{abs(item_sum-target)})', font=('Arial', 18))
+        self.retained_rectangle('sum_bar', x, y, x + w, y + h, fill='black')
+        self.retained_text('sum_text', x+w//2, y+h+screen_padding, f'{item_sum} ({"+" if item_sum>target else "-"}{abs(item_sum-target)})', font=('Arial', 18))
 
     def draw_genome(self, genome, gen_num):
-        for i in range(num_items):
-            item = self.items_list[i]
-            active = genome[i]
-            item.draw(self.canvas, active)
+        # only the items whose gene differs from the genome currently on screen are touched
+        bits = genome_bits(genome)
+        if self.view is not None:
+            self.view.show(bits)
+        elif self.drawn_bits is None:
+            for i, item in enumerate(self.items_list):
+                item.draw(self.canvas, (bits >> i) & 1 == 1)
+        else:
+            for i in iter_set_bits(bits ^ self.drawn_bits):
+                self.items_list[i].set_active(self.canvas, (bits >> i) & 1 == 1)
+        self.drawn_bits = bits
         x = (self.width - screen_padding) / 8 * 6
         y = screen_padding
         w = (self.width - screen_padding) / 8 - screen_padding
         h = self.height / 4 * 3
-        self.canvas.create_text(x + w, y + h + screen_padding*2, text=f'Generation {gen_num}', font=('Arial', 18))
+        self.retained_text('generation_text', x + w, y + h + screen_padding*2, f'Generation {gen_num}', font=('Arial', 18))
 
-    def run(self):
-        global pop_size
-        global num_generations
-
-        def gene_sum(genome):
-            total = 0
-            for i in range(len(genome) - 1):
-                if genome[i]:
-                    total += self.items_list[i].value
-            return total
-
-        def fitness(genome):
-            return abs(gene_sum(genome) - self.target)
-
-        def get_population(last_pop=None, fitnesses=None):
-            population = []
-            if last_pop is None:
-                for g in range(pop_size):
-                    genome = []
-                    for bit in range(num_items):
-                        genome.append(random.random() < frac_target)
-                    population.append(genome)
-                return population
+    def draw_status(self, text):
+        x = (self.width - screen_padding) / 8 * 6
+        y = screen_padding
+        w = (self.width - screen_padding) / 8 - screen_padding
+        h = self.height / 4 * 3
+        self.retained_text('status_text', x + w, y + h + screen_padding*4, text, font=('Arial', 18))
+
+    def solve_exactly(self):
+        # exact subset-sum solve of the target, to compare against the GA's time to solution
+        try:
+            if self.sum_index is not None:
+                result = self.sum_index.solve(self.target)
             else:
-                # elitism
-                elites = []
-                for e in range(elitism_count):
-                    elites.append(fitnesses[e])
-                for e in last_pop:
-                    if fitness(e) in elites:
-                        population.append(e)
-
-                def select_parents(min_fitness):
-                    weights = []
-                    for parent in last_pop:
-                        if fitness(parent) == 0.0:
-                            weights.append(1.0)
-                        else:
-                            weights.append(min_fitness / fitness(parent))
-
-                    def get_by_weight():
-                        idx = random.randint(0, pop_size - 1)
-                        while random.random() < weights[idx]:
-                            idx = random.randint(0, pop_size - 1)
-                        return last_pop[idx]
-
-                    return get_by_weight(), get_by_weight()
-
-                def crossover(parent1, parent2):
-                    length = len(parent1)
-                    x = random.randint(0, length // 2)
-                    y = x + length // 2
-                    g_out = []
-                    for i in range(length):
-                        if x < i <= y:
-                            g_out.append(parent2[i])
-                        else:
-                            g_out.append(parent1[i])
-                    if len(g_out) < num_items:
-                        print('Error!')
-                    return g_out
-
-                def mutate(g_in):
-                    x = random.randint(0, len(g_in) - 1)
-                    g_out = []
-                    for i in range(len(g_in)):
-                        if i == x:
-                            g_out.append(not g_in[i])
-                        else:
-                            g_out.append(g_in[i])
-                    return g_out
-
-                # fill generation with new individuals
-                while len(population) < pop_size:
-                    # select two random parents by weighted selection
-                    # note no guarantee of uniqueness - could get the same parent twice
-                    parents = select_parents(fitnesses[0])
-                    # perform crossover to generate new individual
-                    baby = crossover(parents[0], parents[1])
-                    # potentially perform mutation
-                    if random.random() < mutation_rate:
-                        baby = mutate(baby)
-                    # add to next generation
-                    population.append(baby)
-
-                return population
-
-        def generation_step(generation=0, pop=None):
-            if generation >= num_generations:
+                result = solve_exact([item.value for item in self.items_list], self.target)
+        except ValueError as e:
+            print(e)
+            self.after(0, self.draw_status, str(e))
+            return
+        text = f'Exact ({result.method}) solved in {result.elapsed * 1000:.2f} ms'
+        print(f'{text}: sum {result.total}, {len(result.indices)} items')
+        genome = result.genome(len(self.items_list))
+        self.after(0, self.draw_target)
+        self.after(0, self.draw_sum, result.total, self.target)
+        self.after(0, self.draw_genome, genome, 0)
+        self.after(0, self.draw_status, text)
+
+    def run(self):
+        ga = RouletteGA([item.value for item in self.items_list], self.target)
+
+        def generation_step():
+            self.profiler.tick()
+            if ga.generation >= num_generations:
+                self.profiler.stop()
                 return  # Stop the process after the set number of generations
 
-            if pop is None:
-                pop = get_population()
-
-            fitnesses = []
-            best_of_gen = None
-            min_fitness = 9999
-            for genome in pop:
-                fit = fitness(genome)
-                if fit < min_fitness:
-                    best_of_gen = genome
-                    min_fitness = fit
-                fitnesses.append(fit)
-            fitnesses.sort()
-
-            print(f'Best fitness of generation {generation}: {min_fitness}')
+            best_of_gen, best_sum, min_fitness = ga.best()
+
+            print(f'Best fitness of generation {ga.generation}: {min_fitness}')
+            frequencies = gene_frequencies(ga.population, len(ga.values))
+            print(f'Mean Hamming distance: {mean_pairwise_hamming(frequencies, len(ga.population)):.2f}')
+            event = ga.stagnation.event_at(ga.generation) if ga.stagnation is not None else None
+            if event is not None:
+                print(f'Stagnation ({event[2]}), applied {event[1]}')
+            print(f'Fitness cache: {ga.fitness.stats()}')
             print(best_of_gen)
             print()
 
             # Schedule the UI updates in the main thread
-            self.after(0, self.clear_canvas)
             self.after(0, self.draw_target)
-            self.after(0, self.draw_sum, gene_sum(best_of_gen), self.target)
-            self.after(0, self.draw_genome, best_of_gen, generation)
+            self.after(0, self.draw_sum, best_sum, self.target)
+            self.after(0, self.draw_genome, best_of_gen, ga.generation)
 
             # Schedule the next generation step after a delay, unless we're at the global optimum (fitness == 0)
-            if fitnesses[0] != 0:
-                self.after(int(sleep_time * 1000), generation_step, generation + 1, get_population(pop, fitnesses))
+            if min_fitness != 0:
+                ga.advance()
+                self.after(int(sleep_time * 1000), generation_step)
+            else:
+                self.profiler.stop()
+                text = f'GA solved in {time.perf_counter() - start_time:.2f} s ({ga.generation} generations)'
+                print(text)
+                self.after(0, self.draw_status, text)
 
         # Start the evolutionary process
-        generation_step()
+        start_time = time.perf_counter()
+        ga.start()
+        # every step runs on the Tk thread, the first one included, so a profiling window sees all of them
+        self.after(0, generation_step)
+
+    def run_turbo(self, snapshots):
+        ga = RouletteGA([item.value for item in self.items_list], self.target)
+
+        def publish(generation, best_of_gen, best_sum, min_fitness):
+            self.profiler.tick()
+            snapshots.publish((generation, genome_bits(best_of_gen), best_sum))
+
+        start_time = time.perf_counter()
+        try:
+            _, best_sum, generation = ga.run(publish)
+        finally:
+            snapshots.close()
+            self.profiler.stop()
+        status = 'solved' if best_sum == self.target else 'stopped'
+        text = f'GA {status} in {time.perf_counter() - start_time:.2f} s ({generation} generations)'
+        print(text)
+        print(f'Fitness cache: {ga.fitness.stats()}')
+        self.after(0, self.draw_status, text)
+
+    def poll_snapshots(self, snapshots):
+        # draw only the newest snapshot published since the last frame, until the run has finished
+        snapshot = snapshots.take()
+        if snapshot is not None:
+            generation, bits, best_sum = snapshot
+            self.draw_target()
+            self.draw_sum(best_sum, self.target)
+            self.draw_genome(bits, generation)
+        if not snapshots.drained():
+            self.after(int(1000 / frame_rate), self.poll_snapshots, snapshots)
 
 
 # In python, we have this odd construct to catch the main thread and instantiate our Window class
@@ -0,0 +1,314 @@
+"""
+Headless batch runner for the solvers, printing one JSON object per run.
+
+Examples:
+    python batch.py ksp --runs 100 --seed 1 --engine matrix
+    python batch.py knapsack --instance items.json
+    python batch.py ksp --engine matrix --instance million.inst
+    python batch.py ksp --engine pso --config '{"swarm_size": 5000}'
+    python batch.py tsp --config aco.json
+    python batch.py queens --method genetic --config '{"board_size": 12}'
+    python batch.py weighted --engine exact --config '{"num_items": 10000}'
+    python batch.py ksp --engine matrix --metrics
+    python batch.py tsp --profile 10 --profile-dir profiles
+    python batch.py ksp --engine matrix --checkpoint run.npz --checkpoint-every 300
+    python batch.py ksp --resume run.npz                   # exact continuation
+    python batch.py ksp --resume run.npz --runs 8 --seed 1 # 8 reseeded runs from the same warm start
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+import knapsack_core
+import ksp_core
+import queens_core
+import tsp_core
+import checkpoint
+import weighted_knapsack
+from subset_sum import solve_exact
+from islands import IslandModel
+from ksp_matrix import MatrixGA
+from bpso import BinaryPSO
+from instance_store import (KnapsackInstance, TspInstance, WeightedKnapsackInstance, KIND_KNAPSACK, KIND_WEIGHTED,
+                            read_header, is_instance_file)
+from metrics import Metrics
+from profiling import Profiler
+
+
+def load_json(text_or_path):
+    """Reads a JSON object given inline or as a file path."""
+    if text_or_path is None:
+        return {}
+    if text_or_path.lstrip().startswith('{'):
+        return json.loads(text_or_path)
+    with open(text_or_path) as f:
+        return json.load(f)
+
+
+def load_instance(path):
+    """
+    Reads --instance: a JSON file, or an instance_store file whose arrays are memory-mapped rather than parsed.
+    """
+    if path is None or not is_instance_file(path):
+        return load_json(path)
+    kind = read_header(path)[0]
+    if kind == KIND_KNAPSACK:
+        instance = KnapsackInstance.load(path)
+        # the files store 0 when no target was set (e.g. ksp.py "Save Instance..." before "Set Target")
+        return {"values": instance.values, "target": instance.target or None, "path": path}
+    if kind == KIND_WEIGHTED:
+        instance = WeightedKnapsackInstance.load(path)
+        return {"values": instance.values, "weights": instance.weights, "capacity": instance.capacity, "path": path}
+    return {"cities": TspInstance.load(path).coords, "path": path}
+
+
+def emit(record):
+    print(json.dumps(record), flush=True)
+
+
+def instrument(args, solver):
+    """Gives the solver a fresh Metrics when --metrics was passed; returns it, or None."""
+    if not args.metrics:
+        return None
+    solver.metrics = Metrics()
+    return solver.metrics
+
+
+def with_metrics(record, metrics):
+    if metrics is not None:
+        record["metrics"] = metrics.summary()
+    return record
+
+
+def ticker(args, solver=None):
+    """Per-generation callback driving --profile and --checkpoint (for the given solver), or None if neither is on."""
+    profiler = args.profiler
+    checkpointer = args.checkpointer if solver is not None else None
+    if profiler is None and checkpointer is None:
+        return None
+
+    def tick(*_):
+        if profiler is not None:
+            profiler.tick()
+        if checkpointer is not None:
+            checkpointer.tick(solver)
+    return tick
+
+
+def final_checkpoint(args, solver):
+    """Saves the finished run, e.g. as the warm start of a later --resume."""
+    if args.checkpointer is not None:
+        args.checkpointer.save(solver)
+
+
+def resumed(args, run_seed, *solver_types):
+    """The solver saved in --resume, reseeded with the run seed when --seed was given; None without --resume."""
+    if args.resume is None:
+        return None
+    solver = checkpoint.load(args.resume, run_seed if args.seed is not None else None)
+    if not isinstance(solver, solver_types):
+        raise ValueError(f'{args.resume} holds a {type(solver).__name__}, not a {args.app} solver')
+    return solver
+
+
+def run_ksp(args, run_seed, rng, config, instance):
+    cfg = dict(ksp_core.CONFIG, **config)
+    engine = resumed(args, run_seed, ksp_core.KnapsackGA, MatrixGA, BinaryPSO)
+    if engine is not None:
+        values, target = engine.values, engine.target
+    else:
+        values = instance["values"] if "values" in instance else ksp_core.generate_values(cfg, rng)
+        target = instance.get("target")
+        if target is None:
+            target = int(ksp_core.pick_target(values, cfg, rng))  # a numpy int64 for memory-mapped values
+    record = {"num_items": len(values), "target": target}
+
+    start = time.perf_counter()
+    if args.engine == "exact":
+        result = solve_exact(values, target)
+        record.update(method=result.method, best_sum=int(result.total), generations=0)
+    elif args.engine == "islands":
+        _, best_sum, generations = IslandModel(values, target, cfg, run_seed, instance.get("path")).run(ticker(args))
+        record.update(best_sum=best_sum, generations=generations)
+    else:
+        resume = engine is not None
+        if not resume:
+            engine = ksp_core.make_engine(args.engine, values, target, cfg, run_seed)
+        metrics = instrument(args, engine)
+        _, best_sum, generations = ksp_core.run_engine(engine, ticker(args, engine), resume)
+        final_checkpoint(args, engine)
+        record.update(best_sum=best_sum, generations=generations)
+        with_metrics(record, metrics)
+    record.update(solved=record["best_sum"] == target, elapsed=time.perf_counter() - start)
+    return record
+
+
+def run_knapsack(args, run_seed, rng, config, instance):
+    config = dict(config)
+    num_items = config.pop("num_items", knapsack_core.num_items)
+    ga = resumed(args, run_seed, knapsack_core.RouletteGA)
+    if ga is not None:
+        values, target = ga.values, ga.target
+    else:
+        values = instance["values"] if "values" in instance else knapsack_core.random_values(num_items, rng)
+        target = instance.get("target")
+        if target is None:
+            target = int(knapsack_core.random_target(values, rng))  # a numpy int64 for memory-mapped values
+
+    start = time.perf_counter()
+    resume = ga is not None
+    if not resume:
+        ga = knapsack_core.RouletteGA(values, target, rng, **config)
+    metrics = instrument(args, ga)
+    _, best_sum, generations = ga.run(ticker(args, ga), resume)
+    final_checkpoint(args, ga)
+    return with_metrics({"num_items": len(values), "target": target, "best_sum": best_sum,
+                         "generations": generations, "solved": best_sum == target,
+                         "elapsed": time.perf_counter() - start, "fitness_cache_hit_rate": ga.fitness.hit_rate},
+                        metrics)
+
+
+def run_weighted(args, run_seed, rng, config, instance):
+    cfg = dict(ksp_core.CONFIG, **config)
+    ga = resumed(args, run_seed, weighted_knapsack.WeightedGA)
+    if ga is not None:
+        problem = ga.instance
+    elif "weights" in instance:
+        problem = weighted_knapsack.WeightedInstance(instance["weights"], instance["values"], instance["capacity"])
+    else:
+        problem = weighted_knapsack.WeightedInstance.random(cfg, rng)
+    record = {"num_items": len(problem), "capacity": problem.capacity}
+
+    start = time.perf_counter()
+    if args.engine == "exact":
+        result = weighted_knapsack.branch_and_bound(problem, cfg["bnb_max_frontier"], cfg["bnb_time_limit"])
+        record.update(nodes=result.nodes, generations=0)
+    else:
+        resume = ga is not None
+        if not resume:
+            ga = weighted_knapsack.WeightedGA(problem, cfg, rng)
+        metrics = instrument(args, ga)
+        _, _, generations = ksp_core.run_engine(ga, ticker(args, ga), resume)
+        final_checkpoint(args, ga)
+        result = ga.result()
+        record.update(generations=generations)
+        with_metrics(record, metrics)
+    # the optimum is rarely known, so runs report their gap to the LP bound rather than a solved flag
+    record.update(method=result.method, best_value=result.value, weight=result.weight,
+                  upper_bound=result.upper_bound, gap=result.gap, proven_optimal=result.optimal,
+                  elapsed=time.perf_counter() - start)
+    return record
+
+
+def run_tsp(args, run_seed, rng, config, instance):
+    config = dict(config)
+    count = config.pop("num_cities", tsp_core.num_cities)
+    size = config.pop("size", 1000)
+    aco = resumed(args, run_seed, tsp_core.AntColonyOptimization)
+    if aco is not None:
+        cities = aco.cities
+    elif "cities" in instance:
+        cities = [tsp_core.City(float(x), float(y)) for x, y in instance["cities"]]
+    else:
+        cities = tsp_core.random_cities(count, 0, size, 0, size, rng)
+
+    start = time.perf_counter()
+    resume = aco is not None
+    if not resume:
+        aco = tsp_core.AntColonyOptimization(cities, rng, **config)
+    metrics = instrument(args, aco)
+    best_path = aco.run(ticker(args, aco), resume)
+    final_checkpoint(args, aco)
+    return with_metrics({"num_cities": len(cities), "best_distance": aco.best_distance, "best_path": best_path,
+                         "iterations": aco.max_iterations, "elapsed": time.perf_counter() - start}, metrics)
+
+
+def run_queens(args, run_seed, rng, config, instance):
+    config = dict(config)
+    board_size = config.pop("board_size", 8)
+
+    start = time.perf_counter()
+    if args.method == "backtracking":
+        board = queens_core.solve_backtracking(board_size)
+        record = {"board": board, "solved": board is not None}
+    else:
+        ga = queens_core.QueensGA(board_size, rng=rng, **config)
+        metrics = instrument(args, ga)
+        board, fitness, generations = ga.run(ticker(args))
+        record = with_metrics({"board": board, "fitness": fitness, "generations": generations,
+                               "solved": fitness == ga.max_fitness}, metrics)
+    record.update(board_size=board_size, elapsed=time.perf_counter() - start)
+    return record
+
+
+RUNNERS = {
+    "ksp": run_ksp,
+    "knapsack": run_knapsack,
+    "tsp": run_tsp,
+    "queens": run_queens,
+    "weighted": run_weighted,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run the solvers without a UI and stream results as JSON lines.")
+    parser.add_argument("app", choices=sorted(RUNNERS), help="which application's solver to run")
+    parser.add_argument("--runs", type=int, default=1, help="number of runs (run i uses seed + i)")
+    parser.add_argument("--seed", type=int, default=None, help="base seed for instance generation and the solver")
+    parser.add_argument("--config", default=None, help="JSON object (inline or file) overriding solver parameters")
+    parser.add_argument("--instance", default=None,
+                        help="JSON instance file ({\"values\", \"target\"} for knapsack, {\"values\", \"weights\", "
+                             "\"capacity\"} for weighted, {\"cities\"} for tsp) or an instance_store file")
+    parser.add_argument("--engine", default="list", choices=["list", "matrix", "pso", "islands", "exact"],
+                        help="ksp engine; for weighted, exact is branch and bound and anything else the GA")
+    parser.add_argument("--method", default="genetic", choices=["genetic", "backtracking"], help="queens solver")
+    parser.add_argument("--metrics", action="store_true", help="add per-phase timings and counters to each record")
+    parser.add_argument("--profile", type=int, default=0, metavar="N",
+                        help="cProfile and tracemalloc the first N generations of every run")
+    parser.add_argument("--profile-dir", default=ksp_core.CONFIG["profile_dir"], help="where --profile writes reports")
+    parser.add_argument("--checkpoint", default=None, metavar="PATH",
+                        help="save the solver here periodically and at the end of each run ({run} = run number)")
+    parser.add_argument("--checkpoint-every", type=float, default=ksp_core.CONFIG["checkpoint_seconds"],
+                        metavar="SECONDS", help="seconds between checkpoints")
+    parser.add_argument("--resume", default=None, metavar="PATH",
+                        help="continue the run saved in a checkpoint; with --seed, every run is reseeded from it")
+    return parser
+
+
+def check_args(parser, args):
+    """Rejects checkpoint options for solvers that cannot be checkpointed."""
+    if args.checkpoint or args.resume:
+        if args.app == "queens" or (args.app in ("ksp", "weighted") and args.engine in ("islands", "exact")):
+            parser.error("--checkpoint and --resume need the ksp list/matrix/pso, weighted GA, knapsack or tsp solver")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    check_args(parser, args)
+    config = load_json(args.config)
+    instance = load_instance(args.instance)
+    base_seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    args.profiler = Profiler(args.profile_dir) if args.profile else None
+
+    for run in range(args.runs):
+        run_seed = base_seed + run
+        if args.profiler is not None:
+            args.profiler.request(args.profile, f'{args.app}-run{run}')
+            args.profiler.tick()  # start the window now, so it covers the first N generations
+        args.checkpointer = None
+        if args.checkpoint:
+            args.checkpointer = checkpoint.Checkpointer(args.checkpoint.format(run=run), args.checkpoint_every)
+        record = RUNNERS[args.app](args, run_seed, random.Random(run_seed), config, instance)
+        if args.profiler is not None:
+            args.profiler.stop()
+            record["profile"] = args.profiler.reports
+        if args.checkpointer is not None:
+            record["checkpoint"] = args.checkpointer.path
+        emit(dict({"app": args.app, "run": run, "seed": run_seed}, **record))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Headless benchmark of the solvers on fixed seeded instances of increasing size.
+
+Every case is timed over a few identical rounds (keeping the fastest), then run once more under
+tracemalloc for its peak Python memory.
+Results are written as JSON and can be compared against an earlier results file:
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --baseline baseline.json          # after a change
+    python benchmark.py --quick --cases ksp-matrix,tsp
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import knapsack_core
+import ksp_core
+import queens_core
+import tsp_core
+
+
+def ksp_instance(size, seed):
+    """
+    Seeded ksp_core instance; the value range grows with size so values stay unique.
+
+    Greedy seeding and local search are off: they solve these instances at generation 0, leaving no GA to time.
+    """
+    cfg = dict(ksp_core.CONFIG, num_items=size, max_value=max(ksp_core.CONFIG["max_value"], 2 * size),
+               num_generations=200, seed_greedy_fraction=0, local_search_children=0)
+    rng = random.Random(seed)
+    values = ksp_core.generate_values(cfg, rng)
+    return cfg, values, ksp_core.pick_target(values, cfg, rng)
+
+
+def bench_ksp(engine_name):
+    def run(size, seed):
+        cfg, values, target = ksp_instance(size, seed)
+        engine = ksp_core.make_engine(engine_name, values, target, cfg, seed)
+        _, best_sum, generations = ksp_core.run_engine(engine)
+        return {"generations": generations, "evaluations": engine.evaluations, "solved": best_sum == target}
+    return run
+
+
+def bench_knapsack(size, seed):
+    rng = random.Random(seed)
+    values = knapsack_core.random_values(size, rng)
+    target = knapsack_core.random_target(values, rng)
+    ga = knapsack_core.RouletteGA(values, target, rng, num_generations=200)
+    _, best_sum, generations = ga.run()
+    return {"generations": generations, "evaluations": ga.evaluations, "solved": best_sum == target}
+
+
+def bench_tsp(size, seed):
+    rng = random.Random(seed)
+    aco = tsp_core.AntColonyOptimization(tsp_core.random_cities(size, 0, 1000, 0, 1000, rng), rng, max_iterations=20)
+    aco.run()
+    return {"generations": aco.max_iterations, "evaluations": aco.evaluations, "solved": None}
+
+
+def bench_queens_ga(size, seed):
+    ga = queens_core.QueensGA(size, generations=200, rng=random.Random(seed))
+    _, fitness, generations = ga.run()
+    return {"generations": generations, "evaluations": ga.evaluations, "solved": fitness == ga.max_fitness}
+
+
+def bench_queens_backtracking(size, seed):
+    placements = [0]
+
+    def count(row, col):
+        placements[0] += 1
+
+    board = queens_core.solve_backtracking(size, count)
+    return {"generations": None, "evaluations": placements[0], "solved": board is not None}
+
+
+# case name -> (runner(size, seed), sizes, quick sizes)
+CASES = {
+    "ksp-list": (bench_ksp("list"), [50, 100, 200, 400], [50, 100]),
+    "ksp-matrix": (bench_ksp("matrix"), [100, 1000, 10000], [100, 1000]),
+    "ksp-pso": (bench_ksp("pso"), [100, 1000, 10000], [100, 1000]),
+    "knapsack": (bench_knapsack, [50, 100, 200], [50, 100]),
+    "tsp": (bench_tsp, [10, 25, 50], [10, 25]),
+    "queens-ga": (bench_queens_ga, [8, 12, 16], [8, 12]),
+    "queens-backtracking": (bench_queens_backtracking, [8, 16, 24], [8, 16]),
+}
+
+
+def measure(case, runner, size, seed, rounds=3, memory=True):
+    """Runs one case `rounds` times and returns its result record, timed by the fastest round."""
+    elapsed = float('inf')
+    for _ in range(rounds):
+        # same seed every round, so every round does the same work and only the noise differs
+        start = time.perf_counter()
+        result = runner(size, seed)
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    record = {"case": case, "size": size, "seed": seed, "elapsed": elapsed}
+    record.update(result)
+    record["gens_per_sec"] = result["generations"] / elapsed if result["generations"] else None
+    record["evals_per_sec"] = result["evaluations"] / elapsed if elapsed > 0 else None
+    record["time_to_target"] = elapsed if result["solved"] else None
+
+    if memory:
+        # separate run: tracemalloc slows allocation-heavy code down too much to time under it
+        tracemalloc.start()
+        runner(size, seed)
+        record["peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return record
+
+
+def metadata():
+    return {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints each case's speed relative to the baseline (gens/sec, or evals/sec when there are no generations).
+    :return: Records that got slower than 1 - tolerance times the baseline.
+    """
+    previous = {(r["case"], r["size"], r["seed"]): r for r in baseline["results"]}
+    regressions = []
+    print(f'{"case":<22}{"size":>7}{"baseline":>14}{"now":>14}{"ratio":>8}')
+    for record in results:
+        old = previous.get((record["case"], record["size"], record["seed"]))
+        if old is None:
+            continue
+        metric = "gens_per_sec" if record["gens_per_sec"] else "evals_per_sec"
+        if not old.get(metric) or not record[metric]:
+            continue
+        ratio = record[metric] / old[metric]
+        flag = '  <-- slower' if ratio < 1 - tolerance else ''
+        print(f'{record["case"]:<22}{record["size"]:>7}{old[metric]:>14.1f}{record[metric]:>14.1f}{ratio:>8.2f}{flag}')
+        if flag:
+            regressions.append(record)
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the solvers on seeded instances of increasing size.")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated cases: " + ", ".join(CASES))
+    parser.add_argument("--quick", action="store_true", help="only the smaller sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per size (seeds seed .. seed + repeat - 1)")
+    parser.add_argument("--rounds", type=int, default=3, help="timed rounds per run; the fastest one is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory runs")
+    parser.add_argument("--output", default=None, help="write the results JSON here")
+    parser.add_argument("--baseline", default=None, help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="fraction slower than the baseline that counts as a regression")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    results = []
+    for case in args.cases.split(","):
+        runner, sizes, quick_sizes = CASES[case]
+        for size in (quick_sizes if args.quick else sizes):
+            for seed in range(args.seed, args.seed + args.repeat):
+                record = measure(case, runner, size, seed, args.rounds, not args.no_memory)
+                results.append(record)
+                print(json.dumps(record), flush=True)
+
+    report = {"meta": metadata(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Binary particle swarm optimization for the ksp subset-sum problem, as an engine interchangeable with the GAs.
+
+Positions, velocities and personal bests are (swarm_size, num_items) matrices, and each iteration updates the
+whole swarm with array operations:
+    v = inertia * v + c1 * r1 * (personal_best - x) + c2 * r2 * (global_best - x),   clipped to +-max_velocity
+    x = r3 < sigmoid(v)
+where r1, r2 and r3 are fresh uniform matrices. Fitness is the GAs' closeness to the target.
+"""
+import numpy as np
+
+from ksp_matrix import population_sums, fitness_from_sums
+from metrics import NULL_METRICS
+from seeding import Seeder
+
+
+class BinaryPSO:
+    """Sigmoid-transfer binary PSO over a (swarm_size, num_items) position matrix."""
+    def __init__(self, values, target, cfg, rng=None):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.target = target
+        self.cfg = cfg
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.positions = None
+        self.velocities = None
+        self.personal_best = None
+        self.personal_sums = None  # sum of each particle's personal best
+        self.generation = 0  # iterations, named like the GA engines' counter
+        self.evaluations = 0  # particle positions evaluated so far, for benchmarking
+        self.metrics = NULL_METRICS  # set to a metrics.Metrics to time the phases of each iteration
+        self.stagnation = None
+
+    @property
+    def num_items(self):
+        return self.values.shape[0]
+
+    @property
+    def population(self):
+        """The personal bests, the swarm's memory of good genomes."""
+        return self.personal_best
+
+    def evaluate(self, positions):
+        self.evaluations += positions.shape[0]
+        return population_sums(positions, self.values, self.cfg["matrix_chunk_rows"])
+
+    def start(self):
+        """Creates the swarm: seeded positions (see seeding.py), zero velocities, personal bests at the start."""
+        size = self.cfg["swarm_size"]
+        seeder = Seeder.from_config(self.values, self.target, self.cfg)
+        greedy = seeder.greedy_count(size)
+        random_rows = self.rng.random((size - greedy, self.num_items)) < self.cfg["target_fraction"]
+        self.positions = np.concatenate([seeder.rows(greedy, self.rng), random_rows.astype(np.uint8)])
+        self.velocities = np.zeros(self.positions.shape, dtype=np.float32)
+        self.personal_best = self.positions.copy()
+        self.personal_sums = self.evaluate(self.positions)
+        self.generation = 0
+
+    def global_best_index(self):
+        return int(np.argmin(np.abs(self.personal_sums - self.target)))
+
+    def advance(self):
+        """Moves every particle once and updates the personal bests."""
+        shape = self.positions.shape
+        with self.metrics.phase("velocity"):
+            x = self.positions.astype(np.float32)
+            best = self.personal_best[self.global_best_index()].astype(np.float32)
+            r1 = self.rng.random(shape, dtype=np.float32)
+            r2 = self.rng.random(shape, dtype=np.float32)
+            v = self.velocities
+            v *= self.cfg["pso_inertia"]
+            v += self.cfg["pso_c1"] * r1 * (self.personal_best - x)
+            v += self.cfg["pso_c2"] * r2 * (best - x)
+            np.clip(v, -self.cfg["pso_max_velocity"], self.cfg["pso_max_velocity"], out=v)
+        with self.metrics.phase("sampling"):
+            # sigmoid transfer: each bit is set with probability 1 / (1 + e^-v)
+            self.positions = (self.rng.random(shape, dtype=np.float32) * (1 + np.exp(-v)) < 1).astype(np.uint8)
+        with self.metrics.phase("evaluation"):
+            sums = self.evaluate(self.positions)
+        with self.metrics.phase("personal_best"):
+            improved = np.abs(sums - self.target) < np.abs(self.personal_sums - self.target)
+            self.personal_best[improved] = self.positions[improved]
+            self.personal_sums[improved] = sums[improved]
+        self.metrics.count("improved", int(improved.sum()))
+        self.generation += 1
+        self.metrics.end_generation(self.generation)
+
+    def best(self):
+        """Returns (genome, sum, fitness) of the best position any particle has visited."""
+        idx = self.global_best_index()
+        best_sum = int(self.personal_sums[idx])
+        return self.personal_best[idx].astype(bool), best_sum, float(fitness_from_sums(best_sum, self.target))
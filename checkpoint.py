@@ -0,0 +1,222 @@
+"""
+Checkpoints of a running solver as a single .npz file of plain arrays (loaded with allow_pickle=False).
+
+Supported solvers and what is saved besides the instance, the generation counter and the RNG state:
+    KnapsackGA / MatrixGA (ksp_core)   population as packed bits (one row per genome), config
+    BinaryPSO (bpso)                   positions and personal bests as packed bits, velocities, config
+    RouletteGA (knapsack_core)         population as packed bits, GA parameters
+    WeightedGA (weighted_knapsack)     item weights and capacity, population as packed bits, config
+    AntColonyOptimization (tsp_core)   roads, pheromone matrix, best path and distance, parameters
+
+Files are written to a temporary name and renamed over the old checkpoint, so a crash while saving
+leaves the previous checkpoint intact. load() returns a solver that continues exactly where the saved
+one stopped, e.g. run_engine(load(path), resume=True); pass a seed instead to fan out several
+differently seeded runs from the same warm start.
+"""
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+import knapsack_core
+import ksp_core
+import tsp_core
+import weighted_knapsack
+from genomes import BitGenome, SumGenome
+from ksp_matrix import MatrixGA, population_sums
+from bpso import BinaryPSO
+
+FORMAT_VERSION = 1
+
+
+# ---------------------------
+# Encoding helpers
+# ---------------------------
+def pack_bits(bit_ints, length):
+    """Packs genome bit ints into a (count, ceil(length / 8)) uint8 matrix, gene i at bit i % 8 of byte i // 8."""
+    width = (length + 7) // 8
+    data = b''.join(bits.to_bytes(width, 'little') for bits in bit_ints)
+    return np.frombuffer(data, dtype=np.uint8).reshape(len(bit_ints), width)
+
+
+def unpack_bits(packed):
+    return [int.from_bytes(row.tobytes(), 'little') for row in packed]
+
+
+def python_rng_state(rng):
+    """random.Random state as a uint32 array: the Mersenne Twister words and position, then the version."""
+    # the gauss() cache is dropped; none of the solvers draw from gauss()
+    version, internal, _ = rng.getstate()
+    return np.array(list(internal) + [version], dtype=np.uint32)
+
+
+def restore_python_rng(state):
+    rng = random.Random()
+    rng.setstate((int(state[-1]), tuple(int(word) for word in state[:-1]), None))
+    return rng
+
+
+def numpy_rng_state(rng):
+    # the bit generator state is a small dict of (possibly 128-bit) ints, kept as JSON text
+    return np.array(json.dumps(rng.bit_generator.state))
+
+
+def restore_numpy_rng(state):
+    state = json.loads(str(state))
+    bit_generator = getattr(np.random, state["bit_generator"])()
+    bit_generator.state = state
+    return np.random.Generator(bit_generator)
+
+
+def _text(array):
+    return str(array[()])
+
+
+# ---------------------------
+# Save / load
+# ---------------------------
+def solver_arrays(solver):
+    """Arrays describing the solver's complete state."""
+    if isinstance(solver, ksp_core.KnapsackGA):
+        return {"kind": np.array("ksp-list"), "values": np.array(solver.values, dtype=np.int64),
+                "target": np.int64(solver.target), "config": np.array(json.dumps(solver.cfg)),
+                "population": pack_bits([g.bits for g in solver.population], len(solver.values)),
+                "rng_state": python_rng_state(solver.rng)}
+    if isinstance(solver, MatrixGA):
+        return {"kind": np.array("ksp-matrix"), "values": np.rint(solver.values).astype(np.int64),
+                "target": np.int64(solver.target), "config": np.array(json.dumps(solver.cfg)),
+                "population": np.packbits(solver.population, axis=1, bitorder='little'),
+                "rng_state": numpy_rng_state(solver.rng)}
+    if isinstance(solver, BinaryPSO):
+        return {"kind": np.array("ksp-pso"), "values": np.rint(solver.values).astype(np.int64),
+                "target": np.int64(solver.target), "config": np.array(json.dumps(solver.cfg)),
+                "positions": np.packbits(solver.positions, axis=1, bitorder='little'),
+                "velocities": solver.velocities,
+                "population": np.packbits(solver.personal_best, axis=1, bitorder='little'),
+                "rng_state": numpy_rng_state(solver.rng)}
+    if isinstance(solver, weighted_knapsack.WeightedGA):
+        return {"kind": np.array("weighted"), "values": np.array(solver.values, dtype=np.int64),
+                "weights": np.array(solver.weights, dtype=np.int64), "target": np.int64(solver.capacity),
+                "optimum": np.int64(solver.target), "progress": np.array([solver.best_value, solver.last_improvement]),
+                "config": np.array(json.dumps(solver.cfg)),
+                "population": pack_bits([g.bits for g in solver.population], len(solver.values)),
+                "rng_state": python_rng_state(solver.rng)}
+    if isinstance(solver, knapsack_core.RouletteGA):
+        params = {name: getattr(solver, name)
+                  for name in ("pop_size", "num_generations", "elitism_count", "mutation_rate", "frac_target",
+                               "stagnation_action")}
+        return {"kind": np.array("knapsack"), "values": np.array(solver.values, dtype=np.int64),
+                "target": np.int64(solver.target), "config": np.array(json.dumps(params)),
+                "population": pack_bits([g.bits for g in solver.population], len(solver.values)),
+                "rng_state": python_rng_state(solver.rng)}
+    if isinstance(solver, tsp_core.AntColonyOptimization):
+        params = {name: getattr(solver, name) for name in ("num_ants", "alpha", "beta", "rho", "q", "max_iterations")}
+        best_path = solver.best_path if solver.best_path is not None else []
+        return {"kind": np.array("tsp"), "coords": np.array([(c.x, c.y) for c in solver.cities], dtype=np.float64),
+                "edges": solver.edges, "config": np.array(json.dumps(params)), "pheromone": solver.pheromone,
+                "best_path": np.array(best_path, dtype=np.int32), "best_distance": np.float64(solver.best_distance),
+                "rng_state": python_rng_state(solver.rng)}
+    raise ValueError(f'Cannot checkpoint a {type(solver).__name__}')
+
+
+def save(path, solver):
+    """Atomically writes a checkpoint of the solver to path."""
+    arrays = solver_arrays(solver)
+    generation = solver.iteration if isinstance(solver, tsp_core.AntColonyOptimization) else solver.generation
+    arrays.update(version=np.int64(FORMAT_VERSION), generation=np.int64(generation),
+                  evaluations=np.int64(solver.evaluations))
+    if getattr(solver, "stagnation", None) is not None:
+        arrays["stagnation"] = np.array(solver.stagnation.state(), dtype=np.int64)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load(path, seed=None):
+    """
+    Rebuilds the solver saved in a checkpoint, ready to continue with resume=True.
+
+    :param seed: None restores the saved RNG state (an exact continuation); an int reseeds the solver instead.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        if int(data["version"]) != FORMAT_VERSION:
+            raise ValueError(f'{path}: unsupported checkpoint version {int(data["version"])}')
+        kind = _text(data["kind"])
+        config = json.loads(_text(data["config"]))
+
+        if kind == "ksp-matrix":
+            rng = np.random.default_rng(seed) if seed is not None else restore_numpy_rng(data["rng_state"])
+            solver = MatrixGA(data["values"], int(data["target"]), config, rng)
+            solver.population = np.unpackbits(data["population"], axis=1, count=len(data["values"]),
+                                               bitorder='little')
+            solver.sums, solver.fitnesses = solver.evaluate(solver.population)
+        elif kind == "ksp-pso":
+            rng = np.random.default_rng(seed) if seed is not None else restore_numpy_rng(data["rng_state"])
+            solver = BinaryPSO(data["values"], int(data["target"]), config, rng)
+            count = len(data["values"])
+            solver.positions = np.unpackbits(data["positions"], axis=1, count=count, bitorder='little')
+            solver.velocities = np.array(data["velocities"])
+            solver.personal_best = np.unpackbits(data["population"], axis=1, count=count, bitorder='little')
+            solver.personal_sums = population_sums(solver.personal_best, solver.values, config["matrix_chunk_rows"])
+        else:
+            rng = random.Random(seed) if seed is not None else restore_python_rng(data["rng_state"])
+            if kind == "ksp-list":
+                solver = ksp_core.KnapsackGA(data["values"], int(data["target"]), config, rng)
+                solver.population = [SumGenome(bits, solver.values)
+                                     for bits in unpack_bits(data["population"])]
+            elif kind == "weighted":
+                instance = weighted_knapsack.WeightedInstance(data["weights"], data["values"], int(data["target"]))
+                solver = weighted_knapsack.WeightedGA(instance, config, rng, int(data["optimum"]))
+                solver.population = [BitGenome(bits, len(instance)) for bits in unpack_bits(data["population"])]
+                solver.best_value, solver.last_improvement = (int(v) for v in data["progress"])
+            elif kind == "knapsack":
+                solver = knapsack_core.RouletteGA(data["values"], int(data["target"]), rng, **config)
+                solver.population = [BitGenome(bits, len(solver.values))
+                                     for bits in unpack_bits(data["population"])]
+                solver.evaluate()
+            elif kind == "tsp":
+                cities = [tsp_core.City(float(x), float(y)) for x, y in data["coords"]]
+                solver = tsp_core.AntColonyOptimization(cities, rng, edges=data["edges"], **config)
+                solver.pheromone = np.array(data["pheromone"])
+                solver.best_path = [int(i) for i in data["best_path"]] or None
+                solver.best_distance = float(data["best_distance"])
+            else:
+                raise ValueError(f'{path}: unknown checkpoint kind {kind!r}')
+
+        if kind == "tsp":
+            solver.iteration = int(data["generation"])
+        else:
+            solver.generation = int(data["generation"])
+        solver.evaluations = int(data["evaluations"])
+        if "stagnation" in data and getattr(solver, "stagnation", None) is not None:
+            solver.stagnation.restore(data["stagnation"])
+    return solver
+
+
+class Checkpointer:
+    """
+    Saves a solver every `seconds` of wall-clock time and/or every `generations` generations.
+
+    Call tick(solver) once per generation from the solver loop; it only reads the clock between saves.
+    """
+    def __init__(self, path, seconds=60.0, generations=0):
+        self.path = path
+        self.seconds = seconds
+        self.generations = generations
+        self.last_saved = time.monotonic()
+        self.ticks = 0
+        self.saves = 0
+
+    def tick(self, solver):
+        self.ticks += 1
+        due = self.generations and self.ticks % self.generations == 0
+        if due or (self.seconds and time.monotonic() - self.last_saved >= self.seconds):
+            self.save(solver)
+
+    def save(self, solver):
+        save(self.path, solver)
+        self.last_saved = time.monotonic()
+        self.saves += 1
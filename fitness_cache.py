@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+
+def genome_key(genome):
+    """Cheap hashable key for a genome: its packed bits, raw bytes, or a tuple as a last resort."""
+    key = getattr(genome, 'key', None)
+    if key is not None:
+        return key
+    try:
+        return bytes(genome)
+    except (TypeError, ValueError):
+        return tuple(genome)
+
+
+class FitnessCache:
+    """
+    Size-bounded LRU memo around a fitness function.
+
+    Call it like the function it wraps. Keys come from genome_key, so the cached genomes
+    must not be mutated after they are evaluated.
+    """
+    def __init__(self, fitness_function, maxsize=10000):
+        self.fitness_function = fitness_function
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, genome):
+        key = genome_key(genome)
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            value = self.fitness_function(genome)
+            self.entries[key] = value
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+            return value
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        """Drops all entries and resets the counters (e.g. when the target changes)."""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return f'{self.hits} hits, {self.misses} misses ({self.hit_rate:.1%}), {len(self)}/{self.maxsize} entries'
@@ -0,0 +1,194 @@
+import random
+
+import numpy as np
+
+
+class BitGenome:
+    """Binary genome packed into a single Python int, bit i being gene i."""
+    __slots__ = ("bits", "length")
+
+    def __init__(self, bits=0, length=0):
+        self.bits = bits
+        self.length = length
+
+    @classmethod
+    def random(cls, length, probability=0.5, rng=random):
+        """Builds a genome where each gene is set with the given probability."""
+        bits = 0
+        for i in range(length):
+            if rng.random() < probability:
+                bits |= 1 << i
+        return cls(bits, length)
+
+    @classmethod
+    def from_list(cls, genes):
+        bits = 0
+        for i, gene in enumerate(genes):
+            if gene:
+                bits |= 1 << i
+        return cls(bits, len(genes))
+
+    def copy(self):
+        return BitGenome(self.bits, self.length)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, i):
+        return (self.bits >> i) & 1 == 1
+
+    def __iter__(self):
+        bits = self.bits
+        for _ in range(self.length):
+            yield bits & 1 == 1
+            bits >>= 1
+
+    def __repr__(self):
+        return f'BitGenome({self.to_list()})'
+
+    def to_list(self):
+        return list(self)
+
+    @property
+    def key(self):
+        """Hashable value identifying the gene contents."""
+        return self.bits
+
+    def set_indices(self):
+        """Yields the index of every set gene, lowest first."""
+        return iter_set_bits(self.bits)
+
+    def count(self):
+        return self.bits.bit_count()
+
+    def flip(self, i):
+        """Flips gene i in place."""
+        self.bits ^= 1 << i
+
+    def crossover(self, other, mask):
+        """Returns a child taking genes from `other` where `mask` is set and from self elsewhere."""
+        return BitGenome((self.bits & ~mask) | (other.bits & mask), self.length)
+
+
+def genome_bits(genome):
+    """Packs any genome (BitGenome, NumPy 0/1 row or sequence of bools) into an int, bit i being gene i."""
+    if isinstance(genome, int):
+        return genome
+    bits = getattr(genome, 'bits', None)
+    if bits is not None:
+        return bits
+    if isinstance(genome, np.ndarray):
+        return int.from_bytes(np.packbits(genome.astype(bool), bitorder='little').tobytes(), 'little')
+    return BitGenome.from_list(genome).bits
+
+
+def genome_array(genome, length):
+    """Unpacks any genome into a NumPy bool array of the given length."""
+    if isinstance(genome, np.ndarray):
+        return genome.astype(bool, copy=False)
+    raw = np.frombuffer(genome_bits(genome).to_bytes((length + 7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder='little', count=length).astype(bool)
+
+
+def population_matrix(population, length):
+    """Stacks a population (list of genomes, or a 0/1 matrix already) into a (size, length) uint8 0/1 matrix."""
+    if isinstance(population, np.ndarray):
+        return population
+    width = (length + 7) // 8
+    raw = b''.join(genome_bits(genome).to_bytes(width, 'little') for genome in population)
+    packed = np.frombuffer(raw, dtype=np.uint8).reshape(len(population), width)
+    return np.unpackbits(packed, axis=1, count=length, bitorder='little')
+
+
+def iter_set_bits(bits):
+    """Yields the index of every set bit of an int, lowest first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def first_distinct(genomes, count):
+    """The first `count` genomes whose gene contents differ from every earlier one."""
+    seen = set()
+    chosen = []
+    for genome in genomes:
+        if len(chosen) == count:
+            break
+        if genome.key not in seen:
+            seen.add(genome.key)
+            chosen.append(genome)
+    return chosen
+
+
+def make_distinct(children, seen, rng=random, retries=8):
+    """
+    Flips random genes of children that duplicate a genome in `seen` (or an earlier child) until they are new,
+    giving up on a child after `retries` flips. Children are changed in place, so they must not have been
+    evaluated yet; their keys are added to `seen`.
+    :return: How many children were duplicates.
+    """
+    duplicates = 0
+    for child in children:
+        if child.key in seen:
+            duplicates += 1
+            for _ in range(retries):
+                child.flip(rng.randrange(len(child)))
+                if child.key not in seen:
+                    break
+        seen.add(child.key)
+    return duplicates
+
+
+def segment_mask(start, stop):
+    """Mask with bits start..stop-1 set."""
+    return ((1 << (stop - start)) - 1) << start
+
+
+class SumGenome(BitGenome):
+    """BitGenome that also carries the value sum of its set genes, kept up to date on every change."""
+    __slots__ = ("values", "total")
+
+    def __init__(self, bits, values, total=None):
+        super().__init__(bits, len(values))
+        self.values = values
+        self.total = total if total is not None else sum(values[i] for i in self.set_indices())
+
+    @classmethod
+    def random(cls, values, probability=0.5, rng=random):
+        return cls(BitGenome.random(len(values), probability, rng).bits, values)
+
+    @classmethod
+    def from_list(cls, genes, values):
+        return cls(BitGenome.from_list(genes).bits, values)
+
+    def copy(self):
+        return SumGenome(self.bits, self.values, self.total)
+
+    def flip(self, i):
+        """Flips gene i in place and adds or removes its value from the total."""
+        self.bits ^= 1 << i
+        if (self.bits >> i) & 1:
+            self.total += self.values[i]
+        else:
+            self.total -= self.values[i]
+
+    def crossover(self, other, mask):
+        """
+        Returns a child taking genes from `other` where `mask` is set and from self elsewhere.
+
+        The child's total starts from self.total and only the genes that actually change
+        are added or subtracted, so the cost is proportional to how much the parents differ.
+        """
+        take = (self.bits ^ other.bits) & mask
+        total = self.total
+        other_bits = other.bits
+        while take:
+            low = take & -take
+            i = low.bit_length() - 1
+            if other_bits & low:
+                total += self.values[i]
+            else:
+                total -= self.values[i]
+            take ^= low
+        return SumGenome((self.bits & ~mask) | (other_bits & mask), self.values, total)
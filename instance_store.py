@@ -0,0 +1,186 @@
+"""
+On-disk problem instances: a 64-byte header followed by contiguous little-endian arrays.
+
+Opening a file memory-maps the arrays read-only instead of parsing them, so a million-item knapsack or
+a 100k-city map opens instantly and the OS page cache is shared by every process that opens the same file.
+The mapping is only zero-copy up to the consumer: KnapsackGA, RouletteGA, the exact solvers and the Tk views
+copy the values into Python ints (or objects), and MatrixGA into float64, so each of them, every island
+worker included, still holds a private working copy. What the file saves is parsing and pickling.
+
+Layout (offsets in bytes):
+    0   magic       8s   b'GAINST01'
+    8   kind        u4   1 = knapsack, 2 = tsp, 3 = weighted knapsack
+    12  (reserved)  u4
+    16  count       u8   items / cities
+    24  edge_count  u8   roads (tsp only)
+    32  target      i8   target sum (knapsack), capacity (weighted knapsack)
+    64  knapsack: values  int64[count]
+        weighted: values  int64[count], then weights int64[count]
+        tsp:      coords  float64[count, 2], then edges int32[edge_count, 2]
+"""
+import argparse
+import os
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b'GAINST01'
+HEADER = struct.Struct('<8sIIQQq')
+HEADER_SIZE = 64
+
+KIND_KNAPSACK = 1
+KIND_TSP = 2
+KIND_WEIGHTED = 3
+
+
+def read_header(path):
+    """Returns (kind, count, edge_count, target) from an instance file, or raises ValueError if it isn't one."""
+    with open(path, 'rb') as f:
+        raw = f.read(HEADER.size)
+    if len(raw) < HEADER.size or raw[:len(MAGIC)] != MAGIC:
+        raise ValueError(f'{path} is not an instance file')
+    _, kind, _, count, edge_count, target = HEADER.unpack(raw)
+    return kind, count, edge_count, target
+
+
+def is_instance_file(path):
+    try:
+        read_header(path)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def _map(path, dtype, offset, shape):
+    """Read-only memory map of one array (an empty array when there is nothing to map)."""
+    if shape[0] == 0:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+
+def _write(path, kind, count, edge_count, target, arrays):
+    """Writes header and arrays to a temporary file and renames it over path, so readers never see half a file."""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, kind, 0, count, edge_count, target).ljust(HEADER_SIZE, b'\0'))
+        for array in arrays:
+            array.tofile(f)
+    os.replace(tmp_path, path)
+
+
+class KnapsackInstance:
+    """Item values (int64) and target of a knapsack / subset-sum instance."""
+    def __init__(self, values, target=0, path=None):
+        self.values = values
+        self.target = int(target)
+        self.path = path
+
+    def __len__(self):
+        return len(self.values)
+
+    def save(self, path):
+        values = np.ascontiguousarray(self.values, dtype='<i8')
+        _write(path, KIND_KNAPSACK, len(values), 0, self.target, [values])
+        self.path = path
+
+    @classmethod
+    def load(cls, path):
+        """Opens an instance file with the values memory-mapped, not read."""
+        kind, count, _, target = read_header(path)
+        if kind != KIND_KNAPSACK:
+            raise ValueError(f'{path} is not a knapsack instance')
+        return cls(_map(path, '<i8', HEADER_SIZE, (count,)), target, path)
+
+    @classmethod
+    def random(cls, count, min_value, max_value, target_fraction, rng=None):
+        """Random instance whose target is the sum of a random target_fraction of the items (values may repeat)."""
+        rng = rng if rng is not None else np.random.default_rng()
+        values = rng.integers(min_value, max_value + 1, size=count, dtype=np.int64)
+        chosen = rng.choice(count, size=int(count * target_fraction), replace=False)
+        return cls(values, int(values[chosen].sum()))
+
+
+class WeightedKnapsackInstance:
+    """Item values and weights (int64) and capacity of a weighted 0/1 knapsack instance."""
+    def __init__(self, values, weights, capacity, path=None):
+        self.values = values
+        self.weights = weights
+        self.capacity = int(capacity)
+        self.path = path
+
+    def __len__(self):
+        return len(self.values)
+
+    def save(self, path):
+        values = np.ascontiguousarray(self.values, dtype='<i8')
+        weights = np.ascontiguousarray(self.weights, dtype='<i8')
+        _write(path, KIND_WEIGHTED, len(values), 0, self.capacity, [values, weights])
+        self.path = path
+
+    @classmethod
+    def load(cls, path):
+        """Opens an instance file with the values and weights memory-mapped, not read."""
+        kind, count, _, capacity = read_header(path)
+        if kind != KIND_WEIGHTED:
+            raise ValueError(f'{path} is not a weighted knapsack instance')
+        values = _map(path, '<i8', HEADER_SIZE, (count,))
+        weights = _map(path, '<i8', HEADER_SIZE + count * 8, (count,))
+        return cls(values, weights, capacity, path)
+
+
+class TspInstance:
+    """City coordinates (float64 x, y rows) and roads (int32 city index pairs) of a TSP instance."""
+    def __init__(self, coords, edges=None, path=None):
+        self.coords = coords
+        self.edges = edges if edges is not None else np.empty((0, 2), dtype=np.int32)
+        self.path = path
+
+    def __len__(self):
+        return len(self.coords)
+
+    def save(self, path):
+        coords = np.ascontiguousarray(self.coords, dtype='<f8').reshape(-1, 2)
+        edges = np.ascontiguousarray(self.edges, dtype='<i4').reshape(-1, 2)
+        _write(path, KIND_TSP, len(coords), len(edges), 0, [coords, edges])
+        self.path = path
+
+    @classmethod
+    def load(cls, path):
+        """Opens an instance file with the coordinates and roads memory-mapped, not read."""
+        kind, count, edge_count, _ = read_header(path)
+        if kind != KIND_TSP:
+            raise ValueError(f'{path} is not a tsp instance')
+        coords = _map(path, '<f8', HEADER_SIZE, (count, 2))
+        edges = _map(path, '<i4', HEADER_SIZE + count * 16, (edge_count, 2))
+        return cls(coords, edges, path)
+
+    @classmethod
+    def random(cls, count, size, rng=None):
+        rng = rng if rng is not None else np.random.default_rng()
+        return cls(rng.integers(0, size + 1, size=(count, 2)).astype(np.float64))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a random instance file.")
+    parser.add_argument("kind", choices=["knapsack", "tsp"])
+    parser.add_argument("path")
+    parser.add_argument("--count", type=int, required=True, help="number of items / cities")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--min-value", type=int, default=128)
+    parser.add_argument("--max-value", type=int, default=2048)
+    parser.add_argument("--target-fraction", type=float, default=0.7)
+    parser.add_argument("--size", type=int, default=1000, help="tsp map width and height")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    if args.kind == "knapsack":
+        instance = KnapsackInstance.random(args.count, args.min_value, args.max_value, args.target_fraction, rng)
+    else:
+        instance = TspInstance.random(args.count, args.size, rng)
+    instance.save(args.path)
+    print(f'Wrote {len(instance)} {args.kind} entries to {args.path}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+import multiprocessing
+import random
+
+from genomes import SumGenome
+from instance_store import KnapsackInstance
+from ksp_core import KnapsackGA
+
+
+def _island_worker(conn, values, target, cfg, instance_path, seed):
+    """
+    Runs one island in its own process. The KnapsackGA lives for the whole run, so its population and
+    stagnation detector carry over between epochs and only migrants cross the pipe.
+
+    Each message is (generations, immigrants): the immigrant bits replace the worst genomes, then the island
+    evolves for up to `generations` generations (stopping early on the target) and replies with
+    (bits of its max(migration_size, 1) best genomes, best first, best sum, generations actually run,
+    stagnation events of the epoch).
+    A None message ends the worker.
+    """
+    try:
+        if instance_path is not None:
+            # map the instance file instead of unpickling a copy of the values sent by the parent
+            values = KnapsackInstance.load(instance_path).values
+        ga = KnapsackGA(values, target, cfg, random.Random(seed))
+        ga.start()
+        while True:
+            message = conn.recv()
+            if message is None:
+                return
+            generations, immigrants = message
+            if immigrants:
+                ga.population = ga.ranked()[:-len(immigrants)] + [SumGenome(bits, ga.values) for bits in immigrants]
+            start = ga.generation
+            for _ in range(generations):
+                if ga.best()[1] == target:
+                    break
+                ga.advance()
+            ranked = ga.ranked()[:max(cfg["migration_size"], 1)]
+            events = [e for e in ga.stagnation.events if e[0] > start] if ga.stagnation is not None else []
+            conn.send(([g.bits for g in ranked], ranked[0].total, ga.generation - start, events))
+    except Exception as e:
+        conn.send(e)
+    finally:
+        conn.close()
+
+
+class IslandModel:
+    """
+    Runs num_islands KnapsackGA populations, each in its own worker process for the whole run. Every
+    migration_interval generations each island sends copies of its migration_size best genomes to a neighbour
+    (next island on a ring, or a random other island), where they replace the worst genomes.
+
+    With instance_path (an instance_store file holding these values) the workers open the file themselves
+    rather than being sent the values. Each worker's KnapsackGA still copies them into a Python int list,
+    so that saves the pickling, not the per-worker memory.
+    """
+    def __init__(self, values, target, cfg, seed=None, instance_path=None):
+        self.values = [int(v) for v in values]
+        self.target = target
+        self.cfg = cfg
+        self.instance_path = instance_path
+        self.rng = random.Random(seed)
+        # local GA used only to score genomes in this process
+        self.ga = KnapsackGA(self.values, target, cfg, self.rng)
+        self.islands = []  # best genome bits of each island after the last epoch, best first
+        self.generation = 0
+        self.events = []  # (island, generation, action, reason) of the stagnation actions in the last epoch
+
+    def destinations(self):
+        """Island index each island sends its migrants to."""
+        count = len(self.islands)
+        if self.cfg["migration_topology"] == "random":
+            return [(i + self.rng.randint(1, count - 1)) % count if count > 1 else i for i in range(count)]
+        return [(i + 1) % count for i in range(count)]
+
+    def migrants(self):
+        """Genome bits each island receives before its next epoch."""
+        k = self.cfg["migration_size"]
+        incoming = [[] for _ in self.islands]
+        if k <= 0:
+            return incoming
+        for source, dest in enumerate(self.destinations()):
+            if dest != source:
+                incoming[dest] = self.islands[source][:k]
+        return incoming
+
+    def worker_args(self):
+        values = self.values if self.instance_path is None else ()
+        return values, self.target, self.cfg, self.instance_path
+
+    def start_workers(self, context):
+        """Starts one worker process per island; returns the parent ends of their pipes."""
+        connections = []
+        for _ in range(self.cfg["num_islands"]):
+            parent, child = context.Pipe()
+            process = context.Process(target=_island_worker, daemon=True,
+                                      args=(child, *self.worker_args(), self.rng.getrandbits(64)))
+            process.start()
+            child.close()
+            connections.append((parent, process))
+        return connections
+
+    def run(self, on_epoch=None):
+        """
+        Evolves the islands until one hits the target or num_generations is reached.
+
+        :param on_epoch: Optional callback(generation, genome, best_sum, best_fitness) with the global best,
+            called after every migration interval.
+        :return: (genome, best_sum, generation) of the global best.
+        """
+        self.islands = [[] for _ in range(self.cfg["num_islands"])]
+        self.generation = 0
+        context = multiprocessing.get_context("spawn")  # never fork the (possibly Tk-owning, threaded) parent
+        workers = self.start_workers(context)
+        try:
+            immigrants = self.islands
+            while True:
+                remaining = self.cfg["num_generations"] - self.generation
+                epoch = min(self.cfg["migration_interval"], remaining)
+                for (conn, _), incoming in zip(workers, immigrants):
+                    conn.send((epoch, incoming))
+                results = [conn.recv() for conn, _ in workers]
+                for result in results:
+                    if isinstance(result, Exception):
+                        raise result
+                self.islands = [bits for bits, _, _, _ in results]
+                self.generation += max(ran for _, _, ran, _ in results)
+                self.events = [(i, *event) for i, (_, _, _, events) in enumerate(results) for event in events]
+
+                best_island = min(range(len(results)), key=lambda i: abs(results[i][1] - self.target))
+                best = SumGenome(self.islands[best_island][0], self.values)
+                if on_epoch is not None:
+                    on_epoch(self.generation, best, best.total, self.ga.fitness(best))
+                if best.total == self.target or self.generation >= self.cfg["num_generations"]:
+                    return best, best.total, self.generation
+                immigrants = self.migrants()
+        finally:
+            for conn, process in workers:
+                try:
+                    conn.send(None)
+                except OSError:
+                    pass  # the worker already exited
+                conn.close()
+            for _, process in workers:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
@@ -0,0 +1,207 @@
+import random
+
+from genomes import BitGenome, segment_mask, first_distinct, make_distinct
+from fitness_cache import FitnessCache
+from selection import AliasTable
+from metrics import NULL_METRICS
+from mutation import mutation_positions
+from stagnation import StagnationDetector
+from seeding import Seeder
+
+num_items = 100
+frac_target = 0.7
+min_value = 128
+max_value = 2048
+
+num_generations = 1000
+pop_size = 50
+elitism_count = 2
+mutation_rate = 0.1
+fitness_cache_size = 10000
+dedupe_retries = 8  # gene flips tried to turn a child that duplicates a genome of its generation into a new one
+seed_greedy_fraction = 0.5  # share of the initial population built by randomized greedy fills (see seeding.py)
+seed_alpha = 0.3  # randomness of those fills: 0 is the plain largest-first greedy fill
+
+# what to do once the population stops improving or collapses (see stagnation.py); None to keep evolving as is
+stagnation_action = 'escalate'
+stagnation_patience = 50
+stagnation_min_entropy = 0.02
+reseed_fraction = 0.5
+hypermutation_rate = 0.2
+
+
+def random_values(count=num_items, rng=random):
+    # unique item values
+    return rng.sample(range(min_value, max_value + 1), count)
+
+
+def random_target(values, rng=random):
+    # the total of a random frac_target share of the items, so the target is always reachable
+    return sum(rng.sample(list(values), int(len(values) * frac_target)))
+
+
+class RouletteGA:
+    """
+    The Knapsack.py genetic algorithm: fitness-weighted parent selection, segment crossover
+    and single-bit mutation over BitGenomes, with fitness measured as distance to the target.
+    """
+    def __init__(self, values, target, rng=None, pop_size=pop_size, num_generations=num_generations,
+                 elitism_count=elitism_count, mutation_rate=mutation_rate, frac_target=frac_target,
+                 fitness_cache_size=fitness_cache_size, stagnation_action=stagnation_action):
+        self.values = [int(v) for v in values]
+        self.target = target
+        self.rng = rng if rng is not None else random.Random()
+        self.pop_size = pop_size
+        self.num_generations = num_generations
+        self.elitism_count = elitism_count
+        self.mutation_rate = mutation_rate
+        self.frac_target = frac_target
+        # genomes repeat a lot between generations (elites, clones), so memoize their fitness
+        self.fitness = FitnessCache(self.raw_fitness, fitness_cache_size)
+        self.population = None
+        self.fitnesses = None
+        self.generation = 0
+        self.evaluations = 0  # fitness computations that missed the cache, for benchmarking
+        self.metrics = NULL_METRICS  # set to a metrics.Metrics to time the phases of each generation
+        self.stagnation_action = stagnation_action
+        self.stagnation = None
+        if stagnation_action:
+            self.stagnation = StagnationDetector(stagnation_action, stagnation_patience, stagnation_min_entropy,
+                                                 reseed_fraction, hypermutation_rate, elitism_count)
+
+    def gene_sum(self, genome):
+        total = 0
+        for i in genome.set_indices():
+            total += self.values[i]
+        return total
+
+    def raw_fitness(self, genome):
+        self.evaluations += 1
+        return abs(self.gene_sum(genome) - self.target)
+
+    def parent_sampler(self, last_pop, min_fitness):
+        # a parent with weight w is rejected with probability w, so it is drawn in proportion to 1 - w;
+        # built once per generation instead of re-rolling for every draw
+        weights = []
+        for parent in last_pop:
+            if self.fitness(parent) == 0.0:
+                weights.append(1.0)
+            else:
+                weights.append(min_fitness / self.fitness(parent))
+        acceptance = [1.0 - w for w in weights]
+        if sum(acceptance) <= 0:
+            # every genome is as fit as the best, which the rejection loop would never leave; draw uniformly
+            acceptance = [1.0] * len(last_pop)
+        return AliasTable(acceptance)
+
+    def select_parents(self, last_pop, sampler):
+        return last_pop[sampler.sample(self.rng)], last_pop[sampler.sample(self.rng)]
+
+    def crossover(self, parent1, parent2):
+        length = len(parent1)
+        x = self.rng.randint(0, length // 2)
+        y = x + length // 2
+        # genes x+1..y come from parent2, the rest from parent1
+        return parent1.crossover(parent2, segment_mask(x + 1, min(y + 1, length)))
+
+    def mutate(self, g_in):
+        g_in.flip(self.rng.randint(0, len(g_in) - 1))
+        return g_in
+
+    def get_population(self, last_pop=None, fitnesses=None):
+        population = []
+        if last_pop is None:
+            # randomized greedy fills toward the target, then random genomes for diversity
+            seeder = Seeder(self.values, self.target, seed_greedy_fraction, seed_alpha)
+            greedy = seeder.greedy_count(self.pop_size)
+            for g in range(greedy):
+                population.append(BitGenome(seeder.bits(self.rng), len(self.values)))
+            for g in range(self.pop_size - greedy):
+                population.append(BitGenome.random(len(self.values), self.frac_target, self.rng))
+            return population
+
+        # elitism: exactly the elitism_count best distinct genomes
+        with self.metrics.phase("elitism"):
+            population = first_distinct(sorted(last_pop, key=self.fitness), self.elitism_count)
+
+        # fill generation with new individuals, one phase at a time
+        count = max(self.pop_size - len(population), 0)
+        with self.metrics.phase("selection"):
+            # select two random parents by weighted selection
+            # note no guarantee of uniqueness - could get the same parent twice
+            sampler = self.parent_sampler(last_pop, fitnesses[0])
+            parents = [self.select_parents(last_pop, sampler) for _ in range(count)]
+        with self.metrics.phase("crossover"):
+            # perform crossover to generate new individuals
+            babies = [self.crossover(p1, p2) for p1, p2 in parents]
+        with self.metrics.phase("mutation"):
+            # potentially perform mutation, then add to next generation
+            for baby in babies:
+                if self.rng.random() < self.mutation_rate:
+                    self.mutate(baby)
+        with self.metrics.phase("dedupe"):
+            # clones of an elite or of a sibling would only take a slot, so nudge them until they are new
+            seen = {genome.key for genome in population}
+            self.metrics.count("duplicates", make_distinct(babies, seen, self.rng, dedupe_retries))
+
+        return population + babies
+
+    def evaluate(self):
+        # sorted fitnesses of the current population, used by elitism and selection
+        with self.metrics.phase("evaluation"):
+            self.fitnesses = sorted(self.fitness(genome) for genome in self.population)
+
+    def ranked(self):
+        # the population, closest to the target first
+        return sorted(self.population, key=self.fitness)
+
+    def reseed(self, fraction, keep):
+        # replace the worst `fraction` of the genomes other than the `keep` best with random ones
+        ranked = self.ranked()
+        count = round((len(ranked) - keep) * fraction)
+        self.population = ranked[:len(ranked) - count] + [
+            BitGenome.random(len(self.values), self.frac_target, self.rng) for _ in range(count)]
+        self.evaluate()
+
+    def hypermutate(self, rate, keep):
+        # flip every gene of all but the `keep` best genomes with probability rate
+        ranked = self.ranked()
+        mutated = []
+        for genome in ranked[keep:]:
+            genome = genome.copy()
+            for i in mutation_positions(len(genome), rate, self.rng):
+                genome.flip(i)
+            mutated.append(genome)
+        self.population = ranked[:keep] + mutated
+        self.evaluate()
+
+    def start(self):
+        self.population = self.get_population()
+        self.generation = 0
+        self.evaluate()
+
+    def advance(self):
+        self.population = self.get_population(self.population, self.fitnesses)
+        self.generation += 1
+        self.evaluate()
+        if self.stagnation is not None:
+            self.stagnation.step(self)
+        self.metrics.end_generation(self.generation)
+
+    def best(self):
+        # (genome, sum, fitness) of the genome closest to the target
+        best_of_gen = min(self.population, key=self.fitness)
+        return best_of_gen, self.gene_sum(best_of_gen), self.fitness(best_of_gen)
+
+    def run(self, on_generation=None, resume=False):
+        # evolve until the target is hit or num_generations is reached; on_generation(generation, genome, sum, fitness)
+        # resume=True continues from the current population (e.g. a restored checkpoint) instead of starting over
+        if not resume:
+            self.start()
+        while True:
+            best_of_gen, best_sum, min_fitness = self.best()
+            if on_generation is not None:
+                on_generation(self.generation, best_of_gen, best_sum, min_fitness)
+            if min_fitness == 0 or self.generation + 1 >= self.num_generations:
+                return best_of_gen, best_sum, self.generation
+            self.advance()
@@ -1,29 +1,23 @@
 import math
 import random
 import tkinter as tk
-from tkinter import Menu, Canvas, FALSE
+from tkinter import Menu, Canvas, FALSE, filedialog, simpledialog
 import threading
-
-# ---------------------------
-# Configuration Parameters
-# ---------------------------
-CONFIG = {
-    "num_items": 100,
-    "target_fraction": 0.7,
-    "min_value": 128,
-    "max_value": 2048,
-    "screen_padding": 25,
-    "item_padding": 5,
-    "stroke_width": 5,
-    "num_generations": 1000,
-    "pop_size": 50,
-    "elitism_count": 2,
-    "tournament_size": 3,
-    "initial_mutation_rate": 0.1,
-    "min_mutation_rate": 0.01,
-    "sleep_time": 0.1,
-    "cols": 6
-}
+import time
+
+from ksp_core import CONFIG, generate_values, pick_target, make_engine, run_engine
+from genomes import genome_bits, iter_set_bits
+from subset_sum import solve_exact, ReachableSumIndex
+from islands import IslandModel
+from snapshots import LatestSnapshot
+from instance_store import KnapsackInstance, WeightedKnapsackInstance, read_header, KIND_WEIGHTED
+from ksp_view import LargeItemView
+from metrics import Metrics
+from profiling import Profiler
+from checkpoint import Checkpointer, load as load_checkpoint
+from ksp_matrix import MatrixGA
+from bpso import BinaryPSO
+from weighted_knapsack import WeightedInstance, WeightedGA, branch_and_bound
 
 
 def get_random_color():
@@ -35,9 +29,10 @@ def get_random_color():
 
 
 class KnapsackItem:
-    """Represents an individual knapsack item with a value and a visual representation."""
-    def __init__(self, min_val, max_val, item_pad, stroke_w):
-        self.value = random.randint(min_val, max_val)
+    """An individual knapsack item with a value (and a weight in weighted mode) and a visual representation."""
+    def __init__(self, value, item_pad, stroke_w, weight=None):
+        self.value = value
+        self.weight = weight
         self.color = get_random_color()
         self.x = 0
         self.y = 0
@@ -45,6 +40,8 @@ class KnapsackItem:
         self.h = 0
         self.item_padding = item_pad
         self.stroke_width = stroke_w
+        self.rect_id = None
+        self.selected = False
 
     def place_item(self, x, y, w, h):
         """Sets the position and size of the item on the canvas."""
@@ -54,21 +51,29 @@ class KnapsackItem:
         self.h = h
 
     def draw(self, canvas, selected=False):
-        """Draws the item. If selected is True, fill the rectangle."""
+        """Creates the item's canvas objects once. If selected is True, fill the rectangle."""
         text_x = self.x + self.w + self.item_padding + (self.stroke_width * 2)
         text_y = self.y + self.h / 2
-        canvas.create_text(text_x, text_y, text=f'{self.value}')
+        label = f'{self.value}' if self.weight is None else f'{self.value}/{self.weight}'
+        canvas.create_text(text_x, text_y, text=label)
 
         rect_fill = self.color if selected else ''
         rect_outline = self.color
 
-        canvas.create_rectangle(
+        self.rect_id = canvas.create_rectangle(
             self.x, self.y,
             self.x + self.w, self.y + self.h,
             fill=rect_fill,
             outline=rect_outline,
             width=self.stroke_width
         )
+        self.selected = selected
+
+    def set_selected(self, canvas, selected):
+        """Fills or empties the already drawn rectangle, touching the canvas only on a change."""
+        if selected != self.selected:
+            canvas.itemconfigure(self.rect_id, fill=self.color if selected else '')
+            self.selected = selected
 
 
 class KnapsackGUI(tk.Tk):
@@ -87,7 +92,24 @@ class KnapsackGUI(tk.Tk):
         self.canvas.place(x=0, y=0, width=self.width, height=self.height)
 
         self.items = []
-        self.target = 0
+        self.values = []
+        self.view = None  # LargeItemView used instead of self.items when there are too many items to draw
+        self.target = 0  # target sum, or the capacity in weighted mode
+        self.weighted = None  # WeightedInstance of the current items in weighted mode
+        self.weighted_optimum = None  # its optimal value, once branch and bound has proven one
+        self.mode = tk.StringVar(self, value=self.cfg["knapsack_mode"])
+        self.sum_index = None
+        self.instance_path = None  # instance file holding the current items, if they came from or went to one
+        self.engine = tk.StringVar(self, value=self.cfg["engine"])
+        self.run_started = 0.0
+        self.run_metrics = Metrics()  # phase timings of the engine in the current run
+        self.draw_metrics = Metrics()  # time spent redrawing, one row per frame
+        self.show_metrics = tk.BooleanVar(self, value=False)
+        self.profiler = Profiler(self.cfg["profile_dir"])
+        # list/matrix/pso runs are saved here every checkpoint_seconds; "Resume Checkpoint..." continues one
+        self.checkpointer = Checkpointer(self.cfg["checkpoint_path"], self.cfg["checkpoint_seconds"])
+        self.canvas_ids = {}  # name -> id of the bars and labels that are updated in place
+        self.drawn_bits = None  # genome shown by the item rectangles, None until they are drawn
 
         # Menu Bar
         menu_bar = Menu(self)
@@ -99,40 +121,208 @@ class KnapsackGUI(tk.Tk):
         knap_menu.add_command(label="Generate", command=self.cmd_generate_items)
         knap_menu.add_command(label="Set Target", command=self.cmd_set_target)
         knap_menu.add_command(label="Run", command=self.cmd_run_thread)
+        knap_menu.add_command(label="Run (Turbo)", command=self.cmd_run_turbo_thread)
+        knap_menu.add_command(label="Solve Exactly", command=self.cmd_solve_exact_thread)
+        knap_menu.add_separator()
+        knap_menu.add_command(label="Open Instance...", command=self.cmd_open_instance)
+        knap_menu.add_command(label="Save Instance...", command=self.cmd_save_instance)
+        knap_menu.add_command(label="Resume Checkpoint...", command=self.cmd_resume_checkpoint)
+        knap_menu.add_separator()
+        knap_menu.add_checkbutton(label="Show Metrics", variable=self.show_metrics)
+        knap_menu.add_command(label="Export Metrics...", command=self.cmd_export_metrics)
+        knap_menu.add_command(label="Profile Next Generations...", command=self.cmd_profile)
+
+        engine_menu = Menu(knap_menu)
+        knap_menu.add_cascade(menu=engine_menu, label='Engine')
+        engine_menu.add_radiobutton(label="Python Lists", variable=self.engine, value="list")
+        engine_menu.add_radiobutton(label="NumPy Matrix", variable=self.engine, value="matrix")
+        engine_menu.add_radiobutton(label="Island Model (multiprocess)", variable=self.engine, value="islands")
+        engine_menu.add_radiobutton(label="Binary Particle Swarm (NumPy)", variable=self.engine, value="pso")
+
+        mode_menu = Menu(knap_menu)
+        knap_menu.add_cascade(menu=mode_menu, label='Mode')
+        mode_menu.add_radiobutton(label="Subset Sum", variable=self.mode, value="subset-sum",
+                                  command=self.cmd_generate_items)
+        mode_menu.add_radiobutton(label="Weighted (value within capacity)", variable=self.mode, value="weighted",
+                                  command=self.cmd_generate_items)
 
     def cmd_generate_items(self):
-        """Generates the items and draws them on the canvas."""
+        """Generates the items (with weights and a capacity in weighted mode) and draws them on the canvas."""
         self.items.clear()
+        self.clear_canvas()
+        self.instance_path = None
+        if self.mode.get() == "weighted":
+            self.set_weighted(WeightedInstance.random(self.cfg))
+            return
+        self.weighted = None
         self.generate_items()
+        self.build_sum_index()
         self.draw_all_items()
 
+    def set_weighted(self, instance):
+        """Shows a weighted instance: items labelled value/weight, and the capacity in place of the target."""
+        self.weighted = instance
+        self.weighted_optimum = None
+        self.mode.set("weighted")
+        self.generate_items(instance.values, instance.weights)
+        self.sum_index = None
+        self.target = instance.capacity
+        self.draw_all_items()
+        self.draw_target()
+
+    def cmd_open_instance(self):
+        """Loads items and target from an instance file and draws them."""
+        path = filedialog.askopenfilename(filetypes=[("Instances", "*.inst"), ("All files", "*")])
+        if not path:
+            return
+        self.items.clear()
+        self.clear_canvas()
+        if read_header(path)[0] == KIND_WEIGHTED:
+            instance = WeightedKnapsackInstance.load(path)
+            self.set_weighted(WeightedInstance(instance.weights, instance.values, instance.capacity))
+            self.instance_path = path
+            return
+        instance = KnapsackInstance.load(path)
+        self.weighted = None
+        self.mode.set("subset-sum")
+        self.generate_items(instance.values)
+        self.instance_path = path
+        self.build_sum_index()
+        self.draw_all_items()
+        self.target = instance.target
+        if self.target:
+            self.draw_target()
+
+    def cmd_save_instance(self):
+        """Saves the current items and target to an instance file."""
+        path = filedialog.asksaveasfilename(defaultextension=".inst", filetypes=[("Instances", "*.inst")])
+        if path:
+            if self.weighted is not None:
+                WeightedKnapsackInstance(self.weighted.values, self.weighted.weights, self.weighted.capacity).save(path)
+            else:
+                KnapsackInstance(self.values, self.target).save(path)
+            self.instance_path = path
+
+    def cmd_resume_checkpoint(self):
+        """Restores a list/matrix GA or swarm run from a checkpoint file and continues it from the saved generation."""
+        path = filedialog.askopenfilename(filetypes=[("Checkpoints", "*.npz"), ("All files", "*")])
+        if not path:
+            return
+        try:
+            engine = load_checkpoint(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(e)
+            return
+        if not hasattr(engine, "cfg"):
+            print(f'{path} is not a Knapsack Solver checkpoint')
+            return
+        self.items.clear()
+        self.clear_canvas()
+        self.instance_path = None
+        if isinstance(engine, WeightedGA):
+            self.set_weighted(engine.instance)
+        else:
+            self.engine.set("matrix" if isinstance(engine, MatrixGA) else "pso" if isinstance(engine, BinaryPSO)
+                            else "list")
+            self.weighted = None
+            self.mode.set("subset-sum")
+            self.generate_items([int(v) for v in engine.values])
+            self.build_sum_index()
+            self.target = engine.target
+            self.draw_target()
+        print(f'Resuming {path} at generation {engine.generation}')
+        th = threading.Thread(target=self.execute_ga, args=(self.engine.get(), engine))
+        th.start()
+
+    def cmd_export_metrics(self):
+        """Saves the phase timings of the last run as CSV (one row per generation) or JSON (summary and rows)."""
+        path = filedialog.asksaveasfilename(defaultextension=".json",
+                                            filetypes=[("JSON", "*.json"), ("CSV", "*.csv")])
+        if path:
+            self.run_metrics.export(path)
+
+    def cmd_profile(self):
+        """Profiles the next N generations of the current (or next) run into cfg["profile_dir"]."""
+        generations = simpledialog.askinteger("Profile", "Generations to profile:", parent=self,
+                                              initialvalue=self.cfg["profile_generations"], minvalue=1)
+        if generations:
+            self.profiler.request(generations, f'ksp-{self.engine.get()}')
+
     def cmd_set_target(self):
         """Selects a subset of items as a target and computes their total value."""
+        if self.weighted is not None:
+            print(f'Weighted mode: the capacity ({self.target}) comes with the instance')
+            return
         self.define_target_sum()
         self.draw_target()
+        if self.sum_index is not None:
+            result = self.sum_index.solve(self.target)
+            print(f'Target {self.target}: nearest reachable sum {result.total} '
+                  f'({len(result.indices)} items, looked up in {result.elapsed * 1000:.3f} ms)')
 
     def cmd_run_thread(self):
         """Starts the genetic algorithm in a separate thread."""
-        th = threading.Thread(target=self.execute_ga, args=())
+        th = threading.Thread(target=self.execute_ga, args=(self.engine.get(),))
+        th.start()
+
+    def cmd_run_turbo_thread(self):
+        """Runs the GA unthrottled in a separate thread while the UI shows its newest best at frame_rate."""
+        snapshots = LatestSnapshot()
+        th = threading.Thread(target=self.execute_turbo, args=(self.engine.get(), snapshots))
+        th.start()
+        self.poll_snapshots(snapshots)
+
+    def cmd_solve_exact_thread(self):
+        """Solves the target exactly in a separate thread."""
+        th = threading.Thread(target=self.execute_exact, args=())
+        th.start()
+
+    def build_sum_index(self):
+        """Builds (or loads from disk) the reachable-sum index for the current items on a worker thread."""
+        self.sum_index = None
+        th = threading.Thread(target=self.execute_sum_index, args=(list(self.values),), daemon=True)
         th.start()
 
-    def generate_items(self):
-        """Generates a unique set of items and places them on the canvas."""
-        # Ensure unique values by regenerating if duplicated
-        values_set = set()
-        while len(self.items) < self.cfg["num_items"]:
-            new_item = KnapsackItem(self.cfg["min_value"], self.cfg["max_value"],
-                                    self.cfg["item_padding"], self.cfg["stroke_width"])
-            if new_item.value not in values_set:
-                values_set.add(new_item.value)
-                self.items.append(new_item)
+    def execute_sum_index(self, values):
+        """Worker side of build_sum_index: hands the index (or why there is none) back to the main thread."""
+        try:
+            index = ReachableSumIndex.cached(values, self.cfg["index_dir"])
+        except ValueError as e:
+            print(f'No reachable-sum index: {e}')
+            self.after(0, self.draw_run_info, 'No reachable-sum index (too many items)')
+            return
+        self.after(0, self.set_sum_index, values, index)
+
+    def set_sum_index(self, values, index):
+        """Installs a finished index unless the items changed while it was being built."""
+        if values == self.values:
+            self.sum_index = index
+
+    def generate_items(self, values=None, weights=None):
+        """
+        Generates a unique set of items (or uses the given values) and places them on the canvas.
+        With weights, item heights show the weights instead of the values.
+        Beyond max_drawn_items no per-item objects are created; a LargeItemView shows them instead.
+        """
+        if values is None:
+            values = generate_values(self.cfg)
+        self.values = [int(v) for v in values]  # a copy even of memory-mapped values, for the engines and views
+        if len(self.values) > self.cfg["max_drawn_items"]:
+            pad = self.cfg["screen_padding"]
+            self.view = LargeItemView(self.canvas, self.values, pad, pad,
+                                      (self.width - pad) / 8 * 6 - pad, self.height - pad - 200)
+            return
+        sizes = self.values if weights is None else [int(w) for w in weights]
+        for value, size in zip(self.values, sizes):
+            weight = None if weights is None else size
+            self.items.append(KnapsackItem(value, self.cfg["item_padding"], self.cfg["stroke_width"], weight))
 
         # Compute layout parameters
-        item_count = self.cfg["num_items"]
+        item_count = len(self.items)
         cols = self.cfg["cols"]
         rows = math.ceil(item_count / cols)
 
-        max_val = max(item.value for item in self.items)
+        max_val = max(sizes)
         w = self.width - self.cfg["screen_padding"]
         h = self.height - self.cfg["screen_padding"]
         row_w = w / (cols + 2) - self.cfg["item_padding"]
@@ -147,7 +337,7 @@ class KnapsackGUI(tk.Tk):
                 itm = self.items[idx]
                 item_w = row_w / 2
                 # Ensure each item height is at least 1
-                item_h = max((itm.value / max_val) * row_h, 1)
+                item_h = max((sizes[idx] / max_val) * row_h, 1)
                 x_pos = self.cfg["screen_padding"] + c * (row_w + self.cfg["item_padding"])
                 y_pos = self.cfg["screen_padding"] + r * (row_h + self.cfg["item_padding"])
                 itm.place_item(x_pos, y_pos, item_w, item_h)
@@ -155,20 +345,49 @@ class KnapsackGUI(tk.Tk):
 
     def define_target_sum(self):
         """Randomly selects a fraction of items and sets the target sum as their total."""
-        subset_size = int(self.cfg["num_items"] * self.cfg["target_fraction"])
-        chosen = set()
-        while len(chosen) < subset_size:
-            chosen.add(random.choice(self.items))
-        self.target = sum(itm.value for itm in chosen)
+        self.target = pick_target(self.values, self.cfg)
 
     def clear_canvas(self):
+        if self.view is not None:
+            self.view.destroy()
+            self.view = None
         self.canvas.delete("all")
+        self.canvas_ids.clear()
+        self.drawn_bits = None
+
+    def retained_rectangle(self, name, x0, y0, x1, y1, **options):
+        """Creates the named rectangle on first use, afterwards only moves it with coords."""
+        item_id = self.canvas_ids.get(name)
+        if item_id is None:
+            self.canvas_ids[name] = self.canvas.create_rectangle(x0, y0, x1, y1, **options)
+        else:
+            self.canvas.coords(item_id, x0, y0, x1, y1)
+
+    def retained_text(self, name, x, y, text, **options):
+        """Creates the named text on first use, afterwards only moves it and changes its text."""
+        item_id = self.canvas_ids.get(name)
+        if item_id is None:
+            self.canvas_ids[name] = self.canvas.create_text(x, y, text=text, **options)
+        else:
+            self.canvas.coords(item_id, x, y)
+            self.canvas.itemconfigure(item_id, text=text)
 
     def draw_all_items(self, genome=None):
-        """Draws all items. Highlights those selected if a genome is provided."""
-        for i, itm in enumerate(self.items):
-            active = (genome[i] if genome is not None else False)
-            itm.draw(self.canvas, active)
+        """
+        Shows which items the genome selects. Items are created on the canvas once; after that
+        only the rectangles of genes that flipped since the last frame are reconfigured.
+        """
+        if self.view is not None:
+            self.view.show(genome)
+            return
+        bits = genome_bits(genome) if genome is not None else 0
+        if self.drawn_bits is None:
+            for i, itm in enumerate(self.items):
+                itm.draw(self.canvas, (bits >> i) & 1 == 1)
+        else:
+            for i in iter_set_bits(bits ^ self.drawn_bits):
+                self.items[i].set_selected(self.canvas, (bits >> i) & 1 == 1)
+        self.drawn_bits = bits
 
     def draw_target(self):
         """Displays the target value as a separate bar."""
@@ -176,12 +395,13 @@ class KnapsackGUI(tk.Tk):
         y = self.cfg["screen_padding"]
         w = (self.width - self.cfg["screen_padding"]) / 8 - self.cfg["screen_padding"]
         h = self.height / 2 - self.cfg["screen_padding"]
-        self.canvas.create_rectangle(x, y, x + w, y + h, fill='black')
-        self.canvas.create_text(x + w // 2, y + h + self.cfg["screen_padding"], 
-                                text=f'Target: {self.target}', font=('Arial', 18))
+        self.retained_rectangle('target_bar', x, y, x + w, y + h, fill='black')
+        label = 'Capacity' if self.weighted is not None else 'Target'
+        self.retained_text('target_text', x + w // 2, y + h + self.cfg["screen_padding"],
+                           f'{label}: {self.target}', font=('Arial', 18))
 
     def draw_sum_bar(self, current_sum):
-        """Draws a bar representing the current genome sum compared to the target."""
+        """Draws a bar representing the current genome sum (its weight, in weighted mode) compared to the target."""
         x = (self.width - self.cfg["screen_padding"]) / 8 * 6
         y = self.cfg["screen_padding"]
         w = (self.width - self.cfg["screen_padding"]) / 8 - self.cfg["screen_padding"]
@@ -190,10 +410,9 @@ class KnapsackGUI(tk.Tk):
 
         diff = current_sum - self.target
         sign = '+' if diff > 0 else '-'
-        self.canvas.create_rectangle(x, y, x + w, y + scaled_h, fill='black')
-        self.canvas.create_text(x + w // 2, y + scaled_h + self.cfg["screen_padding"],
-                                text=f'{current_sum} ({sign}{abs(diff)})',
-                                font=('Arial', 18))
+        self.retained_rectangle('sum_bar', x, y, x + w, y + scaled_h, fill='black')
+        self.retained_text('sum_text', x + w // 2, y + scaled_h + self.cfg["screen_padding"],
+                           f'{current_sum} ({sign}{abs(diff)})', font=('Arial', 18))
 
     def draw_generation_info(self, gen_num):
         """Displays the current generation number."""
@@ -201,98 +420,194 @@ class KnapsackGUI(tk.Tk):
         y = self.cfg["screen_padding"]
         w = (self.width - self.cfg["screen_padding"]) / 8 - self.cfg["screen_padding"]
         h = self.height / 4 * 3
-        self.canvas.create_text(x + w, y + h + self.cfg["screen_padding"] * 2,
-                                text=f'Generation {gen_num}', font=('Arial', 18))
+        self.retained_text('generation_text', x + w, y + h + self.cfg["screen_padding"] * 2,
+                           f'Generation {gen_num}', font=('Arial', 18))
+
+    def draw_value_info(self, value):
+        """Displays the packed value in weighted mode, with its distance to the best possible value."""
+        x = (self.width - self.cfg["screen_padding"]) / 8 * 6
+        y = self.cfg["screen_padding"]
+        w = (self.width - self.cfg["screen_padding"]) / 8 - self.cfg["screen_padding"]
+        h = self.height / 4 * 3
+        text = f'Value {value} (bound {self.weighted.upper_bound()})' if self.weighted is not None else ''
+        self.retained_text('value_text', x + w, y + h + self.cfg["screen_padding"] * 3,
+                           text, font=('Arial', 18))
+
+    def draw_run_info(self, text):
+        """Displays a status line (e.g. time to solution) under the generation counter."""
+        x = (self.width - self.cfg["screen_padding"]) / 8 * 6
+        y = self.cfg["screen_padding"]
+        w = (self.width - self.cfg["screen_padding"]) / 8 - self.cfg["screen_padding"]
+        h = self.height / 4 * 3
+        self.retained_text('run_text', x + w, y + h + self.cfg["screen_padding"] * 4,
+                           text, font=('Arial', 18))
+
+    def draw_metrics_overlay(self):
+        """Displays the last generation's phase timings and the last frame's draw time, if enabled."""
+        text = ''
+        if self.show_metrics.get():
+            draw_ms = self.draw_metrics.last().get('draw', 0.0) * 1000
+            text = f'{self.run_metrics.format_last()}   draw {draw_ms:.2f} ms'
+        x = (self.width - self.cfg["screen_padding"]) / 8 * 6
+        y = self.cfg["screen_padding"]
+        w = (self.width - self.cfg["screen_padding"]) / 8 - self.cfg["screen_padding"]
+        h = self.height / 4 * 3
+        self.retained_text('metrics_text', x + w, y + h + self.cfg["screen_padding"] * 6,
+                           text, font=('Arial', 12))
+
+    def redraw(self, best, best_sum, generation):
+        """Shows a genome with its sum (its value, in weighted mode) and generation, timing the drawing."""
+        with self.draw_metrics.phase("draw"):
+            self.draw_target()
+            if self.weighted is not None:
+                self.draw_sum_bar(self.weighted.weight_of(iter_set_bits(genome_bits(best))))
+                self.draw_value_info(best_sum)
+            else:
+                self.draw_sum_bar(best_sum)
+            self.draw_all_items(best)
+            self.draw_generation_info(generation)
+        self.draw_metrics.end_generation(generation)
+        self.draw_metrics_overlay()
 
     # ---------------------------
     # Genetic Algorithm
     # ---------------------------
-    def compute_sum(self, genome):
-        """Compute the sum of values included in the genome."""
-        total = sum(itm.value for i, itm in enumerate(self.items) if genome[i])
-        return total
-
-    def fitness(self, genome):
-        """Calculate the fitness of a genome based on its closeness to the target."""
-        total = self.compute_sum(genome)
-        diff = abs(total - self.target)
-
-        # Penalize solutions far from the target more
-        if diff > self.target * 0.5:
-            return 1 / ((diff ** 2) + 1)
-        return 1 / (diff + 1)
-
-    def tournament_selection(self, population):
-        """Select a parent using tournament selection."""
-        contenders = random.sample(population, self.cfg["tournament_size"])
-        return max(contenders, key=lambda g: self.fitness(g))
-
-    def crossover(self, p1, p2):
-        """Uniform crossover to create a child genome."""
-        return [p1[i] if random.random() < 0.5 else p2[i] for i in range(len(p1))]
-
-    def adaptive_mutation(self, genome, generation):
-        """Adaptive mutation rate decreases over time."""
-        max_gens = self.cfg["num_generations"]
-        init_rate = self.cfg["initial_mutation_rate"]
-        min_rate = self.cfg["min_mutation_rate"]
-        cur_mut_rate = max(min_rate, init_rate * (1 - generation / max_gens))
-
-        mutated = genome[:]
-        for i in range(len(mutated)):
-            if random.random() < cur_mut_rate:
-                mutated[i] = not mutated[i]
-        return mutated
-
-    def create_initial_population(self):
-        """Generates the initial population."""
-        return [
-            [random.random() < self.cfg["target_fraction"] for _ in range(self.cfg["num_items"])]
-            for _ in range(self.cfg["pop_size"])
-        ]
-
-    def evolve_population(self, old_pop, generation):
-        """Generate a new population from the old one using elitism, selection, crossover, and mutation."""
-        sorted_pop = sorted(old_pop, key=lambda g: self.fitness(g), reverse=True)
-        new_pop = sorted_pop[:self.cfg["elitism_count"]]
-
-        # Fill the rest of the population
-        while len(new_pop) < self.cfg["pop_size"]:
-            p1 = self.tournament_selection(old_pop)
-            p2 = self.tournament_selection(old_pop)
-            child = self.crossover(p1, p2)
-            child = self.adaptive_mutation(child, generation)
-            new_pop.append(child)
-
-        return new_pop
-
-    def ga_step(self, generation=0, population=None):
+    def ga_step(self, engine):
         """One step of the GA. Updates the UI and schedules the next step unless solution found or max gen reached."""
-        if population is None:
-            population = self.create_initial_population()
+        self.profiler.tick()
+        self.checkpointer.tick(engine)
+        best, best_sum, best_fitness = engine.best()
+        generation = engine.generation
 
-        best = max(population, key=lambda g: self.fitness(g))
-        best_fitness = self.fitness(best)
-        best_sum = self.compute_sum(best)
-
-        # Update UI
-        self.after(0, self.clear_canvas)
-        self.after(0, self.draw_target)
-        self.after(0, self.draw_sum_bar, best_sum)
-        self.after(0, self.draw_all_items, best)
-        self.after(0, self.draw_generation_info, generation)
+        self.schedule_redraw(best, best_sum, generation)
 
         # Print info to console
         print(f'Generation {generation}: Best Fitness: {best_fitness:.6f}, Best Sum: {best_sum}')
+        event = engine.stagnation.event_at(generation) if engine.stagnation is not None else None
+        if event is not None:
+            print(f'Generation {generation}: stagnation ({event[2]}), applied {event[1]}')
 
         # If not perfect solution, proceed to next generation
-        if abs(best_sum - self.target) > 0 and generation < self.cfg["num_generations"]:
-            new_population = self.evolve_population(population, generation)
-            self.after(int(self.cfg["sleep_time"] * 1000), self.ga_step, generation + 1, new_population)
-
-    def execute_ga(self):
-        """Runs the genetic algorithm from the start."""
-        self.ga_step()
+        converged = getattr(engine, "converged", False)
+        if best_sum != engine.target and generation < self.cfg["num_generations"] and not converged:
+            engine.advance()
+            self.after(int(self.cfg["sleep_time"] * 1000), self.ga_step, engine)
+        else:
+            self.profiler.stop()
+            self.report_run_time(best_sum, generation, engine.target)
+
+    def report_run_time(self, best_sum, generation, target=None):
+        """Prints and displays the wall-clock time the GA took, including any UI throttling."""
+        elapsed = time.perf_counter() - self.run_started
+        status = 'solved' if best_sum == (self.target if target is None else target) else 'stopped'
+        if self.weighted is not None and status == 'stopped':
+            # without a known optimum the weighted GA can only say how far it is from the LP bound
+            bound = self.weighted.upper_bound()
+            status = f'stopped {(bound - best_sum) / bound:.3%} below the bound'
+        text = f'GA {status} in {elapsed:.2f} s ({generation} generations)'
+        print(text)
+        self.after(0, self.draw_run_info, text)
+
+    def schedule_redraw(self, best, best_sum, generation):
+        """Schedules an update of the best genome's display on the main thread."""
+        self.after(0, self.redraw, best, best_sum, generation)
+
+    def new_engine(self, engine):
+        """The selected GA engine for the current items; weighted mode always uses the WeightedGA."""
+        if self.weighted is not None:
+            return WeightedGA(self.weighted, self.cfg, optimum=self.weighted_optimum)
+        return make_engine(engine, self.values, self.target, self.cfg)
+
+    def execute_ga(self, engine="list", resumed=None):
+        """Runs the genetic algorithm from the start with the given engine, or continues a resumed one."""
+        self.run_started = time.perf_counter()
+        if engine == "islands" and self.weighted is None:
+            self.execute_islands()
+            return
+        if resumed is not None:
+            ga = resumed
+        else:
+            ga = self.new_engine(engine)
+            ga.start()
+        ga.metrics = self.run_metrics = Metrics()
+        # every step runs on the Tk thread, the first one included, so a profiling window sees all of them
+        self.after(0, self.ga_step, ga)
+
+    def execute_turbo(self, engine, snapshots):
+        """Runs the selected engine flat out, publishing every generation's best into the snapshot slot."""
+        def publish(generation, best, best_sum, best_fitness):
+            self.profiler.tick()
+            if ga is not None:
+                self.checkpointer.tick(ga)
+            snapshots.publish((generation, genome_bits(best), best_sum))
+
+        self.run_started = time.perf_counter()
+        ga = None
+        try:
+            if engine == "islands" and self.weighted is None:
+                model = IslandModel(self.values, self.target, self.cfg, instance_path=self.instance_path)
+                _, best_sum, generation = model.run(publish)
+            else:
+                ga = self.new_engine(engine)
+                ga.metrics = self.run_metrics = Metrics()
+                _, best_sum, generation = run_engine(ga, publish)
+        finally:
+            snapshots.close()
+            self.profiler.stop()
+        self.report_run_time(best_sum, generation, ga.target if ga is not None else None)
+
+    def poll_snapshots(self, snapshots):
+        """Draws the newest published snapshot, if any, and polls again until the run is over."""
+        snapshot = snapshots.take()
+        if snapshot is not None:
+            generation, bits, best_sum = snapshot
+            self.redraw(bits, best_sum, generation)
+        if not snapshots.drained():
+            self.after(int(1000 / self.cfg["frame_rate"]), self.poll_snapshots, snapshots)
+
+    def execute_islands(self):
+        """Runs the island model in worker processes, showing the global best after every migration."""
+        def show_epoch(generation, best, best_sum, best_fitness):
+            self.profiler.tick()  # once per epoch: only the coordinating process is profiled
+            self.schedule_redraw(best, best_sum, generation)
+            print(f'Generation {generation}: Best Fitness: {best_fitness:.6f}, Best Sum: {best_sum}')
+            for island, event_generation, action, reason in model.events:
+                print(f'Generation {event_generation}: island {island} stagnation ({reason}), applied {action}')
+
+        model = IslandModel(self.values, self.target, self.cfg, instance_path=self.instance_path)
+        _, best_sum, generation = model.run(show_epoch)
+        self.profiler.stop()
+        self.report_run_time(best_sum, generation)
+
+    def execute_exact(self):
+        """Solves the target exactly (from the reachable-sum index if there is one) and shows the solution."""
+        if self.weighted is not None:
+            self.execute_branch_and_bound()
+            return
+        try:
+            if self.sum_index is not None:
+                result = self.sum_index.solve(self.target)
+            else:
+                result = solve_exact(self.values, self.target)
+        except ValueError as e:
+            print(e)
+            self.after(0, self.draw_run_info, str(e))
+            return
+        text = f'Exact ({result.method}) solved in {result.elapsed * 1000:.2f} ms'
+        print(f'{text}: sum {result.total}, {len(result.indices)} items')
+        self.schedule_redraw(result.genome(len(self.values)), result.total, 0)
+        self.after(0, self.draw_run_info, text)
+
+    def execute_branch_and_bound(self):
+        """Solves the weighted instance by branch and bound, showing the optimum or the best packing and its gap."""
+        result = branch_and_bound(self.weighted, self.cfg["bnb_max_frontier"], self.cfg["bnb_time_limit"])
+        status = 'solved' if result.optimal else f'stopped at a {result.gap:.4%} gap'
+        if result.optimal:
+            self.weighted_optimum = result.value  # later GA runs can stop as soon as they reach it
+        text = f'Branch and bound {status} in {result.elapsed * 1000:.2f} ms ({result.nodes} nodes)'
+        print(f'{text}: value {result.value}, weight {result.weight}/{result.capacity}, bound {result.upper_bound}')
+        self.schedule_redraw(result.genome(len(self.values)), result.value, 0)
+        self.after(0, self.draw_run_info, text)
 
 
 def main():
@@ -301,4 +616,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
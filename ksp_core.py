@@ -0,0 +1,240 @@
+import random
+
+import numpy as np
+
+from genomes import SumGenome, first_distinct, make_distinct, genome_array
+from local_search import LocalSearch
+from seeding import Seeder
+from ksp_matrix import MatrixGA
+from bpso import BinaryPSO
+from mutation import decaying_rate, mutation_positions
+from metrics import NULL_METRICS
+from stagnation import StagnationDetector
+
+# ---------------------------
+# Configuration Parameters
+# ---------------------------
+CONFIG = {
+    "num_items": 100,
+    "target_fraction": 0.7,
+    "min_value": 128,
+    "max_value": 2048,
+    "screen_padding": 25,
+    "item_padding": 5,
+    "stroke_width": 5,
+    "num_generations": 1000,
+    "pop_size": 50,
+    "elitism_count": 2,
+    "tournament_size": 3,
+    "initial_mutation_rate": 0.1,
+    "min_mutation_rate": 0.01,
+    "sleep_time": 0.1,
+    "frame_rate": 30,
+    "max_drawn_items": 2000,
+    "cols": 6,
+    "engine": "list",
+    "matrix_chunk_rows": 1024,
+    "num_islands": 4,
+    "migration_interval": 10,
+    "migration_size": 2,
+    "migration_topology": "ring",
+    "index_dir": "ksp_index",
+    "profile_dir": "profiles",
+    "profile_generations": 50,
+    "checkpoint_path": "ksp_checkpoint.npz",
+    "checkpoint_seconds": 60,
+    "stagnation_action": "escalate",  # hypermutate / reseed / restart / escalate, or None to never intervene
+    "stagnation_patience": 50,
+    "stagnation_min_entropy": 0.02,
+    "reseed_fraction": 0.5,
+    "hypermutation_rate": 0.2,
+    "dedupe_retries": 8,  # gene flips tried to turn a duplicate child into a new genome
+    "local_search_children": 2,  # fittest children hill-climbed each generation (see local_search.py), 0 for none
+    "local_search_moves": 50,  # add/drop/swap moves per hill climb
+    "seed_greedy_fraction": 0.5,  # share of the initial population built by randomized greedy fills (seeding.py)
+    "seed_alpha": 0.3,  # randomness of those fills: 0 is the plain largest-first greedy fill
+    "swarm_size": 1000,  # particles of the "pso" engine (bpso.py); it runs num_generations iterations
+    "pso_inertia": 0.9,
+    "pso_c1": 1.5,  # pull toward each particle's own best
+    "pso_c2": 1.5,  # pull toward the swarm's best
+    "pso_max_velocity": 6.0,  # keeps every bit's set probability within sigmoid(+-6), about 0.25%..99.75%
+    "knapsack_mode": "subset-sum",  # or "weighted": items with a weight, maximizing value within a capacity
+    "min_weight": 16,
+    "max_weight": 1024,
+    "capacity_fraction": 0.5,
+    "bnb_max_frontier": 200000,  # open branch-and-bound nodes kept before the weakest half is dropped
+    "bnb_time_limit": 30,  # seconds before branch and bound stops with a proven gap
+    "weighted_patience": 200  # generations without a better packing before the weighted GA stops
+}
+
+
+def generate_values(cfg, rng=random):
+    """Generates num_items unique random item values."""
+    return rng.sample(range(cfg["min_value"], cfg["max_value"] + 1), cfg["num_items"])
+
+
+def pick_target(values, cfg, rng=random):
+    """Randomly selects a fraction of the items and returns their total as the target sum."""
+    subset_size = int(len(values) * cfg["target_fraction"])
+    return sum(rng.sample(list(values), subset_size))
+
+
+class KnapsackGA:
+    """Genetic algorithm over SumGenomes: elitism, tournament selection, uniform crossover, adaptive mutation."""
+    def __init__(self, values, target, cfg, rng=None):
+        self.values = [int(v) for v in values]  # SumGenome sums Python ints; this copies memory-mapped values
+        self.target = target
+        self.cfg = cfg
+        self.rng = rng if rng is not None else random.Random()
+        self.population = None
+        self.generation = 0
+        self.evaluations = 0  # fitness evaluations so far, for benchmarking
+        self.metrics = NULL_METRICS  # set to a metrics.Metrics to time the phases of each generation
+        self.stagnation = StagnationDetector.from_config(cfg)
+        self.local_search = LocalSearch.from_config(self.values, cfg)
+
+    def compute_sum(self, genome):
+        """Sum of values included in the genome, tracked incrementally by the SumGenome."""
+        return genome.total
+
+    def fitness(self, genome):
+        """Calculate the fitness of a genome based on its closeness to the target."""
+        self.evaluations += 1
+        total = self.compute_sum(genome)
+        diff = abs(total - self.target)
+
+        # Penalize solutions far from the target more
+        if diff > self.target * 0.5:
+            return 1 / ((diff ** 2) + 1)
+        return 1 / (diff + 1)
+
+    def tournament_selection(self, population):
+        """Select a parent using tournament selection."""
+        contenders = self.rng.sample(population, self.cfg["tournament_size"])
+        return max(contenders, key=lambda g: self.fitness(g))
+
+    def crossover(self, p1, p2):
+        """Uniform crossover to create a child genome, one random mask bit per gene."""
+        return p1.crossover(p2, self.rng.getrandbits(len(p1)))
+
+    def adaptive_mutation(self, genome, generation):
+        """Adaptive mutation rate decreases over time."""
+        cur_mut_rate = decaying_rate(generation, self.cfg["num_generations"],
+                                     self.cfg["initial_mutation_rate"], self.cfg["min_mutation_rate"])
+        return self.mutate(genome, cur_mut_rate)
+
+    def mutate(self, genome, rate):
+        """Copy of the genome with each gene flipped with probability rate."""
+        mutated = genome.copy()
+        for i in mutation_positions(len(mutated), rate, self.rng):
+            mutated.flip(i)
+        return mutated
+
+    def create_initial_population(self):
+        """Generates the initial population: randomized greedy fills toward the target, then random genomes."""
+        seeder = Seeder.from_config(self.values, self.target, self.cfg)
+        greedy = seeder.greedy_count(self.cfg["pop_size"])
+        return [SumGenome(seeder.bits(self.rng), self.values) for _ in range(greedy)] + [
+            SumGenome.random(self.values, self.cfg["target_fraction"], self.rng)
+            for _ in range(self.cfg["pop_size"] - greedy)]
+
+    def evolve_population(self, old_pop, generation):
+        """Generate a new population from the old one using elitism, selection, crossover, and mutation."""
+        with self.metrics.phase("evaluation"):
+            sorted_pop = sorted(old_pop, key=lambda g: self.fitness(g), reverse=True)
+        new_pop = first_distinct(sorted_pop, self.cfg["elitism_count"])
+
+        # Fill the rest of the population, one phase at a time
+        count = self.cfg["pop_size"] - len(new_pop)
+        with self.metrics.phase("selection"):
+            parents = [(self.tournament_selection(old_pop), self.tournament_selection(old_pop)) for _ in range(count)]
+        with self.metrics.phase("crossover"):
+            children = [self.crossover(p1, p2) for p1, p2 in parents]
+        with self.metrics.phase("mutation"):
+            children = [self.adaptive_mutation(child, generation) for child in children]
+        if self.local_search is not None:
+            with self.metrics.phase("local_search"):
+                self.metrics.count("local_moves", self.improve_children(children))
+        with self.metrics.phase("dedupe"):
+            # after local search, which can climb children onto an elite or onto each other
+            seen = {genome.key for genome in new_pop}
+            self.metrics.count("duplicates", make_distinct(children, seen, self.rng, self.cfg["dedupe_retries"]))
+
+        return new_pop + children
+
+    def improve_children(self, children):
+        """Hill-climbs the local_search_children children closest to the target in place; returns the moves made."""
+        closest = sorted(children, key=lambda g: abs(self.target - g.total))[:self.cfg["local_search_children"]]
+        moves = 0
+        for child in closest:
+            flips, _ = self.local_search.improve(genome_array(child, len(self.values)), self.target - child.total)
+            for i in flips:
+                child.flip(i)
+            moves += len(flips)
+        return moves
+
+    def ranked(self):
+        """The population, fittest first."""
+        return sorted(self.population, key=lambda g: self.fitness(g), reverse=True)
+
+    def reseed(self, fraction, keep):
+        """Replaces the worst `fraction` of the genomes other than the `keep` fittest with random ones."""
+        ranked = self.ranked()
+        count = round((len(ranked) - keep) * fraction)
+        self.population = ranked[:len(ranked) - count] + [
+            SumGenome.random(self.values, self.cfg["target_fraction"], self.rng) for _ in range(count)]
+
+    def hypermutate(self, rate, keep):
+        """Mutates every genome but the `keep` fittest at the given rate."""
+        ranked = self.ranked()
+        self.population = ranked[:keep] + [self.mutate(g, rate) for g in ranked[keep:]]
+
+    def start(self):
+        """Creates generation 0."""
+        self.population = self.create_initial_population()
+        self.generation = 0
+
+    def advance(self):
+        """Evolves one generation."""
+        self.population = self.evolve_population(self.population, self.generation)
+        self.generation += 1
+        if self.stagnation is not None:
+            self.stagnation.step(self)
+        self.metrics.end_generation(self.generation)
+
+    def best(self):
+        """Returns (genome, sum, fitness) of the fittest genome."""
+        best = max(self.population, key=lambda g: self.fitness(g))
+        return best, self.compute_sum(best), self.fitness(best)
+
+
+def make_engine(name, values, target, cfg, seed=None):
+    """Builds the engine selected by name ("list" or "matrix" GA, or the "pso" particle swarm)."""
+    if name == "matrix":
+        return MatrixGA(values, target, cfg, np.random.default_rng(seed))
+    if name == "pso":
+        return BinaryPSO(values, target, cfg, np.random.default_rng(seed))
+    if name == "list":
+        return KnapsackGA(values, target, cfg, random.Random(seed))
+    raise ValueError(f'Unknown engine: {name}')
+
+
+def run_engine(engine, on_generation=None, resume=False):
+    """
+    Runs an engine until it hits the target, reaches num_generations, or reports itself converged
+    (engines with an unreachable target, like the WeightedGA, have a `converged` attribute).
+
+    :param on_generation: Optional callback(generation, genome, best_sum, best_fitness), called every generation.
+    :param resume: Continue from the engine's current population (e.g. a restored checkpoint) instead of start().
+    :return: (genome, best_sum, generation) of the last generation's best.
+    """
+    if not resume:
+        engine.start()
+    while True:
+        best, best_sum, best_fitness = engine.best()
+        if on_generation is not None:
+            on_generation(engine.generation, best, best_sum, best_fitness)
+        if (best_sum == engine.target or engine.generation >= engine.cfg["num_generations"]
+                or getattr(engine, "converged", False)):
+            return best, best_sum, engine.generation
+        engine.advance()
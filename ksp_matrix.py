@@ -0,0 +1,205 @@
+import numpy as np
+
+from mutation import decaying_rate, mutation_positions_array
+from metrics import NULL_METRICS
+from local_search import LocalSearch
+from seeding import Seeder
+from stagnation import StagnationDetector
+
+
+def population_sums(population, values, chunk_rows=1024):
+    """Returns the selected value sum of every row of a 0/1 population matrix.
+
+    The product is done in float64 so it runs through BLAS, a block of rows at a time
+    to keep the temporary float copy of the population small.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    sums = np.empty(population.shape[0], dtype=np.float64)
+    for start in range(0, population.shape[0], chunk_rows):
+        stop = start + chunk_rows
+        sums[start:stop] = population[start:stop] @ values
+    return np.rint(sums).astype(np.int64)
+
+
+def fitness_from_sums(sums, target):
+    """Vectorized form of KnapsackGA.fitness, computed from genome sums."""
+    diff = np.abs(sums - target).astype(np.float64)
+    return np.where(diff > target * 0.5, 1 / (diff ** 2 + 1), 1 / (diff + 1))
+
+
+class MatrixGA:
+    """Genetic algorithm that keeps the whole population as one uint8 matrix (one row per genome)."""
+    def __init__(self, values, target, cfg, rng=None):
+        self.values = np.asarray(values, dtype=np.float64)  # BLAS needs float64, so int64 (mapped) values are copied
+        self.target = target
+        self.cfg = cfg
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.population = None
+        self.sums = None
+        self.fitnesses = None
+        self.generation = 0
+        self.evaluations = 0  # genome rows evaluated so far, for benchmarking
+        self.metrics = NULL_METRICS  # set to a metrics.Metrics to time the phases of each generation
+        self.stagnation = StagnationDetector.from_config(cfg)
+        self.local_search = LocalSearch.from_config(self.values, cfg)
+
+    @property
+    def num_items(self):
+        return self.values.shape[0]
+
+    def evaluate(self, genomes):
+        """Returns (sums, fitnesses) for a block of genome rows."""
+        self.evaluations += genomes.shape[0]
+        sums = population_sums(genomes, self.values, self.cfg["matrix_chunk_rows"])
+        return sums, fitness_from_sums(sums, self.target)
+
+    def random_rows(self, count):
+        return (self.rng.random((count, self.num_items)) < self.cfg["target_fraction"]).astype(np.uint8)
+
+    def create_initial_population(self):
+        """Generates the initial population matrix (randomized greedy fills, then random rows) and evaluates it."""
+        seeder = Seeder.from_config(self.values, self.target, self.cfg)
+        greedy = seeder.greedy_count(self.cfg["pop_size"])
+        self.population = np.concatenate([seeder.rows(greedy, self.rng),
+                                          self.random_rows(self.cfg["pop_size"] - greedy)])
+        self.sums, self.fitnesses = self.evaluate(self.population)
+
+    def replace_rows(self, rows, genomes):
+        """Overwrites the given population rows and evaluates them."""
+        self.population[rows] = genomes
+        self.sums[rows], self.fitnesses[rows] = self.evaluate(genomes)
+
+    def reseed(self, fraction, keep):
+        """Replaces the worst `fraction` of the rows other than the `keep` fittest with random ones."""
+        order = np.argsort(-self.fitnesses, kind="stable")
+        count = round((len(order) - keep) * fraction)
+        if count:
+            self.replace_rows(order[len(order) - count:], self.random_rows(count))
+
+    def hypermutate(self, rate, keep):
+        """Flips genes of every row but the `keep` fittest with probability rate."""
+        rows = np.argsort(-self.fitnesses, kind="stable")[keep:]
+        block = self.population[rows]
+        flat = block.reshape(-1)
+        flat[mutation_positions_array(flat.shape[0], rate, self.rng)] ^= 1
+        self.replace_rows(rows, block)
+
+    def tournament_selection(self, count):
+        """Returns `count` parent row indices, each the fittest of a random tournament."""
+        contenders = self.rng.integers(0, self.population.shape[0],
+                                       size=(count, self.cfg["tournament_size"]))
+        winners = np.argmax(self.fitnesses[contenders], axis=1)
+        return contenders[np.arange(count), winners]
+
+    def crossover(self, p1, p2):
+        """Uniform crossover of the rows p1[i] and p2[i], using one random bit per gene."""
+        count = len(p1)
+        random_bytes = self.rng.integers(0, 256, size=(count, (self.num_items + 7) // 8), dtype=np.uint8)
+        mask = np.unpackbits(random_bytes, axis=1, count=self.num_items).astype(bool)
+        return np.where(mask, self.population[p1], self.population[p2])
+
+    def adaptive_mutation(self, children, generation):
+        """Flips genes of the children in place at the same decaying rate as KnapsackGA.adaptive_mutation."""
+        cur_mut_rate = decaying_rate(generation, self.cfg["num_generations"],
+                                     self.cfg["initial_mutation_rate"], self.cfg["min_mutation_rate"])
+
+        # Geometric gaps between flipped genes over the whole block, instead of one random number per gene
+        flat = children.reshape(-1)
+        flat[mutation_positions_array(flat.shape[0], cur_mut_rate, self.rng)] ^= 1
+        return children
+
+    def distinct_elites(self, count):
+        """Row indices of the `count` fittest rows that differ from each other, and the packed keys of those rows."""
+        seen = set()
+        elites = []
+        for row in np.argsort(-self.fitnesses, kind="stable"):
+            if len(elites) == count:
+                break
+            key = np.packbits(self.population[row]).tobytes()
+            if key not in seen:
+                seen.add(key)
+                elites.append(row)
+        return np.array(elites, dtype=np.int64), seen
+
+    def make_distinct(self, children, seen):
+        """
+        Flips random genes of child rows that duplicate a key in `seen` or an earlier child until they are new,
+        at most dedupe_retries times per row. Returns the indices of the rows that were duplicates.
+        """
+        packed = np.packbits(children, axis=1)
+        duplicates = []
+        for i in range(children.shape[0]):
+            key = packed[i].tobytes()
+            if key in seen:
+                duplicates.append(i)
+                for _ in range(self.cfg["dedupe_retries"]):
+                    children[i, self.rng.integers(self.num_items)] ^= 1
+                    key = np.packbits(children[i]).tobytes()
+                    if key not in seen:
+                        break
+            seen.add(key)
+        return duplicates
+
+    def improve_children(self, children, sums, fitnesses):
+        """
+        Hill-climbs the local_search_children fittest child rows in place, updating their sums and fitnesses.
+        Returns the moves made.
+        """
+        count = min(self.cfg["local_search_children"], children.shape[0])
+        moves = 0
+        for row in np.argsort(-fitnesses, kind="stable")[:count]:
+            flips, residual = self.local_search.improve(children[row], self.target - sums[row])
+            for i in flips:
+                children[row, i] ^= 1
+            sums[row] = self.target - residual
+            moves += len(flips)
+        fitnesses[:] = fitness_from_sums(sums, self.target)
+        return moves
+
+    def evolve_population(self, generation):
+        """Replaces the population using elitism, tournament selection, crossover and mutation."""
+        order, seen = self.distinct_elites(self.cfg["elitism_count"])
+        count = self.cfg["pop_size"] - len(order)
+
+        with self.metrics.phase("selection"):
+            p1 = self.tournament_selection(count)
+            p2 = self.tournament_selection(count)
+        with self.metrics.phase("crossover"):
+            children = self.crossover(p1, p2)
+        with self.metrics.phase("mutation"):
+            children = self.adaptive_mutation(children, generation)
+        with self.metrics.phase("evaluation"):
+            child_sums, child_fitnesses = self.evaluate(children)
+        self.metrics.count("evaluations", count)
+        if self.local_search is not None:
+            with self.metrics.phase("local_search"):
+                self.metrics.count("local_moves", self.improve_children(children, child_sums, child_fitnesses))
+        with self.metrics.phase("dedupe"):
+            # after local search, which can climb children onto an elite or onto each other;
+            # only the rows it changes are evaluated again
+            rows = self.make_distinct(children, seen)
+            if rows:
+                child_sums[rows], child_fitnesses[rows] = self.evaluate(children[rows])
+        self.metrics.count("duplicates", len(rows))
+
+        self.population = np.concatenate([self.population[order], children])
+        self.sums = np.concatenate([self.sums[order], child_sums])
+        self.fitnesses = np.concatenate([self.fitnesses[order], child_fitnesses])
+
+    def start(self):
+        """Creates generation 0."""
+        self.create_initial_population()
+        self.generation = 0
+
+    def advance(self):
+        """Evolves one generation."""
+        self.evolve_population(self.generation)
+        self.generation += 1
+        if self.stagnation is not None:
+            self.stagnation.step(self)
+        self.metrics.end_generation(self.generation)
+
+    def best(self):
+        """Returns (genome, sum, fitness) of the fittest row."""
+        idx = int(np.argmax(self.fitnesses))
+        return self.population[idx].astype(bool), int(self.sums[idx]), float(self.fitnesses[idx])
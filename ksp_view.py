@@ -0,0 +1,222 @@
+import math
+import tkinter as tk
+
+import numpy as np
+
+from genomes import genome_array
+
+# Above this many items the apps switch from one rectangle per item to LargeItemView
+MAX_DRAWN_ITEMS = 2000
+# Cells at least this many pixels wide are drawn as real canvas items instead of raster pixels
+MATERIALIZE_PX = 24
+# Cells at least this many pixels wide also get their value written in them
+LABEL_PX = 48
+MAX_ZOOM_PX = 96
+
+BACKGROUND = (255, 255, 255)
+UNSELECTED = (221, 227, 238)
+SELECTED = (48, 96, 192)
+
+
+def _palette():
+    share = np.linspace(0, 1, 256)[:, None]
+    shades = np.asarray(UNSELECTED) * (1 - share) + np.asarray(SELECTED) * share
+    return np.vstack([shades, BACKGROUND]).round().astype(np.uint8)
+
+
+PALETTE = _palette()  # 256 shades from unselected to selected, then the background
+
+
+def _hex(rgb):
+    return '#{:02x}{:02x}{:02x}'.format(*rgb)
+
+
+class LargeItemView:
+    """
+    Shows the items of a large instance as a grid of cells, one per item, inside a fixed canvas region.
+
+    Zoomed out, the visible part of the grid is rendered into a single PhotoImage: when a screen pixel
+    covers several cells its shade is the fraction of them that are selected. Zoomed in far enough that a
+    cell is MATERIALIZE_PX wide, only the visible cells become canvas rectangles (and labels). Either way
+    the work per frame is bounded by the size of the region, not by the number of items.
+    Mouse wheel zooms around the pointer, dragging with the left button pans.
+    """
+    def __init__(self, canvas, values, x, y, width, height):
+        self.canvas = canvas
+        self.values = values
+        self.x, self.y = int(x), int(y)
+        self.width, self.height = max(int(width), 1), max(int(height), 1)
+        count = len(values)
+
+        # grid with roughly the region's aspect ratio, filled row by row
+        self.grid_cols = max(1, math.ceil(math.sqrt(count * self.width / self.height)))
+        self.grid_rows = max(1, math.ceil(count / self.grid_cols))
+        self.has_item = np.zeros(self.grid_rows * self.grid_cols, dtype=bool)
+        self.has_item[:count] = True
+        self.has_item = self.has_item.reshape(self.grid_rows, self.grid_cols)
+        self.selected = np.zeros(count, dtype=bool)
+
+        self.fit_scale = min(self.width / self.grid_cols, self.height / self.grid_rows)
+        self.scale = self.fit_scale  # pixels per cell
+        self.origin_x = 0.0  # grid coordinates (in cells) of the region's top-left corner
+        self.origin_y = 0.0
+
+        self.image = tk.PhotoImage(master=canvas, width=self.width, height=self.height)
+        self.image_id = canvas.create_image(self.x, self.y, image=self.image, anchor='nw')
+        self.cell_ids = {}  # item index -> rectangle id, while zoomed in
+        self.drag_from = None
+        self.bind()
+
+    # ---------------------------
+    # Interaction
+    # ---------------------------
+    def bind(self):
+        self.canvas.bind('<MouseWheel>', lambda e: self.on_wheel(e, 1 if e.delta > 0 else -1))
+        self.canvas.bind('<Button-4>', lambda e: self.on_wheel(e, 1))
+        self.canvas.bind('<Button-5>', lambda e: self.on_wheel(e, -1))
+        self.canvas.bind('<ButtonPress-1>', self.on_press)
+        self.canvas.bind('<B1-Motion>', self.on_drag)
+
+    def unbind(self):
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>', '<ButtonPress-1>', '<B1-Motion>'):
+            self.canvas.unbind(sequence)
+
+    def contains(self, px, py):
+        return self.x <= px < self.x + self.width and self.y <= py < self.y + self.height
+
+    def on_wheel(self, event, direction):
+        if self.contains(event.x, event.y):
+            self.zoom(1.25 if direction > 0 else 0.8, event.x - self.x, event.y - self.y)
+
+    def on_press(self, event):
+        self.drag_from = (event.x, event.y) if self.contains(event.x, event.y) else None
+
+    def on_drag(self, event):
+        if self.drag_from is not None:
+            self.pan(event.x - self.drag_from[0], event.y - self.drag_from[1])
+            self.drag_from = (event.x, event.y)
+
+    def zoom(self, factor, px, py):
+        """Zooms by factor, keeping the cell under region pixel (px, py) where it is."""
+        cell_x = self.origin_x + px / self.scale
+        cell_y = self.origin_y + py / self.scale
+        self.scale = min(max(self.scale * factor, self.fit_scale), max(MAX_ZOOM_PX, self.fit_scale))
+        self.origin_x = cell_x - px / self.scale
+        self.origin_y = cell_y - py / self.scale
+        self.clamp()
+        self.render()
+
+    def pan(self, dx, dy):
+        """Moves the view by (dx, dy) pixels."""
+        self.origin_x -= dx / self.scale
+        self.origin_y -= dy / self.scale
+        self.clamp()
+        self.render()
+
+    def clamp(self):
+        self.origin_x = min(max(self.origin_x, 0.0), max(self.grid_cols - self.width / self.scale, 0.0))
+        self.origin_y = min(max(self.origin_y, 0.0), max(self.grid_rows - self.height / self.scale, 0.0))
+
+    # ---------------------------
+    # Drawing
+    # ---------------------------
+    def show(self, genome=None):
+        """Displays which items the genome selects (none if genome is None)."""
+        if genome is None:
+            selected = np.zeros(len(self.values), dtype=bool)
+        else:
+            selected = genome_array(genome, len(self.values))
+        if self.cell_ids:
+            # zoomed in: only recolor the visible cells that changed
+            for i, rect_id in self.cell_ids.items():
+                if selected[i] != self.selected[i]:
+                    self.canvas.itemconfigure(rect_id, fill=_hex(SELECTED if selected[i] else UNSELECTED))
+            self.selected = selected
+        else:
+            self.selected = selected
+            self.render()
+
+    def visible_cells(self):
+        """(col0, row0, col1, row1) range of grid cells inside the region."""
+        c0 = int(self.origin_x)
+        r0 = int(self.origin_y)
+        c1 = min(self.grid_cols, math.ceil(self.origin_x + self.width / self.scale))
+        r1 = min(self.grid_rows, math.ceil(self.origin_y + self.height / self.scale))
+        return c0, r0, c1, r1
+
+    def render(self):
+        if self.scale >= MATERIALIZE_PX:
+            self.render_cells()
+        else:
+            self.clear_cells()
+            self.render_raster()
+
+    def clear_cells(self):
+        for rect_id in self.cell_ids.values():
+            self.canvas.delete(rect_id)
+        self.canvas.delete('view_label')
+        self.cell_ids = {}
+
+    def pixel_bins(self, origin, cells, pixels):
+        """Start cell (relative to int(origin)) of each output pixel along one axis, and how many pixels there are."""
+        out = min(pixels, max(1, math.ceil(cells * self.scale - (origin - int(origin)) * self.scale)))
+        starts = (origin - int(origin) + np.arange(out) / self.scale).astype(np.int64)
+        return np.minimum(starts, cells - 1), out
+
+    def render_raster(self):
+        """Renders the visible cells into the PhotoImage, shading each pixel by the selected share of its cells."""
+        c0, r0, c1, r1 = self.visible_cells()
+        count = len(self.values)
+        on = np.zeros(self.grid_rows * self.grid_cols, dtype=np.float32)
+        on[:count] = self.selected
+        on = on.reshape(self.grid_rows, self.grid_cols)[r0:r1, c0:c1]
+        present = self.has_item[r0:r1, c0:c1].astype(np.float32)
+
+        col_starts, out_w = self.pixel_bins(self.origin_x, c1 - c0, self.width)
+        row_starts, out_h = self.pixel_bins(self.origin_y, r1 - r0, self.height)
+        if self.scale < 1:
+            # several cells per pixel: sum them into one bin per pixel
+            on = np.add.reduceat(np.add.reduceat(on, col_starts, axis=1), row_starts, axis=0)
+            present = np.add.reduceat(np.add.reduceat(present, col_starts, axis=1), row_starts, axis=0)
+
+        # quantize the selected share to a palette index; index 256 is "no item here"
+        level = np.full(on.shape, 256, dtype=np.int16)
+        filled = present > 0
+        level[filled] = np.rint(on[filled] * 255 / present[filled])
+        if self.scale >= 1:
+            # a cell spans one or more pixels: repeat its palette index
+            level = level[row_starts][:, col_starts]
+        rgb = PALETTE[level]
+
+        header = f'P6 {out_w} {out_h} 255\n'.encode()
+        self.image.configure(width=out_w, height=out_h, data=header + rgb.tobytes(), format='PPM')
+        self.canvas.itemconfigure(self.image_id, state='normal')
+
+    def render_cells(self):
+        """Creates canvas rectangles (and labels, if there is room) for the visible cells only."""
+        self.clear_cells()
+        self.canvas.itemconfigure(self.image_id, state='hidden')
+        c0, r0, c1, r1 = self.visible_cells()
+        pad = max(1.0, self.scale * 0.1)
+        for r in range(r0, r1):
+            for c in range(c0, c1):
+                i = r * self.grid_cols + c
+                if i >= len(self.values):
+                    break
+                x = self.x + (c - self.origin_x) * self.scale
+                y = self.y + (r - self.origin_y) * self.scale
+                x0, y0 = max(x, self.x), max(y, self.y)
+                x1 = min(x + self.scale - pad, self.x + self.width)
+                y1 = min(y + self.scale - pad, self.y + self.height)
+                if x1 <= x0 or y1 <= y0:
+                    continue
+                fill = _hex(SELECTED if self.selected[i] else UNSELECTED)
+                self.cell_ids[i] = self.canvas.create_rectangle(x0, y0, x1, y1, fill=fill, outline='')
+                if self.scale >= LABEL_PX:
+                    self.canvas.create_text((x0 + x1) / 2, (y0 + y1) / 2, text=f'{self.values[i]}',
+                                            tags='view_label')
+
+    def destroy(self):
+        self.unbind()
+        self.clear_cells()
+        self.canvas.delete(self.image_id)
@@ -0,0 +1,92 @@
+"""
+Memetic local improvement for the subset-sum GAs: hill climbing on the residual target - sum.
+
+The included and excluded item values of a genome are kept as two sorted arrays, so the value that best
+closes the residual is found by binary search:
+    add    the excluded value nearest to the residual
+    drop   the included value nearest to minus the residual
+    swap   for every included value u, the excluded value nearest to residual + u (one vectorized searchsorted)
+The best of the three moves is applied while it shrinks |residual|, up to max_moves times. While the residual is
+at least the largest value, adding or dropping that value beats any swap, so the swap search is skipped.
+"""
+import numpy as np
+
+
+def nearest(sorted_values, x):
+    """Position in a non-empty sorted array of the value nearest to x."""
+    p = int(np.searchsorted(sorted_values, x))
+    if p == len(sorted_values) or (p > 0 and x - sorted_values[p - 1] <= sorted_values[p] - x):
+        return p - 1
+    return p
+
+
+class LocalSearch:
+    """Add/drop/swap hill climber over one set of item values, shared by every genome of a run."""
+    def __init__(self, values, max_moves=50):
+        self.values = np.rint(np.asarray(values, dtype=np.float64)).astype(np.int64)
+        self.order = np.argsort(self.values, kind="stable")
+        self.sorted_values = self.values[self.order]
+        self.max_value = int(self.sorted_values[-1]) if len(self.sorted_values) else 0
+        self.max_moves = max_moves
+
+    @classmethod
+    def from_config(cls, values, cfg):
+        """Search configured by the local_search_* keys of a ksp_core config, or None if local_search_children is 0."""
+        if not cfg.get("local_search_children"):
+            return None
+        return cls(values, cfg["local_search_moves"])
+
+    def improve(self, selected, residual):
+        """
+        Hill-climbs one genome.
+        :param selected: 0/1 (or bool) array with one entry per item.
+        :param residual: target minus the genome's sum.
+        :return: (flips, residual) - the item indices to flip, in order, and the residual after flipping them.
+        """
+        included = np.asarray(selected, dtype=bool)[self.order]
+        inc_values, inc_items = self.sorted_values[included], self.order[included]
+        exc_values, exc_items = self.sorted_values[~included], self.order[~included]
+        flips = []
+        for _ in range(self.max_moves):
+            if residual == 0:
+                break
+            best = abs(residual)
+            move = None
+            if len(exc_values):
+                q = nearest(exc_values, residual)
+                if abs(residual - exc_values[q]) < best:
+                    best, move = abs(residual - exc_values[q]), (None, q)
+            if len(inc_values):
+                p = nearest(inc_values, -residual)
+                if abs(residual + inc_values[p]) < best:
+                    best, move = abs(residual + inc_values[p]), (p, None)
+            if best and abs(residual) < self.max_value and len(inc_values) and len(exc_values):
+                wanted = residual + inc_values
+                q = np.searchsorted(exc_values, wanted)
+                below = np.clip(q - 1, 0, len(exc_values) - 1)
+                above = np.clip(q, 0, len(exc_values) - 1)
+                q = np.where(np.abs(wanted - exc_values[below]) <= np.abs(wanted - exc_values[above]), below, above)
+                errors = np.abs(wanted - exc_values[q])
+                p = int(np.argmin(errors))
+                if errors[p] < best:
+                    best, move = int(errors[p]), (p, int(q[p]))
+            if move is None:
+                break
+
+            drop, add = move
+            if drop is not None:
+                value, item = inc_values[drop], inc_items[drop]
+                inc_values, inc_items = np.delete(inc_values, drop), np.delete(inc_items, drop)
+            if add is not None:
+                added_value, added_item = exc_values[add], exc_items[add]
+                exc_values, exc_items = np.delete(exc_values, add), np.delete(exc_items, add)
+                p = np.searchsorted(inc_values, added_value)
+                inc_values, inc_items = np.insert(inc_values, p, added_value), np.insert(inc_items, p, added_item)
+                residual -= int(added_value)
+                flips.append(int(added_item))
+            if drop is not None:
+                q = np.searchsorted(exc_values, value)
+                exc_values, exc_items = np.insert(exc_values, q, value), np.insert(exc_items, q, item)
+                residual += int(value)
+                flips.append(int(item))
+        return flips, residual
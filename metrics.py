@@ -0,0 +1,131 @@
+import csv
+import json
+from collections import deque
+from time import perf_counter
+
+
+class _Phase:
+    """Reusable context manager adding the time spent inside it to one phase of a Metrics."""
+    __slots__ = ('metrics', 'name', 'started')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = perf_counter() - self.started
+        current = self.metrics.current
+        current[self.name] = current.get(self.name, 0.0) + elapsed
+
+
+class Metrics:
+    """
+    Per-phase wall-clock timers and counters for a solver loop.
+
+        with metrics.phase("selection"):
+            ...
+        metrics.count("evaluations", len(children))
+        metrics.end_generation(generation)
+
+    Each end_generation() closes a row of the rolling history (the last `history` generations, seconds per
+    phase plus counters) and adds it to the run totals.
+    """
+    def __init__(self, history=1000):
+        self.history = deque(maxlen=history)
+        self.current = {}
+        self.totals = {}
+        self.generations = 0
+        self._phases = {}
+
+    def phase(self, name):
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = _Phase(self, name)
+        return phase
+
+    def count(self, name, n=1):
+        self.current[name] = self.current.get(name, 0) + n
+
+    def end_generation(self, generation):
+        row = dict(self.current, generation=generation)
+        self.history.append(row)
+        for name, value in self.current.items():
+            self.totals[name] = self.totals.get(name, 0) + value
+        self.generations += 1
+        self.current = {}
+        return row
+
+    def last(self):
+        """The most recently closed generation row, or an empty dict."""
+        return self.history[-1] if self.history else {}
+
+    def phase_names(self):
+        return list(self._phases)
+
+    def summary(self):
+        """Run totals: total seconds, mean ms per generation and share of the timed time, per phase; counter totals."""
+        timed = sum(self.totals.get(name, 0.0) for name in self._phases) or 1.0
+        per_generation = max(self.generations, 1)
+        phases = {name: {"seconds": self.totals.get(name, 0.0),
+                         "ms_per_generation": self.totals.get(name, 0.0) * 1000 / per_generation,
+                         "share": self.totals.get(name, 0.0) / timed}
+                  for name in self._phases}
+        counters = {name: value for name, value in self.totals.items() if name not in self._phases}
+        return {"generations": self.generations, "phases": phases, "counters": counters}
+
+    def format_last(self):
+        """One-line ms breakdown of the last generation, for console output and overlays."""
+        row = self.last()
+        parts = [f'{name} {row[name] * 1000:.2f}' for name in self._phases if name in row]
+        return f'gen {row.get("generation", "-")} ms: ' + ' | '.join(parts)
+
+    def to_csv(self, path):
+        """Writes the rolling history, one row per generation, phases in seconds."""
+        columns = ['generation'] + sorted({key for row in self.history for key in row} - {'generation'})
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(self.history)
+
+    def to_json(self, path):
+        with open(path, 'w') as f:
+            json.dump({"summary": self.summary(), "history": list(self.history)}, f, indent=1)
+
+    def export(self, path):
+        """Writes CSV if path ends in .csv, JSON otherwise."""
+        if path.endswith('.csv'):
+            self.to_csv(path)
+        else:
+            self.to_json(path)
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+
+class NullMetrics:
+    """Metrics stand-in that records nothing; the default for every solver, so instrumentation costs ~nothing."""
+    _phase = _NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+    def count(self, name, n=1):
+        pass
+
+    def end_generation(self, generation):
+        return {}
+
+
+NULL_METRICS = NullMetrics()
@@ -0,0 +1,50 @@
+import math
+import random
+
+import numpy as np
+
+
+def decaying_rate(generation, max_generations, initial_rate, min_rate=0.0):
+    """Mutation rate falling linearly from initial_rate to 0 over max_generations, floored at min_rate."""
+    return max(min_rate, initial_rate * (1 - generation / max_generations))
+
+
+def mutation_positions(length, rate, rng=random):
+    """
+    Yields each index in 0..length-1 independently with probability rate, lowest first.
+
+    Instead of one random number per gene, the gap to the next mutated gene is drawn from a geometric
+    distribution, so the cost is proportional to the number of mutations rather than to length.
+    """
+    if rate <= 0:
+        return
+    if rate >= 1:
+        yield from range(length)
+        return
+    log_keep = math.log1p(-rate)
+    i = -1
+    while True:
+        # number of untouched genes before the next mutation; 1 - random() is in (0, 1]
+        i += 1 + int(math.log(1.0 - rng.random()) / log_keep)
+        if i >= length:
+            return
+        yield i
+
+
+def mutation_positions_array(length, rate, rng=None):
+    """NumPy form of mutation_positions: sorted int64 array of mutated indices, drawn in vectorized batches."""
+    rng = rng if rng is not None else np.random.default_rng()
+    if rate <= 0 or length <= 0:
+        return np.empty(0, dtype=np.int64)
+    if rate >= 1:
+        return np.arange(length, dtype=np.int64)
+    # enough gaps to cover length most of the time; top up in the rare case they fall short
+    batch = int(length * rate + 4 * math.sqrt(length * rate) + 16)
+    chunks = []
+    last = -1
+    while last < length:
+        positions = last + np.cumsum(rng.geometric(rate, size=batch))
+        chunks.append(positions)
+        last = int(positions[-1])
+    positions = np.concatenate(chunks)
+    return positions[positions < length]
@@ -0,0 +1,102 @@
+"""
+On-demand profiling of a window of solver generations.
+
+    profiler = Profiler('profiles')
+    profiler.request(50, 'ksp-matrix')   # e.g. from a menu command, any thread
+    ...
+    profiler.tick()                      # once per generation, from the solver loop
+
+The tick after a request starts cProfile and tracemalloc; the Nth tick after that stops them and writes
+three reports into the directory:
+    <label>-<time>.prof        raw cProfile stats (pstats / snakeviz)
+    <label>-<time>.txt         functions sorted by cumulative and by own time
+    <label>-<time>-alloc.txt   source lines holding the most memory at the end of the window, and the peak
+While nothing is requested or running, tick() only tests the two counters `remaining` and `pending`.
+cProfile only sees the thread that enabled it, so every tick() of a run must come from the thread that
+runs its generations.
+"""
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+
+
+class Profiler:
+    def __init__(self, directory='profiles', top=40):
+        self.directory = directory
+        self.top = top
+        self.pending = 0  # generations requested but not started yet
+        self.remaining = 0  # generations left in the running window
+        self.label = 'run'
+        self.profile = None
+        self.started_tracemalloc = False
+        self.reports = []  # paths written by the last finished window
+
+    @property
+    def active(self):
+        return self.profile is not None
+
+    def request(self, generations, label='run'):
+        """Profiles the next `generations` generations, starting at the next tick()."""
+        self.label = label
+        self.pending = max(int(generations), 0)
+
+    def tick(self):
+        """Marks the end of a generation: counts down the running window, or starts a requested one."""
+        if self.remaining:
+            self.remaining -= 1
+            if not self.remaining:
+                self.stop()
+        elif self.pending:
+            self.start(self.pending)
+
+    def start(self, generations):
+        self.pending = 0
+        self.remaining = generations
+        # keep an already running trace (e.g. benchmark.py's) instead of restarting it
+        self.started_tracemalloc = not tracemalloc.is_tracing()
+        if self.started_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        """Ends the running window early (e.g. the run finished first) and writes its reports; returns their paths."""
+        if not self.active:
+            return []
+        self.profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+        profile, self.profile, self.remaining = self.profile, None, 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f'{self.label}-{time.strftime("%Y%m%d-%H%M%S")}')
+        profile.dump_stats(f'{base}.prof')
+        with open(f'{base}.txt', 'w') as f:
+            f.write(self.format_stats(profile))
+        with open(f'{base}-alloc.txt', 'w') as f:
+            f.write(self.format_allocations(snapshot, current, peak))
+        self.reports = [f'{base}.prof', f'{base}.txt', f'{base}-alloc.txt']
+        print(f'Profile written to {base}.*')
+        return self.reports
+
+    def format_stats(self, profile):
+        out = io.StringIO()
+        stats = pstats.Stats(profile, stream=out).strip_dirs()
+        stats.sort_stats('cumulative').print_stats(self.top)
+        stats.sort_stats('tottime').print_stats(self.top)
+        return out.getvalue()
+
+    def format_allocations(self, snapshot, current, peak):
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                           tracemalloc.Filter(False, __file__)])
+        lines = [f'traced memory: current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB', '']
+        for stat in snapshot.statistics('lineno')[:self.top]:
+            frame = stat.traceback[0]
+            lines.append(f'{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}')
+        return '\n'.join(lines) + '\n'
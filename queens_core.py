@@ -0,0 +1,108 @@
+import random
+
+from metrics import NULL_METRICS
+
+
+def is_safe(board, row, col):
+    for i in range(row):
+        if board[i] == col or abs(board[i] - col) == row - i:
+            return False
+    return True
+
+
+def backtracking_helper(board, row, on_try=None):
+    if row == len(board):
+        return True
+    for col in range(len(board)):
+        if is_safe(board, row, col):
+            board[row] = col
+            if on_try is not None:
+                on_try(row, col)
+            if backtracking_helper(board, row + 1, on_try):
+                return True
+            board[row] = -1
+    return False
+
+
+def solve_backtracking(board_size, on_try=None):
+    """
+    Places board_size queens row by row, backtracking on conflicts.
+
+    :param on_try: Optional callback(row, col), called for every placement tried.
+    :return: The board (queen column per row), or None if there is no solution.
+    """
+    board = [-1] * board_size
+    if backtracking_helper(board, 0, on_try):
+        return board
+    return None
+
+
+class QueensGA:
+    """Permutation GA for N-Queens; fitness counts non-attacking pairs."""
+    def __init__(self, board_size=8, population_size=100, mutation_rate=0.1, generations=1000, rng=None):
+        self.board_size = board_size
+        self.population_size = population_size
+        self.mutation_rate = mutation_rate
+        self.generations = generations
+        self.rng = rng if rng is not None else random.Random()
+        self.evaluations = 0  # fitness evaluations so far, for benchmarking
+        self.metrics = NULL_METRICS  # set to a metrics.Metrics to time the phases of each generation
+
+    @property
+    def max_fitness(self):
+        return self.board_size * (self.board_size - 1) // 2
+
+    def random_chromosome(self):
+        return self.rng.sample(range(self.board_size), self.board_size)
+
+    def fitness(self, chromosome):
+        self.evaluations += 1
+        return sum(1 for i in range(len(chromosome))
+                   for j in range(i + 1, len(chromosome))
+                   if chromosome[i] != chromosome[j] and
+                   abs(chromosome[i] - chromosome[j]) != j - i)
+
+    def crossover(self, parent1, parent2):
+        cross_point = self.rng.randint(1, self.board_size - 1)
+        child = parent1[:cross_point]
+        child.extend(gene for gene in parent2 if gene not in child)
+        return child
+
+    def mutate(self, chromosome):
+        i, j = self.rng.sample(range(self.board_size), 2)
+        chromosome[i], chromosome[j] = chromosome[j], chromosome[i]
+        return chromosome
+
+    def run(self, on_generation=None):
+        """
+        Evolves until a solution is found or the generation budget runs out.
+
+        :param on_generation: Optional callback(generation, best, best_fitness), called every generation.
+        :return: (best chromosome, its fitness, generations evaluated)
+        """
+        population = [self.random_chromosome() for _ in range(self.population_size)]
+
+        for generation in range(self.generations):
+            with self.metrics.phase("evaluation"):
+                population = sorted(population, key=lambda x: self.fitness(x), reverse=True)
+                best_fitness = self.fitness(population[0])
+            if on_generation is not None:
+                on_generation(generation, population[0], best_fitness)
+
+            if best_fitness == self.max_fitness:
+                return population[0], best_fitness, generation + 1
+
+            with self.metrics.phase("breeding"):
+                next_generation = population[:10]
+                for _ in range(self.population_size - 10):
+                    parent1, parent2 = self.rng.sample(population[:50], 2)
+                    child = self.crossover(parent1, parent2)
+                    if self.rng.random() < self.mutation_rate:
+                        child = self.mutate(child)
+                    next_generation.append(child)
+
+            population = next_generation
+            self.metrics.end_generation(generation)
+
+        population = sorted(population, key=lambda x: self.fitness(x), reverse=True)
+        return population[0], self.fitness(population[0]), self.generations
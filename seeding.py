@@ -0,0 +1,67 @@
+"""
+Initial populations for the subset-sum GAs: part randomized greedy fills toward the target, part random fills.
+
+A randomized greedy fill (GRASP-style construction) walks the items from the largest value down and takes
+each one that still fits under the target. The walk order sorts value * (1 + alpha * u) with a fresh uniform u per
+item, so alpha = 0 is the plain greedy fill and larger alphas mix smaller items in earlier. Every fill lands just
+below the target. With alpha > 0 the fills usually differ, but nothing deduplicates them, and at alpha = 0 they are
+all the same genome. The remaining genomes are the usual independent coin flips, which keep the population diverse.
+"""
+import numpy as np
+
+
+def greedy_fill(values, order, target):
+    """
+    Items taken by walking `order` and taking every item whose value still fits under the target.
+    :return: bool array with one entry per item.
+    """
+    taken = np.zeros(len(values), dtype=bool)
+    residual = target
+    remaining = np.asarray(order)
+    ordered_values = values[remaining]
+    # each pass takes the longest run of fitting items whose total fits, then drops the items that no longer fit,
+    # which takes exactly what the item-by-item walk would in a few vectorized passes
+    while remaining.size:
+        fits = ordered_values <= residual
+        remaining, ordered_values = remaining[fits], ordered_values[fits]
+        if not remaining.size:
+            break
+        totals = np.cumsum(ordered_values)
+        count = int(np.searchsorted(totals, residual, side='right'))
+        taken[remaining[:count]] = True
+        residual -= int(totals[count - 1])
+        remaining, ordered_values = remaining[count:], ordered_values[count:]
+    return taken
+
+
+class Seeder:
+    """Builds greedy_fraction of an initial population with randomized greedy fills of the given values."""
+    def __init__(self, values, target, greedy_fraction=0.5, alpha=0.3):
+        self.values = np.rint(np.asarray(values, dtype=np.float64)).astype(np.int64)
+        self.target = int(target)
+        self.greedy_fraction = greedy_fraction
+        self.alpha = alpha
+
+    @classmethod
+    def from_config(cls, values, target, cfg):
+        return cls(values, target, cfg["seed_greedy_fraction"], cfg["seed_alpha"])
+
+    def greedy_count(self, size):
+        """How many of a population of `size` genomes are greedy fills."""
+        return min(size, round(size * self.greedy_fraction))
+
+    def fill(self, noise):
+        """Randomized greedy fill for one array of uniform noise (one entry per item)."""
+        order = np.argsort(-self.values * (1 + self.alpha * noise), kind="stable")
+        return greedy_fill(self.values, order, self.target)
+
+    def bits(self, rng):
+        """A randomized greedy fill as genome bits, drawing the noise from a random.Random."""
+        noise = np.array([rng.random() for _ in range(len(self.values))])
+        packed = np.packbits(self.fill(noise), bitorder='little')
+        return int.from_bytes(packed.tobytes(), 'little')
+
+    def rows(self, count, rng):
+        """`count` randomized greedy fills as uint8 rows, drawing the noise from a NumPy Generator."""
+        noise = rng.random((count, len(self.values)))
+        return np.array([self.fill(row) for row in noise], dtype=np.uint8).reshape(count, len(self.values))
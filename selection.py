@@ -0,0 +1,98 @@
+import bisect
+import itertools
+import random
+
+import numpy as np
+
+
+def _check_weights(weights):
+    weights = [float(w) for w in weights]
+    if not weights:
+        raise ValueError('Cannot sample from an empty population')
+    if min(weights) < 0:
+        raise ValueError('Selection weights must be non-negative')
+    if sum(weights) <= 0:
+        raise ValueError('Selection weights must not all be zero')
+    return weights
+
+
+class AliasTable:
+    """
+    Vose's alias method: O(n) to build from the weights, then O(1) per draw.
+
+    Build one per generation and draw every parent from it. Index i is drawn with probability weights[i] / sum(weights).
+    """
+    def __init__(self, weights):
+        weights = _check_weights(weights)
+        n = len(weights)
+        total = sum(weights)
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] += scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # whatever is left is 1.0 up to rounding error; prob stays 1.0 for those
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.prob)
+
+    def sample(self, rng=random):
+        """Draws one index using a random.Random-like rng."""
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+    def sample_many(self, count, rng=None):
+        """Draws count indices at once with a NumPy Generator, returned as an int array."""
+        rng = rng if rng is not None else np.random.default_rng()
+        if self._arrays is None:
+            self._arrays = np.asarray(self.prob), np.asarray(self.alias)
+        prob, alias = self._arrays
+        idx = rng.integers(0, len(prob), size=count)
+        return np.where(rng.random(count) < prob[idx], idx, alias[idx])
+
+
+class CumulativeSampler:
+    """
+    Prefix sums of the weights, searched with bisect: O(n) to build, O(log n) per draw.
+
+    Cheaper to build than an AliasTable, and also supports stochastic universal sampling.
+    """
+    def __init__(self, weights):
+        weights = _check_weights(weights)
+        self.cumulative = list(itertools.accumulate(weights))
+        self.total = self.cumulative[-1]
+        self._array = None
+
+    def __len__(self):
+        return len(self.cumulative)
+
+    def index_of(self, point):
+        """Index whose weight interval contains point, for 0 <= point < total."""
+        return min(bisect.bisect_right(self.cumulative, point), len(self.cumulative) - 1)
+
+    def sample(self, rng=random):
+        """Draws one index using a random.Random-like rng."""
+        return self.index_of(rng.random() * self.total)
+
+    def sample_many(self, count, rng=None):
+        """Draws count indices at once with a NumPy Generator, returned as an int array."""
+        rng = rng if rng is not None else np.random.default_rng()
+        if self._array is None:
+            self._array = np.asarray(self.cumulative)
+        idx = np.searchsorted(self._array, rng.random(count) * self.total, side='right')
+        return np.minimum(idx, len(self._array) - 1)
+
+    def universal(self, count, rng=random):
+        """Stochastic universal sampling: count evenly spaced pointers with one random offset, as a list of indices."""
+        spacing = self.total / count
+        start = rng.uniform(0, spacing)
+        return [self.index_of(start + k * spacing) for k in range(count)]
@@ -0,0 +1,35 @@
+import threading
+
+
+class LatestSnapshot:
+    """
+    Single-slot, latest-wins buffer between a solver thread and the UI.
+
+    The solver publishes as often as it likes; each publish overwrites whatever the UI has not picked up yet,
+    so the UI only ever draws the newest state and never queues up a backlog of frames.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.published = 0
+        self.closed = False
+
+    def publish(self, snapshot):
+        with self.lock:
+            self.snapshot = snapshot
+            self.published += 1
+
+    def take(self):
+        """Returns the newest unread snapshot (clearing the slot), or None if nothing new was published."""
+        with self.lock:
+            snapshot, self.snapshot = self.snapshot, None
+            return snapshot
+
+    def close(self):
+        """Marks the producer as finished; the UI stops polling once the last snapshot has been taken."""
+        with self.lock:
+            self.closed = True
+
+    def drained(self):
+        with self.lock:
+            return self.closed and self.snapshot is None
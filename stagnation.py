@@ -0,0 +1,135 @@
+"""
+Stagnation detection for the GA engines, and the escape actions it triggers.
+
+Every generation the detector tracks how long the best distance to the target has not improved. Once that
+plateau is `grace` generations long it also measures how diverse the population still is (mean per-gene
+entropy, from the share of genomes setting each gene), so a population that is still improving costs
+nothing to watch. When the plateau reaches `patience` generations, or the entropy falls below
+`min_entropy`, it applies an action to the engine, always keeping its `keep` best genomes:
+    hypermutate   mutate every other genome at hypermutation_rate
+    reseed        replace the worst reseed_fraction of the other genomes with random ones
+    restart       replace all other genomes with random ones
+    escalate      hypermutate, then reseed, then restart, while the triggers bring no improvement
+
+Engines supporting it implement hypermutate(rate, keep) and reseed(fraction, keep), and call
+self.stagnation.step(self) at the end of advance().
+"""
+import numpy as np
+
+from genomes import population_matrix
+
+ACTIONS = ("hypermutate", "reseed", "restart", "escalate")
+ESCALATION = ("hypermutate", "reseed", "restart")
+
+
+def gene_frequencies(population, length):
+    """Share of the population setting each gene."""
+    return population_matrix(population, length).mean(axis=0)
+
+
+def mean_entropy(frequencies):
+    """Mean binary entropy per gene, in bits: 1 for a 50/50 gene, 0 for a gene every genome agrees on."""
+    p = np.clip(frequencies, 1e-12, 1 - 1e-12)
+    return float(np.mean(-(p * np.log2(p) + (1 - p) * np.log2(1 - p))))
+
+
+def mean_pairwise_hamming(frequencies, size):
+    """Mean Hamming distance between two distinct genomes, from the gene frequencies (no pairwise loop)."""
+    if size < 2:
+        return 0.0
+    return float(np.sum(2 * frequencies * (1 - frequencies)) * size / (size - 1))
+
+
+class StagnationDetector:
+    def __init__(self, action="escalate", patience=50, min_entropy=0.02, reseed_fraction=0.5,
+                 hypermutation_rate=0.2, keep=2, grace=10):
+        if action not in ACTIONS:
+            raise ValueError(f'Unknown stagnation action: {action}')
+        self.action = action
+        self.patience = patience
+        self.min_entropy = min_entropy
+        self.reseed_fraction = reseed_fraction
+        self.hypermutation_rate = hypermutation_rate
+        self.keep = max(keep, 1)
+        self.grace = grace  # plateau length, and generations since the last action, before diversity is checked
+        self.best_error = None
+        self.plateau = 0  # generations since the best distance to the target improved
+        self.since_action = 0
+        self.level = 0  # position in ESCALATION
+        self.entropy = 1.0
+        self.hamming = 0.0
+        self.events = []  # (generation, action, reason)
+
+    @classmethod
+    def from_config(cls, cfg):
+        """Detector configured by the stagnation_* keys of a ksp_core config, or None if stagnation_action is off."""
+        if not cfg.get("stagnation_action"):
+            return None
+        return cls(cfg["stagnation_action"], cfg["stagnation_patience"], cfg["stagnation_min_entropy"],
+                   cfg["reseed_fraction"], cfg["hypermutation_rate"], cfg["elitism_count"])
+
+    def observe(self, engine):
+        """Updates plateau and diversity from the engine's current generation; returns the trigger reason or None."""
+        _, best_sum, _ = engine.best()
+        error = abs(best_sum - engine.target)
+        if self.best_error is None or error < self.best_error:
+            self.best_error = error
+            self.plateau = 0
+            self.level = 0
+        else:
+            self.plateau += 1
+        self.since_action += 1
+
+        if error == 0:
+            return None
+        if self.plateau >= self.patience:
+            return f'no improvement for {self.plateau} generations'
+        if self.plateau >= self.grace and self.since_action >= self.grace:
+            self.measure_diversity(engine)
+            if self.entropy < self.min_entropy:
+                return f'gene entropy {self.entropy:.4f}'
+        return None
+
+    def measure_diversity(self, engine):
+        frequencies = gene_frequencies(engine.population, len(engine.values))
+        self.entropy = mean_entropy(frequencies)
+        self.hamming = mean_pairwise_hamming(frequencies, len(engine.population))
+
+    def step(self, engine):
+        """Observes the engine and applies the configured action if stagnation is detected; returns it or None."""
+        reason = self.observe(engine)
+        if reason is None:
+            return None
+        action = self.action
+        if action == "escalate":
+            action = ESCALATION[min(self.level, len(ESCALATION) - 1)]
+            self.level += 1
+        self.apply(engine, action)
+        self.events.append((engine.generation, action, reason))
+        engine.metrics.count(action)
+        self.plateau = 0
+        self.since_action = 0
+        return action
+
+    def event_at(self, generation):
+        """The (generation, action, reason) applied at the given generation, or None."""
+        if self.events and self.events[-1][0] == generation:
+            return self.events[-1]
+        return None
+
+    def apply(self, engine, action):
+        if action == "hypermutate":
+            engine.hypermutate(self.hypermutation_rate, self.keep)
+        elif action == "reseed":
+            engine.reseed(self.reseed_fraction, self.keep)
+        else:
+            engine.reseed(1.0, self.keep)
+
+    def state(self):
+        """Counters needed to continue detection after a checkpoint, as ints."""
+        best_error = -1 if self.best_error is None else self.best_error
+        return [best_error, self.plateau, self.since_action, self.level]
+
+    def restore(self, state):
+        best_error, self.plateau, self.since_action, self.level = (int(v) for v in state)
+        self.best_error = None if best_error < 0 else best_error
@@ -0,0 +1,227 @@
+import hashlib
+import os
+import time
+from bisect import bisect_left
+
+import numpy as np
+
+# The bitset DP keeps one reachable-sum snapshot per item for backtracking,
+# i.e. num_items * (sum(values) + 1) bits. Above this we switch to meet-in-the-middle.
+MAX_BITSET_CELLS = 1 << 31
+# Meet-in-the-middle enumerates 2^(n/2) sums per half
+MAX_MITM_ITEMS = 40
+# The reachable-sum index stores an int32 predecessor per possible sum
+MAX_INDEX_SUMS = 1 << 28
+# Building it sweeps the reach array once per item, i.e. num_items * (sum(values) + 1) cells
+MAX_INDEX_CELLS = 1 << 31
+
+
+class ExactResult:
+    """Subset found by an exact solver, with the time it took."""
+    def __init__(self, indices, total, target, method, elapsed):
+        self.indices = indices
+        self.total = total
+        self.target = target
+        self.method = method
+        self.elapsed = elapsed
+
+    def genome(self, num_items):
+        """The solution as a list of bools, one per item."""
+        genome = [False] * num_items
+        for i in self.indices:
+            genome[i] = True
+        return genome
+
+    def __repr__(self):
+        return (f'ExactResult({self.method}: sum {self.total} for target {self.target}, '
+                f'{len(self.indices)} items, {self.elapsed * 1000:.2f} ms)')
+
+
+def nearest_reachable(reach, target):
+    """Closest set bit of the `reach` bitset to `target` (ties go to the lower sum)."""
+    target = max(target, 0)  # no sum lies below 0, and a negative shift count would raise
+    below = reach & ((1 << (target + 1)) - 1)
+    down = below.bit_length() - 1 if below else None
+    above = reach >> target
+    up = target + (above & -above).bit_length() - 1 if above else None
+    if down is None:
+        return up
+    if up is None or target - down <= up - target:
+        return down
+    return up
+
+
+def bitset_subset_sum(values, target):
+    """
+    Subset of values with the sum closest to target, using a big-integer bitset DP.
+
+    Bit s of `reach` is set when some subset of the items seen so far sums to s, so adding
+    an item of value v is a single shift-or. The snapshot taken before each item tells
+    the backtracking pass whether a sum was already reachable without that item.
+    :return: (indices, total)
+    """
+    reach = 1
+    snapshots = []
+    for v in values:
+        snapshots.append(reach)
+        reach |= reach << v
+
+    total = nearest_reachable(reach, target)
+    indices = []
+    remaining = total
+    for i in range(len(values) - 1, -1, -1):
+        if not (snapshots[i] >> remaining) & 1:
+            indices.append(i)
+            remaining -= values[i]
+    indices.reverse()
+    return indices, total
+
+
+def _half_sums(values, offset):
+    """All 2^len(values) subset sums with the bitmask (over item indices) that produces each."""
+    sums = [0]
+    masks = [0]
+    for i, v in enumerate(values):
+        bit = 1 << (i + offset)
+        sums += [s + v for s in sums]
+        masks += [m | bit for m in masks]
+    return sums, masks
+
+
+def meet_in_the_middle(values, target):
+    """
+    Subset of values with the sum closest to target, by splitting the items in two halves,
+    enumerating the subset sums of each and pairing them up with a binary search.
+    :return: (indices, total)
+    """
+    half = len(values) // 2
+    left_sums, left_masks = _half_sums(values[:half], 0)
+    right_sums, right_masks = _half_sums(values[half:], half)
+    order = sorted(range(len(right_sums)), key=right_sums.__getitem__)
+    right_sums = [right_sums[k] for k in order]
+    right_masks = [right_masks[k] for k in order]
+
+    best_total, best_mask = None, 0
+    for s, mask in zip(left_sums, left_masks):
+        j = bisect_left(right_sums, target - s)
+        for k in (j - 1, j):
+            if 0 <= k < len(right_sums):
+                total = s + right_sums[k]
+                if best_total is None or abs(total - target) < abs(best_total - target):
+                    best_total, best_mask = total, mask | right_masks[k]
+        if best_total == target:
+            break
+
+    indices = [i for i in range(len(values)) if (best_mask >> i) & 1]
+    return indices, best_total
+
+
+def solve_exact(values, target):
+    """
+    Solves the subset-sum target exactly (or returns the nearest reachable sum),
+    picking the bitset DP when it fits in memory and meet-in-the-middle otherwise.
+    :return: ExactResult
+    """
+    start = time.perf_counter()
+    values = [int(v) for v in values]  # big-integer shifts need Python ints, not NumPy scalars
+    target = int(target)
+    if len(values) * (sum(values) + 1) <= MAX_BITSET_CELLS:
+        method = 'bitset'
+        indices, total = bitset_subset_sum(values, target)
+    elif len(values) <= MAX_MITM_ITEMS:
+        method = 'meet-in-the-middle'
+        indices, total = meet_in_the_middle(values, target)
+    else:
+        raise ValueError(f'{len(values)} items summing to {sum(values)} is too large for an exact solve')
+    return ExactResult(indices, total, target, method, time.perf_counter() - start)
+
+
+class ReachableSumIndex:
+    """
+    Every reachable subset sum of one item set, built once and then queried for any target.
+
+    predecessor[s] is the index of the item whose addition first made s reachable (-1 when
+    s is unreachable). Since s - values[predecessor[s]] was reachable using earlier items only,
+    following the chain from any reachable sum down to 0 lists a valid subset in O(n).
+    """
+    def __init__(self, values, predecessor):
+        self.values = np.asarray(values, dtype=np.int64)
+        self.predecessor = predecessor
+        reachable = predecessor >= 0
+        reachable[0] = True
+        self.reachable = np.flatnonzero(reachable)
+
+    @classmethod
+    def build(cls, values):
+        values = np.asarray(values, dtype=np.int64)
+        size = int(values.sum()) + 1
+        if size > MAX_INDEX_SUMS:
+            raise ValueError(f'{size} possible sums is too large for a reachable-sum index')
+        if len(values) * size > MAX_INDEX_CELLS:
+            raise ValueError(f'{len(values)} items summing to {size - 1} is too large for a reachable-sum index')
+
+        reach = np.zeros(size, dtype=bool)
+        reach[0] = True
+        predecessor = np.full(size, -1, dtype=np.int32)
+        prefix = 0  # nothing above the sum of the items seen so far is reachable yet
+        for i, v in enumerate(values.tolist()):
+            if v <= 0:
+                continue
+            new = np.flatnonzero(reach[:prefix + 1] & ~reach[v:prefix + v + 1]) + v
+            predecessor[new] = i
+            reach[new] = True
+            prefix += v
+        return cls(values, predecessor)
+
+    @classmethod
+    def cached(cls, values, directory):
+        """Loads the index for these values from `directory`, building and saving it on a miss."""
+        values = np.asarray(values, dtype=np.int64)
+        digest = hashlib.sha1(values.tobytes()).hexdigest()[:16]
+        path = os.path.join(directory, f'sums_{digest}.npz')
+        if os.path.exists(path):
+            return cls.load(path, values)
+        index = cls.build(values)
+        os.makedirs(directory, exist_ok=True)
+        index.save(path)
+        return index
+
+    def save(self, path):
+        np.savez_compressed(path, values=self.values, predecessor=self.predecessor)
+
+    @classmethod
+    def load(cls, path, values=None):
+        with np.load(path) as data:
+            stored_values = data['values']
+            predecessor = data['predecessor']
+        if values is not None and not np.array_equal(stored_values, values):
+            raise ValueError(f'{path} was built for a different item set')
+        return cls(stored_values, predecessor)
+
+    def nearest(self, target):
+        """Reachable sum closest to target (ties go to the lower sum), by binary search."""
+        k = int(np.searchsorted(self.reachable, target))
+        if k == len(self.reachable):
+            return int(self.reachable[-1])
+        up = int(self.reachable[k])
+        if up == target or k == 0:
+            return up
+        down = int(self.reachable[k - 1])
+        return down if target - down <= up - target else up
+
+    def subset(self, total):
+        """Indices of items summing to the reachable sum `total`."""
+        indices = []
+        while total > 0:
+            i = int(self.predecessor[total])
+            indices.append(i)
+            total -= int(self.values[i])
+        indices.reverse()
+        return indices
+
+    def solve(self, target):
+        """Exact answer for target, or its nearest reachable sum, as an ExactResult."""
+        start = time.perf_counter()
+        total = self.nearest(target)
+        indices = self.subset(total)
+        return ExactResult(indices, total, target, 'index', time.perf_counter() - start)
@@ -0,0 +1,274 @@
+"""
+Hyperparameter sweep over the ksp_core CONFIG: many seeded headless GA runs in a process pool,
+aggregated into a table ranked by solve rate, then distance to the target, then time to target.
+
+The search space is a JSON object mapping CONFIG keys to a list of choices, or (random search only) to
+a range {"min": 0.01, "max": 0.3} with optional "log": true and "int": true. Every configuration is run
+on the same seeds (same instances, same engine seeds), so they are compared on equal terms.
+
+With --halving, configurations are first run for --min-generations generations; only the best 1/eta go
+on to a budget eta times larger, and so on up to num_generations. Each run continues from a checkpoint of
+where its previous rung stopped, so a survivor's results are exactly those of one uninterrupted run.
+
+Examples:
+    python sweep.py --grid '{"pop_size": [30, 50, 100], "tournament_size": [2, 3, 5]}' --seeds 8
+    python sweep.py --random 40 --space space.json --halving --eta 3 --min-generations 30
+    python sweep.py --grid grid.json --engine matrix --config '{"num_items": 1000}' --output sweep.json
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import checkpoint
+import ksp_core
+from batch import load_json
+
+
+def grid_candidates(space):
+    """Every combination of the choices listed for each key."""
+    for key, choices in space.items():
+        if not isinstance(choices, list):
+            raise ValueError(f'Grid search needs a list of choices for {key}')
+    keys = list(space)
+    return [dict(zip(keys, combination)) for combination in itertools.product(*(space[k] for k in keys))]
+
+
+def sample_value(spec, rng):
+    if isinstance(spec, list):
+        return rng.choice(spec)
+    low, high = spec["min"], spec["max"]
+    if spec.get("log"):
+        value = math.exp(rng.uniform(math.log(low), math.log(high)))
+    else:
+        value = rng.uniform(low, high)
+    return int(round(value)) if spec.get("int") else value
+
+
+def random_candidates(space, count, rng):
+    """`count` distinct configurations drawn independently from the space."""
+    candidates = []
+    seen = set()
+    for _ in range(count * 20):
+        if len(candidates) == count:
+            break
+        candidate = {key: sample_value(spec, rng) for key, spec in space.items()}
+        key = json.dumps(candidate, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            candidates.append(candidate)
+    return candidates
+
+
+def _run(engine_name, cfg, seed, budget, path=None):
+    """
+    One seeded run for up to `budget` generations, continuing from the checkpoint at path if there is one.
+    Unfinished runs are checkpointed to path for the next rung; with path=None nothing is loaded or saved.
+    """
+    start = time.perf_counter()
+    if path is not None and os.path.exists(path):
+        engine = checkpoint.load(path)
+    else:
+        rng = random.Random(seed)
+        values = ksp_core.generate_values(cfg, rng)
+        target = ksp_core.pick_target(values, cfg, rng)
+        engine = ksp_core.make_engine(engine_name, values, target, cfg, seed)
+        engine.start()
+    limit = min(budget, cfg["num_generations"])
+    while True:
+        _, best_sum, _ = engine.best()
+        if best_sum == engine.target or engine.generation >= limit:
+            break
+        engine.advance()
+
+    solved = best_sum == engine.target
+    finished = solved or engine.generation >= cfg["num_generations"]
+    if not finished and path is not None:
+        checkpoint.save(path, engine)
+    return {"generations": engine.generation, "error": abs(best_sum - engine.target), "solved": solved,
+            "finished": finished, "evaluations": engine.evaluations, "elapsed": time.perf_counter() - start}
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Sweep:
+    """Runs candidate configurations on the same seeds and keeps every run's latest result."""
+    def __init__(self, candidates, base_cfg, seeds, engine="list", workers=None, work_dir=None):
+        self.candidates = candidates
+        self.base_cfg = base_cfg
+        self.seeds = seeds
+        self.engine = engine
+        self.workers = workers or os.cpu_count()
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix='sweep-')
+        os.makedirs(self.work_dir, exist_ok=True)
+        self.results = [{} for _ in candidates]  # candidate -> seed -> latest run record
+        self.budgets = [0] * len(candidates)  # generations each candidate was last allowed
+
+    def config(self, index):
+        return dict(self.base_cfg, **self.candidates[index])
+
+    def checkpoint_path(self, index, seed):
+        """Where a halving run keeps its checkpoint between rungs, named after everything that defines the run."""
+        key = json.dumps([self.engine, self.config(index), seed], sort_keys=True)
+        return os.path.join(self.work_dir, f'{hashlib.sha1(key.encode()).hexdigest()[:16]}.npz')
+
+    def evaluate(self, indices, budget, pool, resumable=False):
+        """
+        Runs (or continues) every seed of the given candidates up to `budget` generations.
+        Only resumable (halving) runs are checkpointed for the next rung.
+        """
+        futures = {}
+        for i in indices:
+            self.budgets[i] = budget
+            for seed in self.seeds:
+                previous = self.results[i].get(seed)
+                if previous is not None and previous["finished"]:
+                    continue
+                path = self.checkpoint_path(i, seed) if resumable else None
+                futures[pool.submit(_run, self.engine, self.config(i), seed, budget, path)] = (i, seed)
+        for future, (i, seed) in futures.items():
+            record = future.result()
+            previous = self.results[i].get(seed)
+            if previous is not None:
+                record["elapsed"] += previous["elapsed"]  # time to target counts every rung
+            self.results[i][seed] = record
+
+    def summary(self, index):
+        runs = list(self.results[index].values())
+        solved = [r for r in runs if r["solved"]]
+        times = [r["elapsed"] for r in solved]
+        generations = [r["generations"] for r in solved]
+        return {
+            "config": self.candidates[index],
+            "budget": self.budgets[index],
+            "runs": len(runs),
+            "solve_rate": len(solved) / len(runs) if runs else 0.0,
+            "mean_error": statistics.fmean(r["error"] for r in runs) if runs else math.inf,
+            "time_to_target": {"p10": percentile(times, 0.1), "median": statistics.median(times),
+                               "p90": percentile(times, 0.9), "all": sorted(times)} if times else None,
+            "generations_to_target": statistics.median(generations) if generations else None,
+            "evaluations": sum(r["evaluations"] for r in runs),
+        }
+
+    def rank_key(self, index):
+        s = self.summary(index)
+        median_time = s["time_to_target"]["median"] if s["time_to_target"] else math.inf
+        return -s["budget"], -s["solve_rate"], s["mean_error"], median_time
+
+    def ranked(self, indices=None):
+        indices = range(len(self.candidates)) if indices is None else indices
+        return sorted(indices, key=self.rank_key)
+
+    def pool(self):
+        context = multiprocessing.get_context("spawn")
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    def run(self):
+        """Every candidate for the full num_generations."""
+        with self.pool() as pool:
+            self.evaluate(range(len(self.candidates)), self.base_cfg["num_generations"], pool)
+        return self.ranked()
+
+    def run_halving(self, min_generations, eta=3):
+        """
+        Successive halving: keep the best 1/eta at each rung, giving them eta times the generations.
+        The last survivor always runs to num_generations.
+        """
+        max_generations = self.base_cfg["num_generations"]
+        indices = list(range(len(self.candidates)))
+        budget = min(min_generations, max_generations)
+        with self.pool() as pool:
+            while True:
+                self.evaluate(indices, budget, pool, resumable=True)
+                print(f'rung: {len(indices)} configurations at {budget} generations', file=sys.stderr)
+                if budget >= max_generations:
+                    break
+                if len(indices) > 1:
+                    indices = self.ranked(indices)[:max(1, len(indices) // eta)]
+                # a lone survivor has nothing left to compete with, so it goes straight to the full budget
+                budget = max_generations if len(indices) == 1 else min(budget * eta, max_generations)
+        return self.ranked()
+
+
+def format_table(sweep, order, top):
+    lines = [f'{"rank":>4} {"budget":>6} {"solved":>7} {"mean err":>10} {"t50 s":>8} {"t90 s":>8} {"gens":>6}  config']
+    for rank, index in enumerate(order[:top], 1):
+        s = sweep.summary(index)
+        ttt = s["time_to_target"]
+        t50 = f'{ttt["median"]:.3f}' if ttt else '-'
+        t90 = f'{ttt["p90"]:.3f}' if ttt else '-'
+        gens = f'{s["generations_to_target"]:.0f}' if s["generations_to_target"] is not None else '-'
+        lines.append(f'{rank:>4} {s["budget"]:>6} {s["solve_rate"]:>7.0%} {s["mean_error"]:>10.1f} {t50:>8} {t90:>8} '
+                     f'{gens:>6}  {json.dumps(s["config"])}')
+    return '\n'.join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Sweep ksp_core CONFIG values over seeded headless GA runs.")
+    search = parser.add_mutually_exclusive_group(required=True)
+    search.add_argument("--grid", help="JSON object (inline or file): CONFIG key -> list of values")
+    search.add_argument("--random", type=int, metavar="N", help="sample N configurations from --space")
+    parser.add_argument("--space", help="JSON object (inline or file) for --random: key -> list or {min, max}")
+    parser.add_argument("--halving", action="store_true", help="successive halving instead of full runs for all")
+    parser.add_argument("--eta", type=int, default=3, help="halving keeps 1/eta of the configurations per rung")
+    parser.add_argument("--min-generations", type=int, default=50, help="generations in the first halving rung")
+    parser.add_argument("--seeds", type=int, default=8, help="seeded runs per configuration")
+    parser.add_argument("--seed", type=int, default=0, help="first seed (also seeds --random)")
+    parser.add_argument("--config", default=None, help="JSON object (inline or file) of fixed CONFIG overrides")
+    parser.add_argument("--engine", default="list", choices=["list", "matrix", "pso"])
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--work-dir", default=None,
+                        help="empty directory where halving keeps run checkpoints (default: a temporary one)")
+    parser.add_argument("--top", type=int, default=20, help="rows of the printed table")
+    parser.add_argument("--output", default=None, help="write every summary and run record to this JSON file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    base_cfg = dict(ksp_core.CONFIG, **load_json(args.config))
+    if args.grid:
+        space = load_json(args.grid)
+        candidates = grid_candidates(space)
+    else:
+        if not args.space:
+            build_parser().error("--random needs --space")
+        space = load_json(args.space)
+        candidates = random_candidates(space, args.random, random.Random(args.seed))
+    unknown = set(space) - set(ksp_core.CONFIG)
+    if unknown:
+        build_parser().error(f'not CONFIG keys: {", ".join(sorted(unknown))}')
+
+    if args.work_dir and os.path.isdir(args.work_dir) and os.listdir(args.work_dir):
+        build_parser().error(f'--work-dir {args.work_dir} is not empty; its checkpoints could belong to another sweep')
+
+    seeds = list(range(args.seed, args.seed + args.seeds))
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix='sweep-') as tmp_dir:
+        sweep = Sweep(candidates, base_cfg, seeds, args.engine, args.workers, args.work_dir or tmp_dir)
+        order = sweep.run_halving(args.min_generations, args.eta) if args.halving else sweep.run()
+    print(format_table(sweep, order, args.top))
+    print(f'{len(candidates)} configurations x {len(seeds)} seeds in {time.perf_counter() - start:.1f} s')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"base_config": base_cfg, "seeds": seeds,
+                       "ranking": [dict(sweep.summary(i), runs_detail=sweep.results[i]) for i in order]},
+                      f, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
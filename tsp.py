@@ -2,21 +2,22 @@ import math
 import random
 import tkinter as tk
 from tkinter import *
+from tkinter import filedialog, simpledialog
+
 import numpy as np
 
-num_cities = 25
-num_roads = 100
+from tsp_core import num_cities, num_roads, AntColonyOptimization
+from checkpoint import Checkpointer, load as load_checkpoint
+from instance_store import TspInstance
+from profiling import Profiler
+
 city_scale = 5
 road_width = 4
 padding = 100
-
-# ACO parameters
-NUM_ANTS = 50
-ALPHA = 1.0  # Pheromone importance
-BETA = 2.0   # Distance importance
-RHO = 0.1    # Pheromone evaporation rate
-Q = 100      # Pheromone deposit factor
-MAX_ITERATIONS = 100
+profile_dir = 'profiles'
+profile_iterations = 20
+checkpoint_path = 'tsp_checkpoint.npz'
+checkpoint_seconds = 60
 
 class Node:
     def __init__(self, x, y):
@@ -41,84 +42,6 @@ class Edge:
                            width=road_width,
                            dash=style)
 
-class AntColonyOptimization:
-    def __init__(self, cities):
-        self.cities = cities
-        self.num_cities = len(cities)
-        self.pheromone = np.ones((self.num_cities, self.num_cities))
-        self.best_path = None
-        self.best_distance = float('inf')
-
-    def distance(self, city1, city2):
-        return math.sqrt((city1.x - city2.x)**2 + (city1.y - city2.y)**2)
-
-    def run(self, ui):
-        for iteration in range(MAX_ITERATIONS):
-            paths = self.construct_solutions()
-            self.update_pheromones(paths)
-            self.update_best_solution(paths)
-            if iteration % 10 == 0:
-                print(f"Iteration {iteration}: Best distance = {self.best_distance}")
-            ui.draw_solution(self.best_path)
-            ui.update()
-        return self.best_path
-
-    def construct_solutions(self):
-        paths = []
-        for _ in range(NUM_ANTS):
-            path = self.construct_path()
-            paths.append(path)
-        return paths
-
-    def construct_path(self):
-        unvisited = set(range(self.num_cities))
-        start = random.choice(list(unvisited))
-        path = [start]
-        unvisited.remove(start)
-
-        while unvisited:
-            current = path[-1]
-            next_city = self.choose_next_city(current, unvisited)
-            path.append(next_city)
-            unvisited.remove(next_city)
-
-        return path
-
-    def choose_next_city(self, current, unvisited):
-        probabilities = []
-        for city in unvisited:
-            pheromone = self.pheromone[current][city]
-            distance = self.distance(self.cities[current], self.cities[city])
-            probability = (pheromone ** ALPHA) * ((1.0 / distance) ** BETA)
-            probabilities.append((city, probability))
-
-        total = sum(prob for _, prob in probabilities)
-        normalized_probabilities = [(city, prob / total) for city, prob in probabilities]
-
-        return random.choices(
-            [city for city, _ in normalized_probabilities],
-            weights=[prob for _, prob in normalized_probabilities]
-        )[0]
-
-    def update_pheromones(self, paths):
-        self.pheromone *= (1 - RHO)
-        for path in paths:
-            distance = self.calculate_path_distance(path)
-            for i in range(len(path)):
-                j = (i + 1) % len(path)
-                self.pheromone[path[i]][path[j]] += Q / distance
-                self.pheromone[path[j]][path[i]] += Q / distance
-
-    def calculate_path_distance(self, path):
-        return sum(self.distance(self.cities[path[i]], self.cities[path[(i + 1) % len(path)]]) for i in range(len(path)))
-
-    def update_best_solution(self, paths):
-        for path in paths:
-            distance = self.calculate_path_distance(path)
-            if distance < self.best_distance:
-                self.best_distance = distance
-                self.best_path = path
-
 class UI(tk.Tk):
     def __init__(self):
         tk.Tk.__init__(self)
@@ -135,6 +58,8 @@ class UI(tk.Tk):
         self.roads_list = []
         self.edge_list = []
         self.aco = None
+        self.profiler = Profiler(profile_dir)
+        self.checkpointer = Checkpointer(checkpoint_path, checkpoint_seconds)
 
     def add_city(self):
         x = random.randint(padding, self.w)
@@ -163,6 +88,17 @@ class UI(tk.Tk):
         for r in range(num_roads):
             self.add_road()
 
+    def load_city(self, instance):
+        # cities and roads from an instance file; roads are stored as pairs of city indices.
+        # Every city and road becomes a drawn object, so this reads the whole mapped file.
+        self.cities_list = [Node(float(x), float(y)) for x, y in instance.coords]
+        self.roads_list = []
+        self.edge_list = []
+        for a, b in instance.edges:
+            a, b = int(a), int(b)
+            self.roads_list.append(f'{min(a, b)},{max(a, b)}')
+            self.edge_list.append(Edge(self.cities_list[a], self.cities_list[b]))
+
     def draw_city(self):
         self.canvas.delete("all")
         for e in self.edge_list:
@@ -187,11 +123,66 @@ class UI(tk.Tk):
     def generate(self):
         self.generate_city()
         self.draw_city()
-        self.aco = AntColonyOptimization(self.cities_list)
+        self.aco = AntColonyOptimization(self.cities_list, edges=self.road_edges())
+
+    def open_instance(self):
+        path = filedialog.askopenfilename(filetypes=[("Instances", "*.inst"), ("All files", "*")])
+        if path:
+            self.load_city(TspInstance.load(path))
+            self.draw_city()
+            self.aco = AntColonyOptimization(self.cities_list, edges=self.road_edges())
+
+    def road_edges(self):
+        # roads as city index pairs, the way instance files and checkpoints store them
+        edges = [tuple(int(i) for i in road.split(',')) for road in self.roads_list]
+        return np.array(edges, dtype=np.int32).reshape(-1, 2)
+
+    def save_instance(self):
+        path = filedialog.asksaveasfilename(defaultextension=".inst", filetypes=[("Instances", "*.inst")])
+        if path:
+            coords = [(n.x, n.y) for n in self.cities_list]
+            TspInstance(np.array(coords, dtype=np.float64).reshape(-1, 2), self.road_edges()).save(path)
+
+    def profile(self):
+        # the next run's (or the current run's) next N iterations go through cProfile and tracemalloc
+        iterations = simpledialog.askinteger("Profile", "Iterations to profile:", parent=self,
+                                             initialvalue=profile_iterations, minvalue=1)
+        if iterations:
+            self.profiler.request(iterations, 'tsp')
+
+    def resume(self):
+        # continue a saved colony (cities, pheromones, best tour, iteration and RNG) where it stopped
+        path = filedialog.askopenfilename(filetypes=[("Checkpoints", "*.npz"), ("All files", "*")])
+        if not path:
+            return
+        try:
+            aco = load_checkpoint(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(e)
+            return
+        if not isinstance(aco, AntColonyOptimization):
+            print(f'{path} is not a Traveling Salesman checkpoint')
+            return
+        self.load_city(TspInstance(np.array([(c.x, c.y) for c in aco.cities], dtype=np.float64), aco.edges))
+        self.draw_city()
+        self.aco = aco
+        print(f'Resuming {path} at iteration {aco.iteration}')
+        best_solution = self.aco.run(self.show_iteration, resume=True)
+        self.profiler.stop()
+        self.draw_solution(best_solution)
+
+    def show_iteration(self, iteration, best_path, best_distance):
+        self.profiler.tick()
+        self.checkpointer.tick(self.aco)
+        if iteration % 10 == 0:
+            print(f"Iteration {iteration}: Best distance = {best_distance}")
+        self.draw_solution(best_path)
+        self.update()
 
     def run_aco(self):
         if self.aco:
-            best_solution = self.aco.run(self)
+            best_solution = self.aco.run(self.show_iteration)
+            self.profiler.stop()
             self.draw_solution(best_solution)
 
     def create_menu(self):
@@ -201,6 +192,10 @@ class UI(tk.Tk):
         menu_bar.add_cascade(menu=menu_TS, label='Salesman', underline=0)
         menu_TS.add_command(label="Generate", command=self.generate, underline=0)
         menu_TS.add_command(label="Run ACO", command=self.run_aco, underline=0)
+        menu_TS.add_command(label="Open Instance...", command=self.open_instance, underline=0)
+        menu_TS.add_command(label="Save Instance...", command=self.save_instance, underline=0)
+        menu_TS.add_command(label="Resume Checkpoint...", command=self.resume, underline=0)
+        menu_TS.add_command(label="Profile Next Iterations...", command=self.profile, underline=0)
 
 if __name__ == '__main__':
     ui = UI()
@@ -0,0 +1,134 @@
+import math
+import random
+
+import numpy as np
+
+from metrics import NULL_METRICS
+
+num_cities = 25
+num_roads = 100
+
+# ACO parameters
+NUM_ANTS = 50
+ALPHA = 1.0  # Pheromone importance
+BETA = 2.0   # Distance importance
+RHO = 0.1    # Pheromone evaporation rate
+Q = 100      # Pheromone deposit factor
+MAX_ITERATIONS = 100
+
+
+class City:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+def random_cities(count, x_min, x_max, y_min, y_max, rng=random):
+    return [City(rng.randint(x_min, x_max), rng.randint(y_min, y_max)) for _ in range(count)]
+
+
+class AntColonyOptimization:
+    def __init__(self, cities, rng=None, num_ants=NUM_ANTS, alpha=ALPHA, beta=BETA, rho=RHO, q=Q,
+                 max_iterations=MAX_ITERATIONS, edges=None):
+        self.cities = cities
+        # roads of the map as city index pairs; the tours ignore them, but checkpoints keep them for redrawing
+        self.edges = np.asarray(edges if edges is not None else (), dtype=np.int32).reshape(-1, 2)
+        self.num_cities = len(cities)
+        self.rng = rng if rng is not None else random.Random()
+        self.num_ants = num_ants
+        self.alpha = alpha
+        self.beta = beta
+        self.rho = rho
+        self.q = q
+        self.max_iterations = max_iterations
+        self.pheromone = np.ones((self.num_cities, self.num_cities))
+        self.best_path = None
+        self.best_distance = float('inf')
+        self.iteration = 0  # iterations completed
+        self.evaluations = 0  # tours built so far, for benchmarking
+        self.metrics = NULL_METRICS  # set to a metrics.Metrics to time the phases of each iteration
+
+    def distance(self, city1, city2):
+        return math.sqrt((city1.x - city2.x)**2 + (city1.y - city2.y)**2)
+
+    def run(self, on_iteration=None, resume=False):
+        """
+        Runs max_iterations rounds of the colony.
+
+        :param on_iteration: Optional callback(iteration, best_path, best_distance), called after every iteration.
+        :param resume: Continue from self.iteration (e.g. a restored checkpoint) instead of starting over.
+        :return: The best path found.
+        """
+        if not resume:
+            self.iteration = 0
+        while self.iteration < self.max_iterations:
+            iteration = self.iteration
+            with self.metrics.phase("construction"):
+                paths = self.construct_solutions()
+            with self.metrics.phase("pheromone"):
+                self.update_pheromones(paths)
+            with self.metrics.phase("best"):
+                self.update_best_solution(paths)
+            self.metrics.count("tours", len(paths))
+            self.metrics.end_generation(iteration)
+            self.iteration += 1
+            if on_iteration is not None:
+                on_iteration(iteration, self.best_path, self.best_distance)
+        return self.best_path
+
+    def construct_solutions(self):
+        paths = []
+        for _ in range(self.num_ants):
+            path = self.construct_path()
+            paths.append(path)
+            self.evaluations += 1
+        return paths
+
+    def construct_path(self):
+        unvisited = set(range(self.num_cities))
+        start = self.rng.choice(list(unvisited))
+        path = [start]
+        unvisited.remove(start)
+
+        while unvisited:
+            current = path[-1]
+            next_city = self.choose_next_city(current, unvisited)
+            path.append(next_city)
+            unvisited.remove(next_city)
+
+        return path
+
+    def choose_next_city(self, current, unvisited):
+        probabilities = []
+        for city in unvisited:
+            pheromone = self.pheromone[current][city]
+            distance = self.distance(self.cities[current], self.cities[city])
+            probability = (pheromone ** self.alpha) * ((1.0 / distance) ** self.beta)
+            probabilities.append((city, probability))
+
+        total = sum(prob for _, prob in probabilities)
+        normalized_probabilities = [(city, prob / total) for city, prob in probabilities]
+
+        return self.rng.choices(
+            [city for city, _ in normalized_probabilities],
+            weights=[prob for _, prob in normalized_probabilities]
+        )[0]
+
+    def update_pheromones(self, paths):
+        self.pheromone *= (1 - self.rho)
+        for path in paths:
+            distance = self.calculate_path_distance(path)
+            for i in range(len(path)):
+                j = (i + 1) % len(path)
+                self.pheromone[path[i]][path[j]] += self.q / distance
+                self.pheromone[path[j]][path[i]] += self.q / distance
+
+    def calculate_path_distance(self, path):
+        return sum(self.distance(self.cities[path[i]], self.cities[path[(i + 1) % len(path)]]) for i in range(len(path)))
+
+    def update_best_solution(self, paths):
+        for path in paths:
+            distance = self.calculate_path_distance(path)
+            if distance < self.best_distance:
+                self.best_distance = distance
+                self.best_path = path
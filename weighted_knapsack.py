@@ -0,0 +1,376 @@
+"""
+Weighted 0/1 knapsack: items with a weight and a value, maximizing the total value within a capacity.
+
+Two solvers share the instance:
+    branch_and_bound   exact best-first search over items in value-density order, bounded by the fractional
+                       (LP) relaxation; with a frontier cap or a time limit it stops with a proven optimality gap
+    WeightedGA         the KnapsackGA operators over BitGenomes, each child greedily repaired to a full,
+                       feasible packing; it stops at a known optimum (or the LP bound, which proves one), or once
+                       its best value has not improved for weighted_patience generations
+"""
+import heapq
+import itertools
+import random
+import time
+from bisect import bisect_right
+
+from genomes import BitGenome, first_distinct
+from fitness_cache import FitnessCache
+from metrics import NULL_METRICS
+from mutation import decaying_rate, mutation_positions
+from stagnation import StagnationDetector
+
+# best-first keeps every open node; past this many it drops the half with the weakest bounds (see branch_and_bound)
+MAX_FRONTIER = 200000
+
+
+class WeightedInstance:
+    """Item weights and values with the knapsack capacity, plus the density order both solvers work in."""
+    def __init__(self, weights, values, capacity):
+        if len(weights) != len(values):
+            raise ValueError(f'{len(weights)} weights for {len(values)} values')
+        self.weights = [int(w) for w in weights]
+        self.values = [int(v) for v in values]
+        self.capacity = int(capacity)
+        # densest first; ties by index so the order is deterministic
+        self.order = sorted(range(len(self.values)), key=lambda i: (-self.values[i] / self.weights[i], i))
+        self.prefix_weights = list(itertools.accumulate((self.weights[i] for i in self.order), initial=0))
+        self.prefix_values = list(itertools.accumulate((self.values[i] for i in self.order), initial=0))
+
+    @classmethod
+    def random(cls, cfg, rng=random):
+        """
+        Weakly correlated instance: weights in min_weight..max_weight, each value its weight give or take a tenth
+        of max_weight, and a capacity of capacity_fraction of the total weight.
+        """
+        spread = cfg["max_weight"] // 10
+        weights = [rng.randint(cfg["min_weight"], cfg["max_weight"]) for _ in range(cfg["num_items"])]
+        values = [max(1, w + rng.randint(-spread, spread)) for w in weights]
+        return cls(weights, values, int(sum(weights) * cfg["capacity_fraction"]))
+
+    def __len__(self):
+        return len(self.values)
+
+    def weight_of(self, indices):
+        return sum(self.weights[i] for i in indices)
+
+    def value_of(self, indices):
+        return sum(self.values[i] for i in indices)
+
+    def relaxation(self, level, room):
+        """
+        Fractional relaxation of items order[level:] in `room` capacity: they are taken whole in density order
+        up to order[k - 1], and a fraction of order[k] fills the rest.
+        :return: (bound, k, whole): the relaxation's value rounded down (values are ints, so no packing can beat
+                 it), and the value of the items taken whole.
+        """
+        prefix_weights = self.prefix_weights
+        k = bisect_right(prefix_weights, prefix_weights[level] + room, lo=level) - 1
+        whole = self.prefix_values[k] - self.prefix_values[level]
+        bound = whole
+        if k < len(self.order):
+            i = self.order[k]
+            bound += (room - (prefix_weights[k] - prefix_weights[level])) * self.values[i] // self.weights[i]
+        return bound, k, whole
+
+    def upper_bound(self):
+        """Best value any packing can reach: the integral part of the LP relaxation."""
+        return self.relaxation(0, self.capacity)[0]
+
+    def greedy(self):
+        """Indices of the greedy packing: every item, densest first, that still fits."""
+        room = self.capacity
+        chosen = []
+        for i in self.order:
+            if self.weights[i] <= room:
+                chosen.append(i)
+                room -= self.weights[i]
+        return sorted(chosen)
+
+
+class WeightedResult:
+    """Packing found by a weighted knapsack solver, with the best bound proven on the optimum."""
+    def __init__(self, indices, value, weight, capacity, upper_bound, method, elapsed, nodes=0):
+        self.indices = indices
+        self.value = value
+        self.weight = weight
+        self.capacity = capacity
+        self.upper_bound = upper_bound
+        self.method = method
+        self.elapsed = elapsed
+        self.nodes = nodes
+
+    @property
+    def optimal(self):
+        return self.value >= self.upper_bound
+
+    @property
+    def gap(self):
+        """Relative distance to the proven bound: 0 when optimal."""
+        return (self.upper_bound - self.value) / self.upper_bound if self.upper_bound else 0.0
+
+    def genome(self, num_items):
+        """The solution as a list of bools, one per item."""
+        genome = [False] * num_items
+        for i in self.indices:
+            genome[i] = True
+        return genome
+
+    def __repr__(self):
+        status = 'optimal' if self.optimal else f'gap {self.gap:.4%} to bound {self.upper_bound}'
+        return (f'WeightedResult({self.method}: value {self.value}, weight {self.weight}/{self.capacity}, '
+                f'{status}, {self.nodes} nodes, {self.elapsed * 1000:.2f} ms)')
+
+
+def branch_and_bound(instance, max_frontier=MAX_FRONTIER, time_limit=None):
+    """
+    Best-first branch and bound. Nodes fix the items of the density order one at a time (level = items decided)
+    and are expanded highest LP bound first, so the first node whose bound cannot beat the incumbent proves it
+    optimal. Every node's LP solution rounded down to its whole items is a feasible packing, which keeps the
+    incumbent close to the bound from the start.
+
+    When the frontier outgrows max_frontier, the half with the weakest bounds is dropped and the best dropped
+    bound is remembered, so memory stays bounded and the result still carries a proven upper bound.
+    :param time_limit: Seconds after which the search stops with the gap reached so far.
+    :return: WeightedResult
+    """
+    start = time.perf_counter()
+    order = instance.order
+    weights = [instance.weights[i] for i in order]
+    values = [instance.values[i] for i in order]
+    n = len(order)
+
+    # incumbent as a set of positions in the density order, kept as a bit int
+    best_positions = 0
+    best_value = 0
+    room = instance.capacity
+    for level in range(n):
+        if weights[level] <= room:
+            room -= weights[level]
+            best_value += values[level]
+            best_positions |= 1 << level
+
+    dropped_bound = 0  # best bound among the nodes dropped to respect max_frontier
+    counter = itertools.count()  # heap tie-break: deeper nodes first, then oldest
+    bound, _, _ = instance.relaxation(0, instance.capacity)
+    frontier = [(-bound, 0, next(counter), 0, 0, instance.capacity, 0)]
+    nodes = 0
+    while frontier:
+        neg_bound, _, _, level, value, room, taken = heapq.heappop(frontier)
+        if -neg_bound <= best_value:
+            # every open node has a bound at least this low
+            frontier = []
+            break
+        if time_limit is not None and nodes % 1024 == 0 and time.perf_counter() - start > time_limit:
+            heapq.heappush(frontier, (neg_bound, -level, next(counter), level, value, room, taken))
+            break
+        nodes += 1
+
+        # the node's own LP solution without its fractional item is a feasible packing
+        _, k, whole = instance.relaxation(level, room)
+        if value + whole > best_value:
+            best_value = value + whole
+            best_positions = taken | (((1 << k) - 1) ^ ((1 << level) - 1))
+        if k >= n:
+            continue  # everything left fits: that packing is this node's optimum
+
+        # branch on the next item: take it (if it fits) or leave it out
+        children = [(level + 1, value, room, taken)]
+        if weights[level] <= room:
+            children.append((level + 1, value + values[level], room - weights[level], taken | (1 << level)))
+        for child_level, child_value, child_room, child_taken in children:
+            child_bound = child_value
+            if child_level < n:
+                child_bound += instance.relaxation(child_level, child_room)[0]
+            if child_bound > best_value:
+                heapq.heappush(frontier, (-child_bound, -child_level, next(counter),
+                                          child_level, child_value, child_room, child_taken))
+
+        if len(frontier) > max_frontier:
+            frontier.sort()
+            kept = frontier[:max_frontier // 2]
+            dropped_bound = max(dropped_bound, -frontier[max_frontier // 2][0])
+            frontier = kept  # a sorted list is a valid heap
+
+    open_bound = -frontier[0][0] if frontier else 0
+    upper_bound = max(best_value, open_bound, dropped_bound)
+    indices = sorted(order[level] for level in range(n) if (best_positions >> level) & 1)
+    return WeightedResult(indices, best_value, instance.weight_of(indices), instance.capacity, upper_bound,
+                          'branch-and-bound', time.perf_counter() - start, nodes)
+
+
+class WeightedGA:
+    """
+    KnapsackGA for weighted instances: elitism, tournament selection, uniform crossover and adaptive mutation over
+    BitGenomes, with every new genome repaired to a feasible packing that no further item fits into.
+    Fitness is the packed value. `target` is the optimum when it is known (e.g. from branch_and_bound) and the
+    LP upper bound otherwise; the bound is rarely reachable, so such runs end when `converged`.
+    """
+    def __init__(self, instance, cfg, rng=None, optimum=None):
+        self.instance = instance
+        self.values = instance.values
+        self.weights = instance.weights
+        self.capacity = instance.capacity
+        self.upper_bound = instance.upper_bound()
+        self.target = optimum if optimum is not None else self.upper_bound
+        self.cfg = cfg
+        self.rng = rng if rng is not None else random.Random()
+        self.min_weight = min(self.weights, default=0)
+        # initial genomes set each gene with the probability that roughly fills the knapsack
+        self.fill_fraction = min(1.0, self.capacity / max(sum(self.weights), 1))
+        self.fitness = FitnessCache(self.raw_fitness, cfg.get("fitness_cache_size", 10000))
+        self.population = None
+        self.generation = 0
+        self.evaluations = 0  # fitness evaluations that missed the cache, for benchmarking
+        self.metrics = NULL_METRICS  # set to a metrics.Metrics to time the phases of each generation
+        self.stagnation = StagnationDetector.from_config(cfg)
+        self.best_value = 0
+        self.last_improvement = 0  # generation at which best_value was reached
+
+    @property
+    def converged(self):
+        """True once the best value has not improved for weighted_patience generations."""
+        patience = self.cfg.get("weighted_patience")
+        return bool(patience) and self.generation - self.last_improvement >= patience
+
+    def track_improvement(self):
+        value = self.best()[1]
+        if value > self.best_value:
+            self.best_value = value
+            self.last_improvement = self.generation
+
+    def weight_of(self, genome):
+        return self.instance.weight_of(genome.set_indices())
+
+    def value_of(self, genome):
+        return self.instance.value_of(genome.set_indices())
+
+    def raw_fitness(self, genome):
+        self.evaluations += 1
+        return self.value_of(genome)
+
+    def repair(self, genome):
+        """
+        Greedy repair in place: drops the least dense set items until the genome fits the capacity, then adds
+        the densest unset items that still fit.
+        """
+        weights = self.weights
+        weight = self.weight_of(genome)
+        for i in reversed(self.instance.order):
+            if weight <= self.capacity:
+                break
+            if genome[i]:
+                genome.flip(i)
+                weight -= weights[i]
+        for i in self.instance.order:
+            if self.capacity - weight < self.min_weight:
+                break
+            if not genome[i] and weights[i] <= self.capacity - weight:
+                genome.flip(i)
+                weight += weights[i]
+        return genome
+
+    def random_genome(self):
+        return self.repair(BitGenome.random(len(self.values), self.fill_fraction, self.rng))
+
+    def tournament_selection(self, population):
+        """Select a parent using tournament selection."""
+        contenders = self.rng.sample(population, self.cfg["tournament_size"])
+        return max(contenders, key=self.fitness)
+
+    def crossover(self, p1, p2):
+        """Uniform crossover to create a child genome, one random mask bit per gene."""
+        return p1.crossover(p2, self.rng.getrandbits(len(p1)))
+
+    def mutate(self, genome, rate):
+        """Copy of the genome with each gene flipped with probability rate."""
+        mutated = genome.copy()
+        for i in mutation_positions(len(mutated), rate, self.rng):
+            mutated.flip(i)
+        return mutated
+
+    def evolve_population(self, old_pop, generation):
+        """Generate a new population from the old one using elitism, selection, crossover, mutation and repair."""
+        with self.metrics.phase("evaluation"):
+            sorted_pop = sorted(old_pop, key=self.fitness, reverse=True)
+        new_pop = first_distinct(sorted_pop, self.cfg["elitism_count"])
+
+        count = self.cfg["pop_size"] - len(new_pop)
+        with self.metrics.phase("selection"):
+            parents = [(self.tournament_selection(old_pop), self.tournament_selection(old_pop)) for _ in range(count)]
+        with self.metrics.phase("crossover"):
+            children = [self.crossover(p1, p2) for p1, p2 in parents]
+        with self.metrics.phase("mutation"):
+            rate = decaying_rate(generation, self.cfg["num_generations"],
+                                 self.cfg["initial_mutation_rate"], self.cfg["min_mutation_rate"])
+            children = [self.mutate(child, rate) for child in children]
+        with self.metrics.phase("repair"):
+            for child in children:
+                self.repair(child)
+        with self.metrics.phase("dedupe"):
+            seen = {genome.key for genome in new_pop}
+            self.metrics.count("duplicates", self.make_distinct(children, seen))
+
+        return new_pop + children
+
+    def make_distinct(self, children, seen):
+        """
+        genomes.make_distinct for repaired children: a duplicate gets a random gene flip and is repaired again,
+        until it is new or dedupe_retries flips were tried, so the keys checked are those of feasible packings.
+        :return: How many children were duplicates.
+        """
+        duplicates = 0
+        for child in children:
+            if child.key in seen:
+                duplicates += 1
+                for _ in range(self.cfg["dedupe_retries"]):
+                    child.flip(self.rng.randrange(len(child)))
+                    self.repair(child)
+                    if child.key not in seen:
+                        break
+            seen.add(child.key)
+        return duplicates
+
+    def ranked(self):
+        """The population, most valuable first."""
+        return sorted(self.population, key=self.fitness, reverse=True)
+
+    def reseed(self, fraction, keep):
+        """Replaces the worst `fraction` of the genomes other than the `keep` best with random ones."""
+        ranked = self.ranked()
+        count = round((len(ranked) - keep) * fraction)
+        self.population = ranked[:len(ranked) - count] + [self.random_genome() for _ in range(count)]
+
+    def hypermutate(self, rate, keep):
+        """Mutates (and repairs) every genome but the `keep` best at the given rate."""
+        ranked = self.ranked()
+        self.population = ranked[:keep] + [self.repair(self.mutate(g, rate)) for g in ranked[keep:]]
+
+    def start(self):
+        """Creates generation 0."""
+        self.population = [self.random_genome() for _ in range(self.cfg["pop_size"])]
+        self.generation = 0
+        self.best_value = 0
+        self.track_improvement()
+
+    def advance(self):
+        """Evolves one generation."""
+        self.population = self.evolve_population(self.population, self.generation)
+        self.generation += 1
+        if self.stagnation is not None:
+            self.stagnation.step(self)
+        self.track_improvement()
+        self.metrics.end_generation(self.generation)
+
+    def best(self):
+        """Returns (genome, value, fitness) of the most valuable genome; value and fitness are the same."""
+        best = max(self.population, key=self.fitness)
+        value = self.fitness(best)
+        return best, value, value
+
+    def result(self, elapsed=0.0):
+        """The best genome as a WeightedResult, with the instance's LP bound as the proven bound."""
+        best, value, _ = self.best()
+        indices = list(best.set_indices())
+        return WeightedResult(indices, value, self.weight_of(best), self.capacity, self.upper_bound,
+                              'genetic', elapsed)